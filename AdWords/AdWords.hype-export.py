@@ -10,13 +10,33 @@
 #	Copyright (c) 2018 Tumult Inc.
 #
 
+import os
+import sys
+
+# optional helpers shared by the Export Scripts, installed next to this script (or in the
+# repository's Shared folder); the script behaves as before when they are missing
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.extend([script_folder, os.path.join(os.path.dirname(script_folder), "Shared")])
+
+# when a fork server is running (see hype_export_server.py) this call runs there instead, with
+# everything below already imported, and exits here with its result
+if __name__ == "__main__":
+	try:
+		import hype_export_launcher
+		hype_export_launcher.run_in_fork_server(__file__)
+	except ImportError:
+		pass
+
 import argparse
 import codecs
 import json
-import sys
 import distutils.util
-import os
- 
+
+try:
+	import hype_export_shared
+except ImportError:
+	hype_export_shared = None
+
 # update info
 current_script_version = 3
 version_info_url = "https://static.tumult.com/hype/export-scripts/AdWords/latest_script_version.txt" # only returns a version number
@@ -175,20 +195,35 @@ def main():
 		index_path = os.path.join(args.modify_staging_path, export_info['html_filename'].encode("utf-8"))
 		perform_html_additions(index_path)
 
+		# resources only later scenes show are prefetched after the first scene instead of preloaded,
+		# and video and audio wait for their scene
+		if hype_export_shared != None:
+			hype_export_shared.defer_non_initial_scene_resources(args.modify_staging_path, index_path)
+			hype_export_shared.defer_scene_media(args.modify_staging_path, index_path)
+
 		# move to final location and zip up if not a preview
 		import shutil
-		shutil.rmtree(args.destination_path, ignore_errors=True)
 		
 		if is_preview == True:
-			shutil.move(args.modify_staging_path, args.destination_path)
+			if hype_export_shared != None:
+				hype_export_shared.publish_preview(args.modify_staging_path, args.destination_path, args.export_uid)
+			else:
+				shutil.rmtree(args.destination_path, ignore_errors=True)
+				shutil.move(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 		else:
+			shutil.rmtree(args.destination_path, ignore_errors=True)
 			zip(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 
 	## --check_for_updates
 	##		return a dictionary with "url", "from_version", and "to_version" keys if there is an update, otherwise don't return anything and exit
 	##		it is your responsibility to decide how often to check
+	elif args.check_for_updates and hype_export_shared != None:
+		update_info = hype_export_shared.check_for_updates(version_info_url, current_script_version, download_url, minimum_update_check_duration_in_seconds)
+		if update_info != None:
+			exit_with_result(update_info)
+
 	elif args.check_for_updates:
 		import subprocess
 		import urllib2
@@ -251,6 +286,10 @@ def exit_with_result(result):
 
 # from http://stackoverflow.com/questions/14568647/create-zip-in-python
 def zip(src, dst):
+	# the shared helpers write the zip atomically and verify it
+	if hype_export_shared != None:
+		hype_export_shared.write_zip(src, dst)
+		return
 	import os
 	import zipfile
 	zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
@@ -264,4 +303,7 @@ def zip(src, dst):
 
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	if hype_export_shared != None:
+		hype_export_shared.run_main(main)
+	else:
+		main()
\ No newline at end of file
@@ -11,12 +11,32 @@
 #		Copyright (c) 2023 Tumult Inc.
 #
 
+import os
+import sys
+
+# optional helpers shared by the Export Scripts, installed next to this script (or in the
+# repository's Shared folder); the script behaves as before when they are missing
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.extend([script_folder, os.path.join(os.path.dirname(script_folder), "Shared")])
+
+# when a fork server is running (see hype_export_server.py) this call runs there instead, with
+# everything below already imported, and exits here with its result
+if __name__ == "__main__":
+	try:
+		import hype_export_launcher
+		hype_export_launcher.run_in_fork_server(__file__)
+	except ImportError:
+		pass
+
 import argparse
 import codecs
 import json
-import sys
 import distutils.util
-import os
+
+try:
+	import hype_export_shared
+except ImportError:
+	hype_export_shared = None
 
 # update info
 current_script_version = 2
@@ -40,61 +60,45 @@ insert_at_head_end = """
 		  target: "%banner.target%",
 		  rnd: parseInt("%request.place_random%") || parseInt("%system.random%"),
 		  events: [
-				"",
-				"%banner.event1%",
-				"%banner.event2%",
-				"%banner.event3%",
-				"%banner.event4%",
-				"%banner.event5%",
-				"%banner.event6%",
-				"%banner.event7%",
-				"%banner.event8%",
-				"%banner.event9%",
-				"%banner.event10%",
-				"%banner.event11%",
-				"%banner.event12%",
-				"%banner.event13%",
-				"%banner.event14%",
-				"%banner.event15%",
-				"%banner.event16%",
-				"%banner.event17%",
-				"%banner.event18%",
-				"%banner.event19%",
-				"%banner.event20%",
-				"%banner.event21%",
-				"%banner.event22%",
-				"%banner.event23%",
-				"%banner.event24%",
-				"%banner.event25%",
-				"%banner.event26%",
-				"%banner.event27%",
-				"%banner.event28%",
-				"%banner.event29%",
-				"%banner.event30%"
+${events}
 		  ]
-		};
+		};${shim_functions}
+	</script>
+"""
+
+insert_at_body_start = ""
+insert_at_body_end = ""
+
+# functions for the extra actions; only the ones a document uses are included
+shim_functions = [
+	("callClick", """
 	function callClick(n) {
 		  var link = ( n ? flashVars.events[n] : flashVars.link );
 		  window.open(flashVars.reference + "@" + flashVars.link, flashVars.target);
 	}
-
+	"""),
+	("callEvent", """
 	function callEvent(n) {
 		  (new Image()).src = flashVars.events[n]; 
 	}
-	
+	"""),
+	("hypeAdExit", """
 	function hypeAdExit() {
 		callClick();
 	}
-	
+	"""),
+	("hypeAdEvent", """
 	function hypeAdEvent(eventNumber) {
 		callEvent(parseInt(eventNumber));
 	}
-	
-	</script>
-"""
+	"""),
+]
 
-insert_at_body_start = ""
-insert_at_body_end = ""
+# callClick() is Adfox's click handler, so it is kept even without an Exit action
+required_shim_functions = ["callClick"]
+
+# %banner.eventN% macros Adfox fills in; only the ones a document uses are included
+event_count = 30
 
 class HypeURLType:
 	Unknown = 0
@@ -244,22 +248,48 @@ def main():
 		head_start_template = string.Template(insert_at_head_start)
 		insert_at_head_start = head_start_template.substitute({'width' : export_info['main_container_width'], 'height' : export_info['main_container_height'] })
 		
+		# only include the functions and event macros the document uses
+		global insert_at_head_end
+		used_shim_functions = shim_functions
+		event_numbers = range(1, event_count + 1)
+		if hype_export_shared != None:
+			references = hype_export_shared.document_name_references(args.modify_staging_path, [name for name, source in shim_functions] + ["flashVars"])
+			used_shim_functions = hype_export_shared.used_shim_functions(shim_functions, export_info, args.modify_staging_path, required_shim_functions, references)
+			event_numbers = used_event_numbers(export_info, references)
+		head_end_template = string.Template(insert_at_head_end)
+		insert_at_head_end = head_end_template.substitute({"events" : flash_vars_events(event_numbers), "shim_functions" : "".join(source for name, source in used_shim_functions)})
+		
 		index_path = os.path.join(args.modify_staging_path, export_info['html_filename'].encode("utf-8"))
 		perform_html_additions(index_path)
 
+		# resources only later scenes show are prefetched after the first scene instead of preloaded,
+		# and video and audio wait for their scene
+		if hype_export_shared != None:
+			hype_export_shared.defer_non_initial_scene_resources(args.modify_staging_path, index_path)
+			hype_export_shared.defer_scene_media(args.modify_staging_path, index_path)
+
 		import shutil
-		shutil.rmtree(args.destination_path, ignore_errors=True)
 		
 		if is_preview == True:
-			shutil.move(args.modify_staging_path, args.destination_path)
+			if hype_export_shared != None:
+				hype_export_shared.publish_preview(args.modify_staging_path, args.destination_path, args.export_uid)
+			else:
+				shutil.rmtree(args.destination_path, ignore_errors=True)
+				shutil.move(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 		else:
+			shutil.rmtree(args.destination_path, ignore_errors=True)
 			zip(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 
 	## --check_for_updates
 	##		return a dictionary with "url", "from_version", and "to_version" keys if there is an update, otherwise don't return anything and exit
 	##		it is your responsibility to decide how often to check
+	elif args.check_for_updates and hype_export_shared != None:
+		update_info = hype_export_shared.check_for_updates(version_info_url, current_script_version, download_url, minimum_update_check_duration_in_seconds)
+		if update_info != None:
+			exit_with_result(update_info)
+
 	elif args.check_for_updates:
 		import subprocess
 		import urllib2
@@ -282,6 +312,35 @@ def main():
 			pass
 
 
+# the event numbers passed to hypeAdEvent() by extra actions or to hypeAdEvent()/callEvent() by the
+# document's code; all of them when one can't be told, or the code uses flashVars itself
+def used_event_numbers(export_info, references):
+	all_event_numbers = range(1, event_count + 1)
+	if "flashVars" in references:
+		return all_event_numbers
+	
+	event_arguments = [arguments[0] if len(arguments) > 0 else None for arguments in hype_export_shared.extra_action_arguments(export_info, "hypeAdEvent")]
+	event_arguments += references.get("hypeAdEvent", []) + references.get("callEvent", [])
+	event_numbers = set()
+	for argument in event_arguments:
+		if argument == None:
+			return all_event_numbers
+		argument = argument.strip()
+		if len(argument) >= 2 and argument[0] == argument[-1] and argument[0] in "\"'":
+			argument = argument[1:-1].strip()
+		if argument.isdigit() == False:
+			return all_event_numbers
+		event_numbers.add(int(argument))
+	return sorted(number for number in event_numbers if 1 <= number <= event_count)
+
+# the flashVars.events array, indexed by event number, with empty strings for unused events
+def flash_vars_events(event_numbers):
+	slots = ['""'] * (max(event_numbers or [0]) + 1)
+	for number in event_numbers:
+		slots[number] = '"%%banner.event%d%%"' % number
+	return ",\n".join("\t\t\t\t" + slot for slot in slots)
+
+
 # HTML FILE MODIFICATION
 
 def perform_html_additions(index_path):
@@ -322,6 +381,10 @@ def exit_with_result(result):
 
 # from http://stackoverflow.com/questions/14568647/create-zip-in-python
 def zip(src, dst):
+	# the shared helpers write the zip atomically and verify it
+	if hype_export_shared != None:
+		hype_export_shared.write_zip(src, dst)
+		return
 	import os
 	import zipfile
 	zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
@@ -335,4 +398,7 @@ def zip(src, dst):
 
 
 if __name__ == "__main__":
-	main()
+	if hype_export_shared != None:
+		hype_export_shared.run_main(main)
+	else:
+		main()
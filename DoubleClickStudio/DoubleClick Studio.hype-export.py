@@ -10,12 +10,32 @@
 #		Copyright (c) 2017 Tumult Inc.
 #
 
+import os
+import sys
+
+# optional helpers shared by the Export Scripts, installed next to this script (or in the
+# repository's Shared folder); the script behaves as before when they are missing
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.extend([script_folder, os.path.join(os.path.dirname(script_folder), "Shared")])
+
+# when a fork server is running (see hype_export_server.py) this call runs there instead, with
+# everything below already imported, and exits here with its result
+if __name__ == "__main__":
+	try:
+		import hype_export_launcher
+		hype_export_launcher.run_in_fork_server(__file__)
+	except ImportError:
+		pass
+
 import argparse
 import codecs
 import json
-import sys
 import distutils.util
-import os
+
+try:
+	import hype_export_shared
+except ImportError:
+	hype_export_shared = None
 
 # update info
 current_script_version = 5
@@ -90,7 +110,20 @@ insert_at_head_end = """
 		window.addEventListener('load', preInit);
 
 	})();
-	
+	${shim_functions}
+	function hypeAdDummyInteractions() {
+		${dummy_interactions}
+	}
+		
+	</script>
+"""
+
+insert_at_body_start = ""
+insert_at_body_end = ""
+
+# functions for the extra actions; only the ones a document uses are included
+shim_functions = [
+	("hypeAdExit", """
 	function hypeAdExit(identifier, url) {
 		if(url != null) {
 			Enabler.exitOverride(identifier, url);
@@ -98,28 +131,26 @@ insert_at_head_end = """
 			Enabler.exit(identifier, url);		
 		}
 	}
-	
+	"""),
+	("hypeAdCounter", """
 	function hypeAdCounter(identifier) {
 		Enabler.counter(identifier);
 	}
-	
+	"""),
+	("hypeAdStartTimer", """
 	function hypeAdStartTimer(identifier) {
 		Enabler.startTimer(identifier);
 	}
-	
+	"""),
+	("hypeAdStopTimer", """
 	function hypeAdStopTimer(identifier) {
 		Enabler.stopTimer(identifier);
 	}
-	
-	function hypeAdDummyInteractions() {
-		${dummy_interactions}
-	}
-		
-	</script>
-"""
+	"""),
+]
 
-insert_at_body_start = ""
-insert_at_body_end = ""
+# Studio's validation requires an exit
+required_shim_functions = ["hypeAdExit"]
 
 function_name_mapping = { "hypeAdExit" : "Enabler.exit", "hypeAdCounter" : "Enabler.counter", "hypeAdStartTimer" : "Enabler.startTimer", "hypeAdStopTimer" : "Enabler.stopTimer" }
 def construct_dummy_interaction(function_name, arguments):	
@@ -136,6 +167,23 @@ def construct_dummy_interaction(function_name, arguments):
 	return "" + replaced_function_name + "(" + ",".join(arguments) + ")"
 
 
+# one line per extra action usage (or per distinct usage, with the shared helpers) for ad parsers to find
+def build_dummy_interactions(export_info):
+	if hype_export_shared != None:
+		action_usages = hype_export_shared.extra_action_index(export_info)
+		hype_export_shared.add_to_report("extra_actions", hype_export_shared.extra_action_report(action_usages))
+	else:
+		action_usages = export_info['extra_actions']
+	
+	dummy_interactions = []
+	for actionInfo in action_usages:
+		dummy_interaction = construct_dummy_interaction(actionInfo["function"], actionInfo["arguments"])
+		if dummy_interaction == None:
+			continue
+		dummy_interactions.append("\t\t" + dummy_interaction + ";\n")
+	return "".join(dummy_interactions)
+
+
 class HypeURLType:
 	Unknown = 0
 	HypeJS = 1
@@ -291,32 +339,45 @@ def main():
 		# insert interactions for dummy code so it is picked up by ad parsers		
 		global insert_at_head_end
 		template = string.Template(insert_at_head_end)
-		dummy_interactions = ""
-		for actionInfo in export_info['extra_actions']:
-			dummy_interaction = construct_dummy_interaction(actionInfo["function"], actionInfo["arguments"])
-			if dummy_interaction == None:
-				continue
-			dummy_interactions = dummy_interactions + "\t\t" + dummy_interaction + ";\n"
-		insert_at_head_end = template.substitute({"dummy_interactions" : dummy_interactions})
+		dummy_interactions = build_dummy_interactions(export_info)
+		used_shim_functions = shim_functions
+		if hype_export_shared != None:
+			used_shim_functions = hype_export_shared.used_shim_functions(shim_functions, export_info, args.modify_staging_path, required_shim_functions)
+		insert_at_head_end = template.substitute({"dummy_interactions" : dummy_interactions, "shim_functions" : "".join(source for name, source in used_shim_functions)})
 
 		# rewrite HTML file
 		index_path = os.path.join(args.modify_staging_path, export_info['html_filename'].encode("utf-8"))
 		perform_html_additions(index_path)
 
+		# resources only later scenes show are prefetched after the first scene instead of preloaded,
+		# and video and audio wait for their scene
+		if hype_export_shared != None:
+			hype_export_shared.defer_non_initial_scene_resources(args.modify_staging_path, index_path)
+			hype_export_shared.defer_scene_media(args.modify_staging_path, index_path)
+
 		# move to final location and zip up if not a preview
 		import shutil
-		shutil.rmtree(args.destination_path, ignore_errors=True)
 		
 		if is_preview == True:
-			shutil.move(args.modify_staging_path, args.destination_path)
+			if hype_export_shared != None:
+				hype_export_shared.publish_preview(args.modify_staging_path, args.destination_path, args.export_uid)
+			else:
+				shutil.rmtree(args.destination_path, ignore_errors=True)
+				shutil.move(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 		else:
+			shutil.rmtree(args.destination_path, ignore_errors=True)
 			zip(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 
 	## --check_for_updates
 	##		return a dictionary with "url", "from_version", and "to_version" keys if there is an update, otherwise don't return anything and exit
 	##		it is your responsibility to decide how often to check
+	elif args.check_for_updates and hype_export_shared != None:
+		update_info = hype_export_shared.check_for_updates(version_info_url, current_script_version, download_url, minimum_update_check_duration_in_seconds)
+		if update_info != None:
+			exit_with_result(update_info)
+
 	elif args.check_for_updates:
 		import subprocess
 		import urllib2
@@ -379,6 +440,10 @@ def exit_with_result(result):
 
 # from http://stackoverflow.com/questions/14568647/create-zip-in-python
 def zip(src, dst):
+	# the shared helpers write the zip atomically and verify it
+	if hype_export_shared != None:
+		hype_export_shared.write_zip(src, dst)
+		return
 	import os
 	import zipfile
 	zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
@@ -392,4 +457,7 @@ def zip(src, dst):
 
 
 if __name__ == "__main__":
-	main()
+	if hype_export_shared != None:
+		hype_export_shared.run_main(main)
+	else:
+		main()
@@ -10,12 +10,32 @@
 #		Copyright (c) 2017 Tumult Inc.
 #
 
+import os
+import sys
+
+# optional helpers shared by the Export Scripts, installed next to this script (or in the
+# repository's Shared folder); the script behaves as before when they are missing
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.extend([script_folder, os.path.join(os.path.dirname(script_folder), "Shared")])
+
+# when a fork server is running (see hype_export_server.py) this call runs there instead, with
+# everything below already imported, and exits here with its result
+if __name__ == "__main__":
+	try:
+		import hype_export_launcher
+		hype_export_launcher.run_in_fork_server(__file__)
+	except ImportError:
+		pass
+
 import argparse
 import codecs
 import json
-import sys
 import distutils.util
-import os
+
+try:
+	import hype_export_shared
+except ImportError:
+	hype_export_shared = None
 
 # update info
 current_script_version = 4
@@ -77,6 +97,36 @@ insert_at_head_end = """
 
 """
 
+# used instead of insert_at_head_end in Page Per Scene mode; each page starts on its own scene
+# (returning false keeps Hype from showing the initial scene first) and goes to the page of any
+# other scene the document moves to
+scene_page_insert_at_head_end = """
+
+<script>
+
+  function scenePageDocumentLoad(hypeDocument, element, event) {
+		hypeDocument.showSceneNamed(${scene_name}, hypeDocument.kSceneTransitionInstant);
+		return false;
+  }
+
+  function scenePageSceneLoad(hypeDocument, element, event) {
+		var scenePages = ${scene_pages};
+		var sceneName = hypeDocument.currentSceneName();
+		if (sceneName != ${scene_name} && scenePages[sceneName] != null) {
+			window.location.href = scenePages[sceneName];
+		}
+  }
+
+  if("HYPE_eventListeners" in window === false) {
+    window.HYPE_eventListeners = Array();
+  }
+  window.HYPE_eventListeners.push({"type":"HypeDocumentLoad", "callback":scenePageDocumentLoad});
+  window.HYPE_eventListeners.push({"type":"HypeSceneLoad", "callback":scenePageSceneLoad});
+
+</script>
+
+"""
+
 insert_at_head_start = ""
 insert_at_body_start = ""
 insert_at_body_end = ""
@@ -159,7 +209,7 @@ def main():
 			}
 	
 		def document_arguments():
-			return ["Cover Image", "Author", "URL", "Single Page"];
+			return ["Cover Image", "Author", "URL", "Single Page", "Page Per Scene"];
 		
 		options = {
 			"export_options" : export_options(),
@@ -231,11 +281,10 @@ def main():
 		export_info = json.loads(export_info_file.read())
 		export_info_file.close()
 
-		is_single_page = False
-		if "Single Page" in export_info["document_arguments"]:
-			singe_page_string = export_info["document_arguments"]["Single Page"].lower()
-			if (len(singe_page_string) > 0) and (singe_page_string[0] == "1" or singe_page_string[0] == "t" or singe_page_string[0] == "y"):
-				is_single_page = True
+		is_single_page = document_argument_is_true(export_info, "Single Page")
+		# pages need the shared helpers to preload only their own scene's resources; without them
+		# every scene stays in 0001.html
+		is_page_per_scene = (is_single_page == False) and document_argument_is_true(export_info, "Page Per Scene") and hype_export_shared != None
 
 		# move the "index.html" to "0001.html" as this is just the first page
 		src_index_path = os.path.join(args.modify_staging_path, export_info["html_filename"].encode("utf-8"))
@@ -243,36 +292,38 @@ def main():
 		shutil.move(src_index_path, dst_index_path)
 		
 		# rewrite HTML file
-		if is_single_page == True:
+		if is_single_page == True or is_page_per_scene == True:
 			global insert_at_head_end
 			insert_at_head_end = ""
 			
 		perform_html_additions(dst_index_path)
 		
 		# attempt to identify all scenes
+		src_js_path = None
 		src_js_folder = os.path.join(args.modify_staging_path, "assets", "js")
 		for file_name in os.listdir(src_js_folder):
 			if "_hype_generated_script.js" in file_name:
 				src_js_path = os.path.join(src_js_folder, file_name)
 				break
 
-		js_contents = None
-		with open(src_js_path, 'r') as target_file:
-			js_contents = target_file.read()
-			
-		if js_contents == None:
-			#todo: error handling
-			pass
+		scene_names = []
+		if src_js_path != None and hype_export_shared != None:
+			scene_names = [scene["name"] for scene in hype_export_shared.generated_script_scenes(src_js_path)]
+		elif src_js_path != None:
+			with open(src_js_path, 'r') as target_file:
+				js_contents = target_file.read()
+			scene_regex = re.compile('\{n\:\"(.*?)\"\,')
+			scene_names = [scene_name.decode("utf-8") for scene_name in scene_regex.findall(js_contents)]
 		
-		scene_regex = re.compile('\{n\:\"(.*?)\"\,')
-		scene_names = scene_regex.findall(js_contents)
-		
-		book_pages = ""
-		if is_single_page == True:
-			book_pages = book_pages + "\t\t\"0001.html\"\n"
+		book_pages = []
+		if is_single_page == True or len(scene_names) == 0:
+			book_pages.append("0001.html")
+		elif is_page_per_scene == True:
+			book_pages = write_scene_pages(args.modify_staging_path, dst_index_path, scene_names)
 		else:
 			for scene_name in scene_names:
-				book_pages = book_pages + "\t\t\"0001.html#" + urllib.quote(scene_name) + "\",\n"			
+				book_pages.append("0001.html#" + urllib.quote(scene_name.encode("utf-8")))
+		book_pages = ",\n".join("\t\t" + json.dumps(book_page) for book_page in book_pages) + "\n"
 		
 		# assemble book.json
 		cover_image = ""
@@ -321,6 +372,11 @@ def main():
 	## --check_for_updates
 	##		return a dictionary with "url", "from_version", and "to_version" keys if there is an update, otherwise don't return anything and exit
 	##		it is your responsibility to decide how often to check
+	elif args.check_for_updates and hype_export_shared != None:
+		update_info = hype_export_shared.check_for_updates(version_info_url, current_script_version, download_url, minimum_update_check_duration_in_seconds)
+		if update_info != None:
+			exit_with_result(update_info)
+
 	elif args.check_for_updates:
 		import subprocess
 		import urllib2
@@ -370,9 +426,37 @@ def perform_html_additions(index_path):
 	with codecs.open(index_path, 'w', encoding='utf-8') as target_file:
 		target_file.write(index_contents)
 
+# writes a page for every scene (0001.html, 0002.html, ...) that starts on that scene, each with its
+# own generated script that only preloads what its scene needs (see hype_export_shared.write_scene_pages)
+# returns the page file names in scene order
+def write_scene_pages(staging_path, index_path, scene_names):
+	import os
+	import string
+
+	def javascript_value(value):
+		return json.dumps(value).replace("</", "<\\/")
+
+	page_names = ["%04d.html" % (scene_index + 1) for scene_index in range(len(scene_names))]
+	scene_pages = {}
+	for scene_index, scene_name in enumerate(scene_names):
+		# the first scene with a name wins, as in showSceneNamed()
+		scene_pages.setdefault(scene_name, page_names[scene_index])
+
+	template = string.Template(scene_page_insert_at_head_end)
+	head_scripts = [template.substitute({"scene_name" : javascript_value(scene_name), "scene_pages" : javascript_value(scene_pages)}).encode("utf-8") for scene_name in scene_names]
+	page_paths = [os.path.join(os.path.dirname(index_path), page_name) for page_name in page_names]
+	if hype_export_shared.write_scene_pages(staging_path, index_path, page_paths, head_scripts) == False:
+		return ["0001.html"]
+	return page_names
+
 
 # UTILITIES
 
+# document arguments such as "Single Page" are on when they start with 1, t(rue) or y(es)
+def document_argument_is_true(export_info, name):
+	value = export_info["document_arguments"].get(name, "").lower()
+	return (len(value) > 0) and (value[0] == "1" or value[0] == "t" or value[0] == "y")
+
 # communicate info back to Hype
 # uses delimiter (20 equal signs) so any above printing doesn't interfere with json data
 def exit_with_result(result):
@@ -383,6 +467,10 @@ def exit_with_result(result):
 
 # from http://stackoverflow.com/questions/14568647/create-zip-in-python
 def zip(src, dst):
+	# the shared helpers write the zip atomically and verify it
+	if hype_export_shared != None:
+		hype_export_shared.write_zip(src, dst)
+		return
 	import os
 	import zipfile
 	zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
@@ -396,4 +484,7 @@ def zip(src, dst):
 
 
 if __name__ == "__main__":
-	main()
+	if hype_export_shared != None:
+		hype_export_shared.run_main(main)
+	else:
+		main()
@@ -11,12 +11,33 @@
 #		Copyright (c) 2022 Tumult Inc.
 #
 
+import os
+import sys
+
+# optional helpers shared by the Export Scripts, installed next to this script (or in the
+# repository's Shared folder); the script behaves as before when they are missing
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.extend([script_folder, os.path.join(os.path.dirname(script_folder), "Shared")])
+
+# when a fork server is running (see hype_export_server.py) this call runs there instead, with
+# everything below already imported, and exits here with its result
+if __name__ == "__main__":
+	try:
+		import hype_export_launcher
+		hype_export_launcher.run_in_fork_server(__file__)
+	except ImportError:
+		pass
+
 import argparse
 import codecs
 import json
-import sys
+import re
 import distutils.util
-import os
+
+try:
+	import hype_export_shared
+except ImportError:
+	hype_export_shared = None
 
 # update info
 current_script_version = 3
@@ -36,18 +57,7 @@ insert_at_head_start = """
 		}
 	</style>
 	<script>
-		var getUriParams = function () {
-			var query_string = {}
-			var query = window.location.search.substring(1);
-			var parmsArray = query.split('&');
-			if (parmsArray.length <= 0) return query_string;
-			for (var i = 0; i < parmsArray.length; i++) {
-				var pair = parmsArray[i].split('=');
-				var val = decodeURIComponent(pair[1]);
-				if (val != '' && pair[0] != '') query_string[pair[0]] = val;
-			}
-			return query_string;
-		}();
+${click_tag_parser}
 		
 		var hypeScriptSrc = "./${document_loader_file_name}";
 
@@ -60,21 +70,7 @@ insert_at_head_start = """
 				headElement.appendChild(scriptElement);
 			}, 1000 /* 1 second delay */);
 			
-			var clickTag = "javascript:void(0)";
-			var target = "_blank";
-
-			// get clicktag/taget, regardless of the case in the query parameters			
-			for (var key in getUriParams) {
-				if (getUriParams.hasOwnProperty(key) == false) {
-					continue;
-				}
-				var value = getUriParams[key];
-				if(key.toLowerCase() == "clicktag") {
-					clickTag = value;
-				} else if(key.toLowerCase() == "target") {
-					target = value;
-				}
-			}
+${click_tag_lookup}
 			
 			var mainContainerElement = document.getElementById("${main_container_id}");
 			mainContainerElement.setAttribute('href', clickTag);
@@ -91,6 +87,40 @@ insert_at_body_start = ""
 
 insert_at_body_end = ""
 
+# reads the click tag and target from the url, used when the shared helpers aren't installed
+click_tag_parser = """		var getUriParams = function () {
+			var query_string = {}
+			var query = window.location.search.substring(1);
+			var parmsArray = query.split('&');
+			if (parmsArray.length <= 0) return query_string;
+			for (var i = 0; i < parmsArray.length; i++) {
+				var pair = parmsArray[i].split('=');
+				var val = decodeURIComponent(pair[1]);
+				if (val != '' && pair[0] != '') query_string[pair[0]] = val;
+			}
+			return query_string;
+		}();"""
+
+click_tag_lookup = """			var clickTag = "javascript:void(0)";
+			var target = "_blank";
+
+			// get clicktag/taget, regardless of the case in the query parameters			
+			for (var key in getUriParams) {
+				if (getUriParams.hasOwnProperty(key) == false) {
+					continue;
+				}
+				var value = getUriParams[key];
+				if(key.toLowerCase() == "clicktag") {
+					clickTag = value;
+				} else if(key.toLowerCase() == "target") {
+					target = value;
+				}
+			}"""
+
+# the same with the shared click tag runtime (see hype_export_shared.click_tag_runtime)
+shared_click_tag_lookup = """			var clickTag = hypeAdURL.param("clickTag", "javascript:void(0)");
+			var target = hypeAdURL.param("target", "_blank");"""
+
 class HypeURLType:
 	Unknown = 0
 	HypeJS = 1
@@ -238,38 +268,53 @@ def main():
 		with codecs.open(index_path, 'r', encoding='utf-8') as target_file:
 			index_contents = target_file.read()
 		
-		import re
-		main_container_regex = re.compile(r"\<div\ id=\"(.*_hype_container)\"(.*)</div>", re.MULTILINE|re.IGNORECASE|re.DOTALL)
-		main_container_id = main_container_regex.search(index_contents).group(1)
-		index_contents = main_container_regex.sub("<a href=\"javascript:void(0)\" target=\"_blank\" id=\"\g<1>\"\g<2></a>", index_contents)
-		
-		document_loader_script_regex = re.compile(r"<script.*_hype_generated_script\.js.*</script>", re.MULTILINE|re.IGNORECASE)
-		index_contents = document_loader_script_regex.sub("", index_contents)
+		(index_contents, main_container_id) = rewrite_main_container(index_contents)
 		
 		with codecs.open(index_path, 'w', encoding='utf-8') as target_file:
 			target_file.write(index_contents)
 		
-		# add in width/height into insert_at_head_start variable
+		# add in width/height and the click tag script into insert_at_head_start variable
 		global insert_at_head_start
 		template = string.Template(insert_at_head_start)
 
-		insert_at_head_start = template.substitute({'width' : export_info['main_container_width'], 'height' : export_info['main_container_height'], 'main_container_id' : main_container_id, 'document_loader_file_name' : document_loader_file_name })
+		template_values = {'width' : export_info['main_container_width'], 'height' : export_info['main_container_height'], 'main_container_id' : main_container_id, 'document_loader_file_name' : document_loader_file_name }
+		if hype_export_shared != None:
+			template_values.update({'click_tag_parser' : "\t\t" + hype_export_shared.click_tag_runtime, 'click_tag_lookup' : shared_click_tag_lookup })
+		else:
+			template_values.update({'click_tag_parser' : click_tag_parser, 'click_tag_lookup' : click_tag_lookup })
+
+		insert_at_head_start = template.substitute(template_values)
 
 		perform_html_additions(index_path)
 
+		# resources only later scenes show are prefetched after the first scene instead of preloaded,
+		# and video and audio wait for their scene
+		if hype_export_shared != None:
+			hype_export_shared.defer_non_initial_scene_resources(args.modify_staging_path, index_path)
+			hype_export_shared.defer_scene_media(args.modify_staging_path, index_path)
+
 		import shutil
-		shutil.rmtree(args.destination_path, ignore_errors=True)
 		
 		if is_preview == True:
-			shutil.move(args.modify_staging_path, args.destination_path)
+			if hype_export_shared != None:
+				hype_export_shared.publish_preview(args.modify_staging_path, args.destination_path, args.export_uid)
+			else:
+				shutil.rmtree(args.destination_path, ignore_errors=True)
+				shutil.move(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 		else:
+			shutil.rmtree(args.destination_path, ignore_errors=True)
 			zip(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 
 	## --check_for_updates
 	##		return a dictionary with "url", "from_version", and "to_version" keys if there is an update, otherwise don't return anything and exit
 	##		it is your responsibility to decide how often to check
+	elif args.check_for_updates and hype_export_shared != None:
+		update_info = hype_export_shared.check_for_updates(version_info_url, current_script_version, download_url, minimum_update_check_duration_in_seconds)
+		if update_info != None:
+			exit_with_result(update_info)
+
 	elif args.check_for_updates:
 		import subprocess
 		import urllib2
@@ -320,6 +365,134 @@ def perform_html_additions(index_path):
 		target_file.write(index_contents)
 
 
+# the hype container's id attribute within its open tag
+container_id_regex = re.compile(r'\sid\s*=\s*["\']?([^"\'\s>]*_hype_container)["\'\s>]', re.IGNORECASE)
+
+# the start and end of the <div> tag with the hype container's id, skipping mentions of the id in
+# comments, scripts (like an inlined generated script) and other markup
+def find_main_container_open_tag(index_contents, lowercase_index_contents):
+	position = 0
+	while True:
+		id_position = index_contents.find("_hype_container", position)
+		if id_position == -1:
+			return None
+		position = id_position + len("_hype_container")
+
+		# inside a comment or script when the last one opened before it isn't closed yet; skip all of it
+		for (start_marker, end_marker) in (("<!--", "-->"), ("<script", "</script")):
+			if lowercase_index_contents.rfind(start_marker, 0, id_position) > lowercase_index_contents.rfind(end_marker, 0, id_position):
+				raw_text_end = lowercase_index_contents.find(end_marker, id_position)
+				position = len(index_contents) if raw_text_end == -1 else raw_text_end
+				break
+		if position != id_position + len("_hype_container"):
+			continue
+
+		tag_start = lowercase_index_contents.rfind("<", 0, id_position)
+		if tag_start == -1 or lowercase_index_contents.startswith("<div", tag_start) == False or index_contents[tag_start + 4:tag_start + 5] not in (" ", "\t", "\n", "\r"):
+			continue
+		tag_end = index_contents.find(">", tag_start)
+		if tag_end < id_position:
+			continue
+		container_id_match = container_id_regex.search(index_contents, tag_start, tag_end + 1)
+		if container_id_match == None:
+			continue
+		return (container_id_match.group(1), tag_start, tag_end + 1)
+
+# the start and end marker of the first comment, script or style from position on, whose contents
+# aren't markup; (-1, None) when there's none
+def find_next_raw_text(lowercase_index_contents, position):
+	next_raw_text = (-1, None)
+	for (start_marker, end_marker) in (("<!--", "-->"), ("<script", "</script"), ("<style", "</style")):
+		start = lowercase_index_contents.find(start_marker, position)
+		if start != -1 and (next_raw_text[0] == -1 or start < next_raw_text[0]):
+			next_raw_text = (start, end_marker)
+	return next_raw_text
+
+# the start and end of the </div> closing the element whose open tag ends at position; only <div>s
+# are balanced, from there on, jumping over comments, scripts and styles. In html <div/> still
+# opens an element, so every <div counts.
+def find_matching_close_tag(lowercase_index_contents, position):
+	(raw_text_start, raw_text_end_marker) = find_next_raw_text(lowercase_index_contents, position)
+	depth = 1
+	while True:
+		close_tag_start = lowercase_index_contents.find("</div", position)
+		if close_tag_start == -1:
+			return None
+
+		if raw_text_start != -1 and raw_text_start < close_tag_start:
+			depth += lowercase_index_contents.count("<div", position, raw_text_start)
+			raw_text_end = lowercase_index_contents.find(raw_text_end_marker, raw_text_start)
+			if raw_text_end == -1:
+				return None
+			position = raw_text_end + len(raw_text_end_marker)
+			(raw_text_start, raw_text_end_marker) = find_next_raw_text(lowercase_index_contents, position)
+			continue
+
+		depth += lowercase_index_contents.count("<div", position, close_tag_start) - 1
+		close_tag_end = lowercase_index_contents.find(">", close_tag_start)
+		if close_tag_end == -1:
+			return None
+		if depth == 0:
+			return (close_tag_start, close_tag_end + 1)
+		position = close_tag_end + 1
+
+# the start and end of every <script> tag loading the *_hype_generated_script.js
+def find_loader_scripts(index_contents, lowercase_index_contents):
+	loader_scripts = []
+	position = 0
+	while True:
+		script_start = lowercase_index_contents.find("<script", position)
+		if script_start == -1:
+			return loader_scripts
+		script_tag_end = lowercase_index_contents.find(">", script_start)
+		script_end = lowercase_index_contents.find("</script", script_tag_end)
+		if script_tag_end == -1 or script_end == -1:
+			return loader_scripts
+		position = lowercase_index_contents.find(">", script_end) + 1
+		if position == 0:
+			position = len(lowercase_index_contents)
+		if "_hype_generated_script.js" in index_contents[script_start:script_tag_end]:
+			loader_scripts.append((script_start, position))
+
+# finds the hype container <div> and its matching </div> (plus any <script> tags loading the
+# *_hype_generated_script.js): the container's open tag is searched for directly, and only the
+# <div>s after it are balanced
+# returns (container id, open tag start, open tag end, close tag start, close tag end, [(start, end) of loader scripts])
+def find_main_container(index_contents):
+	lowercase_index_contents = index_contents.lower()
+	open_tag = find_main_container_open_tag(index_contents, lowercase_index_contents)
+	if open_tag == None:
+		return None
+	(container_id, open_tag_start, open_tag_end) = open_tag
+	close_tag = find_matching_close_tag(lowercase_index_contents, open_tag_end)
+	if close_tag == None:
+		return None
+	return (container_id, open_tag_start, open_tag_end, close_tag[0], close_tag[1], find_loader_scripts(index_contents, lowercase_index_contents))
+
+# replaces the hype container <div> with an <a> (keeping its attributes and contents), and removes the script src
+# returns (new index contents, container id)
+def rewrite_main_container(index_contents):
+	main_container = find_main_container(index_contents)
+	if main_container == None:
+		raise ValueError("Could not find the Hype container element in the html file")
+	(main_container_id, open_tag_start, open_tag_end, close_tag_start, close_tag_end, loader_scripts) = main_container
+
+	# every piece is sliced once and joined once, so the document is only copied a single time
+	edits = [(open_tag_start, open_tag_start + len("<div"), "<a href=\"javascript:void(0)\" target=\"_blank\"")]
+	edits.append((close_tag_start, close_tag_end, "</a>"))
+	edits += [(start, end, "") for (start, end) in loader_scripts]
+	edits.sort()
+
+	pieces = []
+	position = 0
+	for (start, end, replacement) in edits:
+		pieces.append(index_contents[position:start])
+		pieces.append(replacement)
+		position = end
+	pieces.append(index_contents[position:])
+	return ("".join(pieces), main_container_id)
+
+
 # UTILITIES
 
 # communicate info back to Hype
@@ -332,6 +505,10 @@ def exit_with_result(result):
 
 # from http://stackoverflow.com/questions/14568647/create-zip-in-python
 def zip(src, dst):
+	# the shared helpers write the zip atomically and verify it
+	if hype_export_shared != None:
+		hype_export_shared.write_zip(src, dst)
+		return
 	import os
 	import zipfile
 	zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
@@ -345,4 +522,7 @@ def zip(src, dst):
 
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	if hype_export_shared != None:
+		hype_export_shared.run_main(main)
+	else:
+		main()
\ No newline at end of file
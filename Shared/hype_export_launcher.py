@@ -0,0 +1,130 @@
+#!/usr/bin/python
+
+# 	hype_export_launcher.py
+#		Hands an Export Script invocation to a running fork server (hype_export_server.py)
+#
+#		Hype starts a new python process for every call to an Export Script. The scripts import
+#		this module first thing and call run_in_fork_server(__file__): when a server is running,
+#		it forks a child that already has the script and the shared code imported, runs the call
+#		there with the same arguments, environment and working directory, and this process
+#		passes on its output and exit code. When no server is running it returns right away and
+#		the script runs as usual, so this must stay cheap to import.
+#
+#		Installation, usage, and additional info:
+#			https://tumult.com/hype/export-scripts/
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import os
+import sys
+
+# overrides where the server listens, ex. for benchmarks
+socket_path_environment_variable = "HYPE_EXPORT_FORK_SERVER_SOCKET"
+
+# kinds of frames sent back by the server; the launcher answers a started frame with one of its own
+# as the go-ahead to run the call
+started_frame = "s"
+output_frame = "o"
+error_frame = "e"
+exit_frame = "x"
+refused_frame = "r"
+
+# how long to wait for the server to accept the call before running it here instead, so a wedged
+# server can't hang an export
+reply_timeout_in_seconds = 2.0
+
+
+# the server's socket, in the same cache folder hype_export_shared uses; one per python version
+# since requests are marshalled
+def fork_server_socket_path():
+	if os.environ.get(socket_path_environment_variable):
+		return os.environ.get(socket_path_environment_variable)
+	if os.path.isdir(os.path.expanduser("~/Library/Caches")):
+		cache_folder = os.path.expanduser("~/Library/Caches/com.tumult.hype-export-scripts")
+	else:
+		cache_folder = os.path.expanduser("~/.cache/hype-export-scripts")
+	return os.path.join(cache_folder, "fork-server-%d.%d.sock" % sys.version_info[:2])
+
+def send_message(connection, message):
+	import marshal
+	import struct
+	data = marshal.dumps(message)
+	connection.sendall(struct.pack("!I", len(data)) + data)
+
+# returns None once the other end has closed the connection
+def receive_message(connection):
+	import marshal
+	import struct
+	header = receive_exactly(connection, 4)
+	if header == None:
+		return None
+	data = receive_exactly(connection, struct.unpack("!I", header)[0])
+	return marshal.loads(data) if data != None else None
+
+def receive_exactly(connection, length):
+	chunks = []
+	while length > 0:
+		chunk = connection.recv(min(length, 1024 * 1024))
+		if not chunk:
+			return None
+		chunks.append(chunk)
+		length -= len(chunk)
+	return "".join(chunks)
+
+# Runs this invocation in the fork server and exits with its exit code; returns if there is no
+# server, or it can't run this script, so the caller runs normally
+def run_in_fork_server(script_path):
+	socket_path = fork_server_socket_path()
+	if os.path.exists(socket_path) == False:
+		return
+
+	import socket
+	connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	connection.settimeout(reply_timeout_in_seconds)
+	try:
+		connection.connect(socket_path)
+		# the whole environment, including HOME and the HYPE_EXPORT_* settings, so the call uses the
+		# caller's folders and options rather than the server's
+		send_message(connection, {
+			"version" : sys.version,
+			"script_path" : os.path.realpath(script_path),
+			"argv" : sys.argv,
+			"cwd" : os.getcwd(),
+			"environment" : dict(os.environ),
+		})
+		frame = receive_message(connection)
+	except (socket.error, EOFError, ValueError, TypeError):
+		# socket.timeout included
+		connection.close()
+		return
+	if frame == None or frame[0] != started_frame:
+		connection.close()
+		return
+
+	# from the go-ahead on the call runs in the server, so it must not be run again here; the server
+	# doesn't start it without one, so a launcher that timed out above never runs it twice
+	exit_code = 1
+	try:
+		connection.settimeout(None)
+		send_message(connection, (started_frame, None))
+		frame = receive_message(connection)
+		while frame != None:
+			kind, data = frame
+			if kind == output_frame:
+				sys.stdout.write(data)
+				sys.stdout.flush()
+			elif kind == error_frame:
+				sys.stderr.write(data)
+				sys.stderr.flush()
+			elif kind == exit_frame:
+				exit_code = data
+				break
+			frame = receive_message(connection)
+		else:
+			sys.stderr.write("hype_export_launcher: the fork server closed the connection before the script finished\n")
+	except (socket.error, EOFError, ValueError, TypeError) as e:
+		sys.stderr.write("hype_export_launcher: lost the connection to the fork server (%s)\n" % e)
+	connection.close()
+	os._exit(exit_code)
@@ -0,0 +1,333 @@
+#!/usr/bin/python
+
+# 	hype_export_server.py
+#		Fork server for the Export Scripts
+#
+#		Hype starts a new python process for every call to an Export Script, so a document with a
+#		few hundred resources pays for interpreter startup and the scripts' imports a few hundred
+#		times per export. This server imports the shared code and every Export Script it finds
+#		once, then listens on a Unix socket. Each script checks for it first thing (through
+#		hype_export_launcher.py): the server forks a child for the call, which runs the script's
+#		main() with the original arguments, environment and working directory, and streams its
+#		output and exit code back. Without a running server the scripts run as before.
+#
+#		A script that changed on disk since the server loaded it is loaded again in the child, and
+#		the server stops itself when the shared code changes (or after --idle_timeout seconds
+#		without calls), so it never runs stale code.
+#
+#		Usage:
+#			hype_export_server.py start [--detach] [--scripts_folder <folder>] [--idle_timeout 1800]
+#			hype_export_server.py stop
+#			hype_export_server.py status
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import errno
+import imp
+import os
+import select
+import socket
+import sys
+import threading
+import time
+import traceback
+
+import hype_export_launcher
+import hype_export_shared
+
+# imported by the scripts inside main(); importing them up front saves that in every call
+preloaded_module_names = ["codecs", "datetime", "distutils.util", "glob", "hashlib", "re", "shutil", "string", "subprocess", "tempfile", "urllib", "urllib2", "zipfile", "zlib"]
+
+default_idle_timeout_in_seconds = 30 * 60
+
+
+# SCRIPTS
+
+def file_signature(path):
+	try:
+		status = os.stat(path)
+		return (status.st_mtime, status.st_size)
+	except OSError:
+		return None
+
+# Export Scripts next to the shared code (as installed in Hype's Application Scripts folder) and
+# in the folders above it (as laid out in the repository)
+def default_scripts_folders():
+	shared_folder = os.path.dirname(os.path.realpath(__file__))
+	repository_folder = os.path.dirname(shared_folder)
+	return [shared_folder] + [os.path.join(repository_folder, name) for name in sorted(os.listdir(repository_folder)) if os.path.isdir(os.path.join(repository_folder, name))]
+
+def is_script_file_name(file_name):
+	return "hype-export" in file_name and file_name.endswith(".py")
+
+def find_script_paths(folders):
+	script_paths = []
+	for folder in folders:
+		for file_name in sorted(os.listdir(folder)):
+			if is_script_file_name(file_name):
+				script_paths.append(os.path.realpath(os.path.join(folder, file_name)))
+	return script_paths
+
+def load_script(script_path):
+	# not "__main__", so the script doesn't run (or look for this server) while loading
+	module_name = "hype_export_script_%d" % abs(hash(script_path))
+	with open(script_path, 'rb') as script_file:
+		return imp.load_module(module_name, script_file, script_path, (".py", "rb", imp.PY_SOURCE))
+
+class ForkServer:
+	def __init__(self, socket_path, scripts_folders, idle_timeout):
+		self.socket_path = socket_path
+		self.scripts_folders = set(os.path.realpath(folder) for folder in scripts_folders)
+		self.idle_timeout = idle_timeout
+		self.scripts = {}
+		self.shared_signatures = dict((module.__file__, file_signature(module.__file__)) for module in [hype_export_shared, hype_export_launcher, sys.modules[__name__]])
+		self.start_time = time.time()
+		self.last_request_time = time.time()
+		self.request_count = 0
+		self.children = set()
+		self.running = True
+
+		for module_name in preloaded_module_names:
+			__import__(module_name)
+		for script_path in find_script_paths(scripts_folders):
+			try:
+				self.scripts[script_path] = (load_script(script_path), file_signature(script_path))
+			except Exception:
+				sys.stderr.write("could not load %s:\n%s" % (script_path, traceback.format_exc()))
+
+	# only preloaded scripts and scripts added to the scripts folders since are run here; any other
+	# path is left to the launcher, so the socket can't be used to load arbitrary code
+	def serves_script(self, script_path):
+		if script_path in self.scripts:
+			return True
+		script_path = os.path.realpath(script_path)
+		return os.path.dirname(script_path) in self.scripts_folders and is_script_file_name(os.path.basename(script_path)) and os.path.isfile(script_path)
+
+	def shared_code_changed(self):
+		return any(file_signature(path) != signature for path, signature in self.shared_signatures.items())
+
+	def serve(self):
+		listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		hype_export_shared.prepared_path(self.socket_path)
+		if os.path.exists(self.socket_path):
+			os.remove(self.socket_path)
+		# created private, rather than made private after it's already listening
+		old_umask = os.umask(0077)
+		try:
+			listener.bind(self.socket_path)
+		finally:
+			os.umask(old_umask)
+		listener.listen(64)
+		listener.settimeout(1.0)
+
+		try:
+			while self.running:
+				self.reap_children()
+				if time.time() - self.last_request_time > self.idle_timeout:
+					break
+				try:
+					connection = listener.accept()[0]
+				except socket.timeout:
+					continue
+				except socket.error as e:
+					if e.errno == errno.EINTR:
+						continue
+					raise
+				# a caller that stalls mid-request can't hold up the server
+				connection.settimeout(hype_export_launcher.reply_timeout_in_seconds)
+				self.last_request_time = time.time()
+				try:
+					self.handle(connection, listener)
+				except (socket.error, EOFError, ValueError, TypeError):
+					pass
+				finally:
+					connection.close()
+		finally:
+			listener.close()
+			if os.path.exists(self.socket_path):
+				os.remove(self.socket_path)
+
+	def reap_children(self):
+		for pid in list(self.children):
+			try:
+				if os.waitpid(pid, os.WNOHANG)[0] != 0:
+					self.children.discard(pid)
+			except OSError:
+				self.children.discard(pid)
+
+	def handle(self, connection, listener):
+		request = hype_export_launcher.receive_message(connection)
+		if request == None:
+			return
+
+		command = request.get("command")
+		if command == "stop":
+			self.running = False
+			hype_export_launcher.send_message(connection, (hype_export_launcher.exit_frame, 0))
+			return
+		if command == "status":
+			hype_export_launcher.send_message(connection, (hype_export_launcher.output_frame, self.status()))
+			return
+
+		# the launcher runs the call itself when this server can't do it faithfully
+		if request.get("version") != sys.version or self.shared_code_changed() or self.serves_script(request.get("script_path") or "") == False:
+			hype_export_launcher.send_message(connection, (hype_export_launcher.refused_frame, None))
+			if self.shared_code_changed():
+				self.running = False
+			return
+
+		self.request_count += 1
+		pid = os.fork()
+		if pid == 0:
+			exit_code = 1
+			try:
+				listener.close()
+				exit_code = run_request(connection, request, self.scripts)
+			finally:
+				os._exit(exit_code)
+		self.children.add(pid)
+
+	def status(self):
+		return "pid %d, up %ds, %d calls, %d running, %d scripts loaded:\n%s\n" % (os.getpid(), time.time() - self.start_time, self.request_count, len(self.children), len(self.scripts), "\n".join("\t" + path for path in sorted(self.scripts)))
+
+
+# CALLS
+
+# Runs one call in a forked child, as if the script had been started with the request's argv,
+# sending its output back as it is written. Returns the exit code.
+def run_request(connection, request, scripts):
+	import random
+
+	# the launcher runs the call itself if it gave up waiting, so only go on with its go-ahead
+	hype_export_launcher.send_message(connection, (hype_export_launcher.started_frame, None))
+	if hype_export_launcher.receive_message(connection) == None:
+		return 1
+	connection.settimeout(None)
+
+	random.seed()
+	os.chdir(request["cwd"])
+	os.environ.clear()
+	os.environ.update(request["environment"])
+	hype_export_shared.configure_folders()
+	sys.argv = request["argv"]
+	hype_export_shared.module_import_time = time.time()
+
+	# stdout and stderr are pipes that a thread forwards to the launcher, so output from any
+	# processes the script starts is passed on too
+	output_read, output_write = os.pipe()
+	error_read, error_write = os.pipe()
+	os.dup2(output_write, 1)
+	os.dup2(error_write, 2)
+	os.close(output_write)
+	os.close(error_write)
+	forwarder = threading.Thread(target=forward_output, args=(connection, output_read, error_read))
+	forwarder.start()
+
+	exit_code = 0
+	try:
+		# handle() only forks for scripts the server serves
+		module, signature = scripts.get(request["script_path"], (None, None))
+		if module == None or file_signature(request["script_path"]) != signature:
+			module = load_script(request["script_path"])
+		if module.hype_export_shared != None:
+			module.hype_export_shared.run_main(module.main)
+		else:
+			module.main()
+	except SystemExit as e:
+		if e.code == None:
+			exit_code = 0
+		elif isinstance(e.code, int):
+			exit_code = e.code
+		else:
+			sys.stderr.write(str(e.code) + "\n")
+			exit_code = 1
+	except:
+		traceback.print_exc()
+		exit_code = 1
+
+	try:
+		import atexit
+		atexit._run_exitfuncs()
+	except:
+		traceback.print_exc()
+
+	sys.stdout.flush()
+	sys.stderr.flush()
+	os.close(1)
+	os.close(2)
+	forwarder.join()
+	hype_export_launcher.send_message(connection, (hype_export_launcher.exit_frame, exit_code))
+	return exit_code
+
+def forward_output(connection, output_read, error_read):
+	kinds = {output_read : hype_export_launcher.output_frame, error_read : hype_export_launcher.error_frame}
+	while len(kinds) > 0:
+		readable = select.select(list(kinds), [], [])[0]
+		for file_descriptor in readable:
+			data = os.read(file_descriptor, 64 * 1024)
+			if data:
+				hype_export_launcher.send_message(connection, (kinds[file_descriptor], data))
+			else:
+				os.close(file_descriptor)
+				del kinds[file_descriptor]
+
+
+# COMMANDS
+
+def send_command(socket_path, command):
+	connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	connection.settimeout(hype_export_launcher.reply_timeout_in_seconds)
+	try:
+		connection.connect(socket_path)
+		hype_export_launcher.send_message(connection, {"command" : command})
+		return hype_export_launcher.receive_message(connection)
+	except socket.error:
+		return None
+	finally:
+		connection.close()
+
+# the usual double fork, so the server outlives the terminal it was started from
+def detach():
+	if os.fork() != 0:
+		os._exit(0)
+	os.setsid()
+	if os.fork() != 0:
+		os._exit(0)
+	null_file_descriptor = os.open(os.devnull, os.O_RDWR)
+	for file_descriptor in [0, 1, 2]:
+		os.dup2(null_file_descriptor, file_descriptor)
+	os.close(null_file_descriptor)
+
+def main():
+	parser = argparse.ArgumentParser(description="Fork server that runs Export Script calls without starting a new python each time.")
+	parser.add_argument('command', choices=["start", "stop", "status"])
+	parser.add_argument('--scripts_folder', action='append', help="folder with Export Scripts to preload (repeatable, default next to and around this file)")
+	parser.add_argument('--idle_timeout', type=int, default=default_idle_timeout_in_seconds, help="seconds without calls before the server stops")
+	parser.add_argument('--detach', action='store_true', help="run in the background")
+	args = parser.parse_args()
+
+	socket_path = hype_export_launcher.fork_server_socket_path()
+	if args.command == "stop":
+		sys.exit(0 if send_command(socket_path, "stop") != None else 1)
+	if args.command == "status":
+		reply = send_command(socket_path, "status")
+		print reply[1] if reply != None else "not running (%s)" % socket_path
+		sys.exit(0 if reply != None else 1)
+
+	if send_command(socket_path, "status") != None:
+		print >> sys.stderr, "already running (%s)" % socket_path
+		sys.exit(1)
+
+	server = ForkServer(socket_path, args.scripts_folder or default_scripts_folders(), args.idle_timeout)
+	print "serving %d scripts on %s" % (len(server.scripts), socket_path)
+	sys.stdout.flush()
+	if args.detach:
+		detach()
+	server.serve()
+
+
+if __name__ == "__main__":
+	main()
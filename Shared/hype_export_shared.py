@@ -0,0 +1,2411 @@
+#!/usr/bin/python
+
+# 	hype_export_shared.py
+#		Helpers shared by the Tumult Hype Export Scripts
+#
+#		Export Scripts look for this file next to themselves (or in the Shared folder of the
+#		hype-export-scripts repository) and fall back to their built-in behavior without it,
+#		so each script can still be distributed on its own.
+#
+#		Installation, usage, and additional info:
+#			https://tumult.com/hype/export-scripts/
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+# when this module was loaded, which is right after the script's own imports
+module_import_time = time.time()
+
+# sets the per-user folders from the environment (HOME, TMPDIR); called again by the fork server
+# for every call, since its own environment can differ from the caller's
+def configure_folders():
+	global state_folder, cache_folder
+	tempfile.tempdir = None
+
+	# per-user scratch state kept between script invocations (previews, etc.)
+	state_folder = os.path.join(tempfile.gettempdir(), "hype-export-scripts-%d" % os.getuid())
+
+	# per-user state that should survive a restart (update checks, etc.)
+	if os.path.isdir(os.path.expanduser("~/Library/Caches")):
+		cache_folder = os.path.expanduser("~/Library/Caches/com.tumult.hype-export-scripts")
+	else:
+		cache_folder = os.path.expanduser("~/.cache/hype-export-scripts")
+
+configure_folders()
+
+
+# UTILITIES
+
+def state_path(*components):
+	return prepared_path(os.path.join(state_folder, *components))
+
+def cache_path(*components):
+	return prepared_path(os.path.join(cache_folder, *components))
+
+# makes sure the folder for path exists
+def prepared_path(path):
+	if os.path.exists(os.path.dirname(path)) == False:
+		try:
+			os.makedirs(os.path.dirname(path))
+		except OSError:
+			pass
+	return path
+
+# exclusive lock held while the with block runs; gives up waiting after timeout seconds
+# and runs the block anyway, as the lock only avoids duplicated work
+class FileLock:
+	def __init__(self, lock_path, timeout=5):
+		self.lock_path = lock_path
+		self.timeout = timeout
+		self.lock_file = None
+
+	def __enter__(self):
+		import fcntl
+
+		self.lock_file = open(self.lock_path, 'a')
+		deadline = time.time() + self.timeout
+		while True:
+			try:
+				fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+				return self
+			except IOError:
+				if time.time() > deadline:
+					return self
+				time.sleep(0.02)
+
+	def __exit__(self, exception_type, exception_value, traceback):
+		self.lock_file.close()
+		return False
+
+def read_json_file(path, default=None):
+	try:
+		with open(path, 'r') as json_file:
+			return json.loads(json_file.read())
+	except (IOError, ValueError):
+		return default
+
+# export_uid and other values used as file names
+def safe_file_name(value):
+	return re.sub(r'[^A-Za-z0-9._-]', '_', value)[:200]
+
+# crc32 of a file's contents; fast enough to compare large media files between previews
+def file_checksum(file_path):
+	import zlib
+	crc = 0
+	with open(file_path, 'rb') as target_file:
+		while True:
+			chunk = target_file.read(1024 * 1024)
+			if not chunk:
+				break
+			crc = zlib.crc32(chunk, crc)
+	return crc & 0xffffffff
+
+# copies a file (with its permissions and times, like shutil.copy2), returning the crc32 of its contents
+def copy_file_with_checksum(source_path, destination_path):
+	import zlib
+	crc = 0
+	with open(source_path, 'rb') as source_file:
+		with open(destination_path, 'wb') as destination_file:
+			while True:
+				chunk = source_file.read(1024 * 1024)
+				if not chunk:
+					break
+				crc = zlib.crc32(chunk, crc)
+				destination_file.write(chunk)
+	shutil.copystat(source_path, destination_path)
+	return crc & 0xffffffff
+
+# writes a file by renaming a temporary file over it, so readers never see a partial file
+def write_file_atomically(path, contents):
+	temporary_file_descriptor, temporary_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path) or ".")
+	try:
+		with os.fdopen(temporary_file_descriptor, 'wb') as temporary_file:
+			temporary_file.write(contents)
+		os.rename(temporary_path, path)
+	except:
+		if os.path.exists(temporary_path):
+			os.remove(temporary_path)
+		raise
+
+# removes a file, link or folder if it exists
+def remove_path(path):
+	if os.path.isdir(path) and not os.path.islink(path):
+		shutil.rmtree(path, ignore_errors=True)
+	elif os.path.lexists(path):
+		os.remove(path)
+
+
+# PREVIEWS
+
+# Moves the staging folder to the preview destination.
+#	On the same volume the staging folder is renamed into place (replacing the old preview) without copying.
+#	Across volumes a rename is impossible (and so are hardlinks or clones), so only files that changed since
+#	the last preview of the same export_uid are copied over the existing destination.
+# returns "renamed" or "synced"
+def publish_preview(staging_path, destination_path, export_uid=None):
+	destination_path = os.path.normpath(destination_path)
+	destination_parent_path = os.path.dirname(os.path.abspath(destination_path))
+	if os.path.exists(destination_parent_path) == False:
+		os.makedirs(destination_parent_path)
+
+	if os.stat(staging_path).st_dev == os.stat(destination_parent_path).st_dev:
+		previous_path = replace_with_rename(staging_path, destination_path)
+		if previous_path != None:
+			remove_path(previous_path)
+		if export_uid != None and os.path.exists(preview_manifest_path(export_uid)):
+			os.remove(preview_manifest_path(export_uid))
+		return "renamed"
+
+	sync_changed_files(staging_path, destination_path, export_uid)
+	remove_path(staging_path)
+	return "synced"
+
+def preview_manifest_path(export_uid):
+	return state_path("previews", safe_file_name(export_uid) + ".json")
+
+# returns the path the old destination was moved aside to, for the caller to remove, or None
+def replace_with_rename(source_path, destination_path):
+	if os.path.lexists(destination_path) == False:
+		os.rename(source_path, destination_path)
+		return None
+
+	# move the old preview aside first so the destination is only ever missing for an instant
+	previous_path = "%s.previous-%d" % (destination_path, os.getpid())
+	os.rename(destination_path, previous_path)
+	try:
+		os.rename(source_path, destination_path)
+	except:
+		os.rename(previous_path, destination_path)
+		raise
+	return previous_path
+
+def sync_changed_files(source_path, destination_path, export_uid):
+	previous_files = {}
+	if export_uid != None and os.path.isdir(destination_path):
+		try:
+			with open(preview_manifest_path(export_uid), 'r') as manifest_file:
+				manifest = json.loads(manifest_file.read())
+			if manifest["destination_path"] == os.path.abspath(destination_path):
+				previous_files = manifest["files"]
+		except (IOError, ValueError, KeyError):
+			pass
+
+	if os.path.isdir(destination_path) == False:
+		if os.path.lexists(destination_path):
+			os.remove(destination_path)
+		os.makedirs(destination_path)
+
+	files = {}
+	for dirname, subdirs, filenames in os.walk(source_path):
+		relative_dirname = os.path.relpath(dirname, source_path)
+		for filename in filenames:
+			relative_path = os.path.normpath(os.path.join(relative_dirname, filename))
+			source_file_path = os.path.join(dirname, filename)
+			destination_file_path = os.path.join(destination_path, relative_path)
+			file_size = os.path.getsize(source_file_path)
+
+			# reading a file for its checksum is much cheaper than writing it again
+			previous_file_info = previous_files.get(relative_path)
+			if previous_file_info != None and previous_file_info[1] == file_size and os.path.isfile(destination_file_path) and os.path.getsize(destination_file_path) == file_size:
+				file_info = [file_checksum(source_file_path), file_size]
+				if file_info == previous_file_info:
+					files[relative_path] = file_info
+					continue
+
+			if os.path.exists(os.path.dirname(destination_file_path)) == False:
+				os.makedirs(os.path.dirname(destination_file_path))
+			files[relative_path] = [copy_file_with_checksum(source_file_path, destination_file_path), file_size]
+
+	# remove anything left from an earlier preview
+	for dirname, subdirs, filenames in os.walk(destination_path, topdown=False):
+		relative_dirname = os.path.relpath(dirname, destination_path)
+		for filename in filenames:
+			if os.path.normpath(os.path.join(relative_dirname, filename)) not in files:
+				os.remove(os.path.join(dirname, filename))
+		if dirname != destination_path and len(os.listdir(dirname)) == 0:
+			os.rmdir(dirname)
+
+	if export_uid != None:
+		write_file_atomically(preview_manifest_path(export_uid), json.dumps({"destination_path" : os.path.abspath(destination_path), "files" : files}))
+
+
+# PACKAGES
+
+# set by batch tools that verify packages themselves while the next export runs
+defer_zip_verification_environment_variable = "HYPE_EXPORT_DEFER_ZIP_VERIFICATION"
+
+# Quick integrity check of a freshly written zip: the central directory must be readable and
+# consistent with the file size, and a sample of members must decompress with matching CRCs.
+# raises zipfile.BadZipfile on failure
+def verify_zip(zip_path, sample_count=4, force=False):
+	import zipfile
+
+	if force == False and os.environ.get(defer_zip_verification_environment_variable):
+		return
+
+	zip_size = os.path.getsize(zip_path)
+	zf = zipfile.ZipFile(zip_path, "r")
+	try:
+		members = zf.infolist()
+		for member in members:
+			if member.header_offset + member.compress_size > zip_size:
+				raise zipfile.BadZipfile("%s extends past the end of %s" % (member.filename, zip_path))
+
+		# evenly spaced members, always including the first and last written
+		if len(members) <= sample_count:
+			sampled_members = members
+		else:
+			sampled_members = [members[(index * (len(members) - 1)) // (sample_count - 1)] for index in range(sample_count)]
+
+		for member in sampled_members:
+			# zipfile checks the CRC once a member has been read to the end
+			member_file = zf.open(member)
+			while member_file.read(1024 * 1024):
+				pass
+			member_file.close()
+	finally:
+		zf.close()
+
+
+# Writes the files under src into a zip at dst the way the scripts' zip() always has, but into a
+# temporary file next to dst that is fsynced, verified and renamed into place, so an interrupted
+# export never leaves a truncated package behind. The temporary file is created with mode 0666 and
+# gets the umask applied by the system, so nothing process-wide changes and threads can share this.
+# compressed_member(file_path), when given, returns (crc, deflated data, size) for a file or None to
+# have it deflated as usual; runtime files are otherwise served from the runtime cache
+def write_zip(src, dst, compressed_member=None):
+	temporary_path = zip_temporary_path(dst)
+	temporary_file_descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0666)
+	try:
+		with os.fdopen(temporary_file_descriptor, "wb") as temporary_file:
+			writer = ZipWriter(temporary_file)
+			abs_src = os.path.abspath(src)
+			for dirname, subdirs, files in os.walk(src):
+				for filename in files:
+					absname = os.path.abspath(os.path.join(dirname, filename))
+					arcname = absname[len(abs_src) + 1:]
+					member = compressed_member(absname) if compressed_member != None else None
+					if member != None:
+						file_stat = os.stat(absname)
+						writer.write_compressed(arcname, member, file_stat.st_mtime, file_stat.st_mode)
+					elif is_runtime_file(filename):
+						write_runtime_member(writer, absname, arcname)
+					else:
+						writer.write_file(absname, arcname)
+			writer.close()
+			os.fsync(temporary_file.fileno())
+
+		verify_zip(temporary_path)
+		os.rename(temporary_path, dst)
+	except:
+		if os.path.exists(temporary_path):
+			os.remove(temporary_path)
+		raise
+
+# the zip is written next to dst under a hidden name and renamed into place once verified
+def zip_temporary_path(dst):
+	return os.path.join(os.path.dirname(os.path.abspath(dst)), ".%s-%s.tmp" % (os.path.basename(dst), os.urandom(6).encode("hex")))
+
+# temporary files of write_zip calls for dst that were killed before they could remove them
+def leftover_zip_temporary_paths(dst):
+	folder_path = os.path.dirname(os.path.abspath(dst))
+	if os.path.isdir(folder_path) == False:
+		return []
+	prefix = ".%s-" % os.path.basename(dst)
+	return [os.path.join(folder_path, file_name) for file_name in sorted(os.listdir(folder_path)) if file_name.startswith(prefix) and file_name.endswith(".tmp") and len(file_name) == len(prefix) + 12 + len(".tmp")]
+
+# deflates a file the same way zipfile.ZipFile.write() does, returning (crc, compressed data, file size)
+def compress_file(file_path):
+	import zlib
+
+	crc = 0
+	compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+	compressed_chunks = []
+	file_size = 0
+	with open(file_path, 'rb') as target_file:
+		while True:
+			chunk = target_file.read(1024 * 1024)
+			if not chunk:
+				break
+			file_size += len(chunk)
+			crc = zlib.crc32(chunk, crc)
+			compressed_chunks.append(compressor.compress(chunk))
+	compressed_chunks.append(compressor.flush())
+	return (crc & 0xffffffff, "".join(compressed_chunks), file_size)
+
+# Writes a zip file one member after another, the way zipfile.ZipFile(file, "w", ZIP_DEFLATED)
+# does, but with its own headers rather than zipfile's internals, so members that are already
+# deflated (cached runtime files, a fanout's shared assets) can be added as they are. Like ZipFile
+# without allowZip64 it raises zipfile.LargeZipFile for anything that would need ZIP64.
+# output_file must be seekable, since a file's sizes and CRC are filled in once it's been deflated.
+class ZipWriter:
+	size_limit = (1 << 31) - 1
+	count_limit = (1 << 16) - 1
+	local_header_format = "<4s2B4HL2L2H"
+	central_header_format = "<4s4B4HL2L5H2L"
+	end_record_format = "<4s4H2LH"
+
+	def __init__(self, output_file):
+		self.output_file = output_file
+		self.central_headers = []
+
+	# a file's contents, deflated as they are read
+	def write_file(self, file_path, arcname):
+		import zlib
+
+		file_stat = os.stat(file_path)
+		name, flags = self.encoded_name(arcname)
+		header_offset = self.output_file.tell()
+		self.output_file.write(self.local_header(name, flags, file_stat.st_mtime, 0, 0, 0))
+
+		crc = 0
+		file_size = 0
+		compress_size = 0
+		compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+		with open(file_path, 'rb') as source_file:
+			while True:
+				chunk = source_file.read(1024 * 1024)
+				if not chunk:
+					break
+				file_size += len(chunk)
+				crc = zlib.crc32(chunk, crc)
+				compressed_chunk = compressor.compress(chunk)
+				compress_size += len(compressed_chunk)
+				self.output_file.write(compressed_chunk)
+		compressed_chunk = compressor.flush()
+		compress_size += len(compressed_chunk)
+		self.output_file.write(compressed_chunk)
+		crc = crc & 0xffffffff
+
+		# the sizes and CRC in the local header, now that they're known
+		end_offset = self.output_file.tell()
+		self.output_file.seek(header_offset)
+		self.output_file.write(self.local_header(name, flags, file_stat.st_mtime, crc, compress_size, file_size))
+		self.output_file.seek(end_offset)
+		self.add_central_header(name, flags, file_stat.st_mtime, crc, compress_size, file_size, file_stat.st_mode, header_offset)
+
+	# already deflated data (crc, compressed data, file size), with modification_time and mode from the file it came from
+	def write_compressed(self, arcname, compressed_member, modification_time, mode=0100644):
+		crc, compressed_data, file_size = compressed_member
+		name, flags = self.encoded_name(arcname)
+		header_offset = self.output_file.tell()
+		self.output_file.write(self.local_header(name, flags, modification_time, crc, len(compressed_data), file_size))
+		self.output_file.write(compressed_data)
+		self.add_central_header(name, flags, modification_time, crc, len(compressed_data), file_size, mode, header_offset)
+
+	# the central directory and end record
+	def close(self):
+		import zipfile
+
+		if len(self.central_headers) > self.count_limit:
+			raise zipfile.LargeZipFile("more than %d files would require ZIP64 extensions" % self.count_limit)
+		central_directory_offset = self.output_file.tell()
+		central_directory = "".join(self.central_headers)
+		if central_directory_offset > self.size_limit:
+			raise zipfile.LargeZipFile("the central directory offset would require ZIP64 extensions")
+		self.output_file.write(central_directory)
+		self.output_file.write(struct.pack(self.end_record_format, "PK\005\006", 0, 0, len(self.central_headers), len(self.central_headers), len(central_directory), central_directory_offset, 0))
+		self.output_file.flush()
+
+	# the name as stored, with the utf-8 flag when it isn't ascii
+	def encoded_name(self, arcname):
+		arcname = os.path.normpath(os.path.splitdrive(arcname)[1]).replace(os.sep, "/").lstrip("/")
+		if isinstance(arcname, unicode):
+			try:
+				return (arcname.encode("ascii"), 0)
+			except UnicodeEncodeError:
+				return (arcname.encode("utf-8"), 0x800)
+		return (arcname, 0)
+
+	def dos_date_time(self, modification_time):
+		date_time = time.localtime(modification_time)[0:6]
+		if date_time[0] < 1980:
+			raise ValueError("ZIP does not support timestamps before 1980")
+		return ((date_time[0] - 1980) << 9 | date_time[1] << 5 | date_time[2], date_time[3] << 11 | date_time[4] << 5 | (date_time[5] // 2))
+
+	def local_header(self, name, flags, modification_time, crc, compress_size, file_size):
+		dos_date, dos_time = self.dos_date_time(modification_time)
+		return struct.pack(self.local_header_format, "PK\003\004", 20, 0, flags, 8, dos_time, dos_date, crc, compress_size, file_size, len(name), 0) + name
+
+	def add_central_header(self, name, flags, modification_time, crc, compress_size, file_size, mode, header_offset):
+		import zipfile
+
+		if file_size > self.size_limit or compress_size > self.size_limit or header_offset > self.size_limit:
+			raise zipfile.LargeZipFile("%s would require ZIP64 extensions" % name)
+		dos_date, dos_time = self.dos_date_time(modification_time)
+		self.central_headers.append(struct.pack(self.central_header_format, "PK\001\002", 20, 3, 20, 0, flags, 8, dos_time, dos_date, crc, compress_size, file_size, len(name), 0, 0, 0, 0, (mode & 0xFFFF) << 16L, header_offset) + name)
+
+# RUNTIME CACHE
+
+# Hype's runtime files (HYPE-<build>.full.min.js, etc.) are identical in every document exported
+# with the same Hype build, so what the scripts do to them is cached between exports: the result
+# of a script's transform (like AppNexus's remove_console_usage), and the deflated zip member.
+# Entries are files under <cache folder>/runtime/<hype_build>/, named by content hash and written
+# atomically, so concurrent exports can share them; the least recently used are removed once the
+# cache is larger than runtime_cache_maximum_bytes.
+runtime_cache_maximum_bytes = 64 * 1024 * 1024
+
+def is_runtime_file(file_name):
+	return file_name.startswith("HYPE") and file_name.endswith(".js")
+
+def runtime_cache_build():
+	return safe_file_name(invocation_argument(sys.argv, "--hype_build") or "unknown")
+
+def runtime_cache_entry_path(name):
+	return cache_path("runtime", runtime_cache_build(), name)
+
+# contents of a cache entry (marking it as recently used), or None
+def read_runtime_cache_entry(entry_path):
+	try:
+		with open(entry_path, 'rb') as entry_file:
+			contents = entry_file.read()
+		os.utime(entry_path, None)
+		return contents
+	except (IOError, OSError):
+		return None
+
+def write_runtime_cache_entry(entry_path, contents):
+	try:
+		write_file_atomically(entry_path, contents)
+	except (IOError, OSError):
+		return
+	trim_runtime_cache()
+
+def trim_runtime_cache():
+	runtime_cache_folder = os.path.join(cache_folder, "runtime")
+	with FileLock(os.path.join(runtime_cache_folder, ".lock"), timeout=1):
+		entries = []
+		for dirname, subdirs, files in os.walk(runtime_cache_folder):
+			for filename in files:
+				if filename.startswith("."):
+					continue
+				try:
+					entry_stat = os.stat(os.path.join(dirname, filename))
+				except OSError:
+					continue
+				entries.append((entry_stat.st_mtime, entry_stat.st_size, os.path.join(dirname, filename)))
+
+		total_size = sum(entry[1] for entry in entries)
+		for modification_time, size, entry_path in sorted(entries):
+			if total_size <= runtime_cache_maximum_bytes:
+				break
+			try:
+				os.remove(entry_path)
+			except OSError:
+				pass
+			total_size -= size
+
+# Applies transform(file_path) to a runtime file in place, or copies in the result cached from an
+# earlier export. transform must only depend on the file's contents. transform_version is part of
+# the cache key and must be bumped whenever the transform changes what it does, including the
+# regexes or other globals it uses; its code is part of the key too, as a safeguard.
+def transform_runtime_file(file_path, transform, transform_version):
+	import marshal
+
+	with open(file_path, 'rb') as source_file:
+		source_contents = source_file.read()
+	# the script's own function, not the wrapper timing adds
+	transform = getattr(transform, "__wrapped__", transform)
+	transform_digest = hashlib.sha1("%s %s " % (transform.__name__, transform_version) + marshal.dumps(transform.__code__)).hexdigest()
+	entry_path = runtime_cache_entry_path("%s-%s.js" % (hashlib.sha1(source_contents).hexdigest(), transform_digest))
+
+	cached_contents = read_runtime_cache_entry(entry_path)
+	if cached_contents != None:
+		with open(file_path, 'wb') as target_file:
+			target_file.write(cached_contents)
+		return
+
+	transform(file_path)
+	with open(file_path, 'rb') as target_file:
+		write_runtime_cache_entry(entry_path, target_file.read())
+
+# Writes a runtime file with a ZipWriter like writer.write_file(file_path, arcname), reusing the
+# deflated data cached from an earlier export when the file's contents are the same.
+def write_runtime_member(writer, file_path, arcname):
+	import zlib
+
+	file_stat = os.stat(file_path)
+	with open(file_path, 'rb') as source_file:
+		contents = source_file.read()
+	entry_path = runtime_cache_entry_path(hashlib.sha1(contents).hexdigest() + ".deflate")
+
+	# "<crc> <size>\n" followed by the raw deflate stream
+	compressed_member = None
+	entry_contents = read_runtime_cache_entry(entry_path)
+	if entry_contents != None and "\n" in entry_contents:
+		header, compressed_data = entry_contents.split("\n", 1)
+		crc, file_size = [int(value) for value in header.split(" ")]
+		if file_size == len(contents):
+			compressed_member = (crc, compressed_data, file_size)
+	if compressed_member == None:
+		compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+		compressed_member = (zlib.crc32(contents) & 0xffffffff, compressor.compress(contents) + compressor.flush(), len(contents))
+		write_runtime_cache_entry(entry_path, "%d %d\n" % (compressed_member[0], compressed_member[2]) + compressed_member[1])
+
+	writer.write_compressed(arcname, compressed_member, file_stat.st_mtime, file_stat.st_mode)
+
+
+# GENERATED SCRIPTS
+
+# bumped when the scene table format changes, so older cache entries are ignored
+generated_script_scan_version = 1
+
+# strings, comments, brackets and slashes (which may start a regular expression literal)
+javascript_structure_regex = re.compile(r'''"[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*'|//[^\n]*|/\*.*?\*/|[\[\]{}/]''', re.DOTALL)
+javascript_regex_literal_regex = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+javascript_token_regex = re.compile(r'''(?:\s+|//[^\n]*|/\*.*?\*/)*(?:(?P<string>"[^"\\]*(?:\\.[^"\\]*)*"|'[^'\\]*(?:\\.[^'\\]*)*')|(?P<number>0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|(?P<name>[A-Za-z_$][\w$]*)|(?P<punctuation>.))''', re.DOTALL)
+javascript_escape_regex = re.compile(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|[0-7]{1,3}|\r\n|.)', re.DOTALL)
+javascript_simple_escapes = {"n" : u"\n", "t" : u"\t", "r" : u"\r", "b" : u"\b", "f" : u"\f", "v" : u"\v", "\n" : u"", "\r" : u"", "\r\n" : u"", u"\u2028" : u"", u"\u2029" : u""}
+javascript_constants = {"true" : True, "false" : False, "null" : None}
+# the HYPE constructor call (build, name of the resources folder url variable), and the entries of
+# the resource table ({p:preload,n:"name",g:...,t:"type"})
+generated_script_regex = re.compile(r'new window\["HYPE_(\w+)"\]\(\s*(\w+)\s*,')
+generated_script_resource_regex = re.compile(r'\{[^{}]*\bp:(\d)[^{}]*\}')
+generated_script_resource_name_regex = re.compile(r'\bn:"((?:[^"\\]|\\.)*)"')
+
+# the value of a quoted javascript string literal
+def unescaped_javascript_string(literal):
+	def unescaped(match):
+		escape = match.group(1)
+		if escape in javascript_simple_escapes:
+			return javascript_simple_escapes[escape]
+		if escape[:2] == "u{":
+			code_point = int(escape[2:-1], 16)
+			if code_point < 0x10000 or sys.maxunicode > 0xffff:
+				return unichr(code_point)
+			return unichr(0xd800 + ((code_point - 0x10000) >> 10)) + unichr(0xdc00 + ((code_point - 0x10000) & 0x3ff))
+		if escape[0] in "ux" and len(escape) > 1:
+			return unichr(int(escape[1:], 16))
+		if escape[0] in "01234567":
+			return unichr(int(escape, 8))
+		return escape
+	return javascript_escape_regex.sub(unescaped, literal[1:-1])
+
+# a / here starts a regular expression literal rather than a division
+def is_javascript_regex_start(contents, position):
+	previous = position - 1
+	while previous >= 0 and contents[previous].isspace():
+		previous -= 1
+	if previous < 0 or contents[previous] in "(,=:[!&|?{};+-*%<>~^":
+		return True
+	word = re.search(r'[\w$]*$', contents[max(0, previous - 6):previous + 1]).group(0)
+	return word in ("return", "typeof")
+
+# { open position : close position } of the [] and {} in a javascript source, skipping strings,
+# comments and regular expression literals; one pass, mostly inside the regex engine
+def javascript_brackets(contents):
+	brackets = {}
+	open_positions = []
+	position = 0
+	while True:
+		match = javascript_structure_regex.search(contents, position)
+		if match == None:
+			return brackets
+		position = match.end()
+		character = match.group(0)
+		if character == "[" or character == "{":
+			open_positions.append(match.start())
+		elif character == "]" or character == "}":
+			# unbalanced brackets are left unmatched
+			if len(open_positions) > 0 and contents[open_positions[-1]] == ("[" if character == "]" else "{"):
+				brackets[open_positions.pop()] = match.start()
+		elif character == "/" and is_javascript_regex_start(contents, match.start()):
+			regex_literal_match = javascript_regex_literal_regex.match(contents, match.start())
+			if regex_literal_match != None:
+				position = regex_literal_match.end()
+
+# (kind, text, position after) of the javascript token at position, after any space or comments
+def javascript_token(contents, position):
+	match = javascript_token_regex.match(contents, position)
+	if match == None:
+		return (None, None, len(contents))
+	return (match.lastgroup, match.group(match.lastgroup), match.end())
+
+# Value of the javascript literal at position (object, array, string, number, true, false or null)
+# and the position after it. Objects and arrays nested more than depth levels down are skipped and
+# left as None, so large tables can be read without building everything in them.
+# raises ValueError if there is code rather than a literal at position
+def parse_javascript_literal(contents, position, brackets, depth):
+	kind, text, position = javascript_token(contents, position)
+	if kind == "string":
+		return (unescaped_javascript_string(text), position)
+	if kind == "number":
+		return (int(text, 16) if text[:2] in ("0x", "0X") else (float(text) if ("." in text or "e" in text or "E" in text) else int(text)), position)
+	if kind == "name" and text in javascript_constants:
+		return (javascript_constants[text], position)
+	if text == "-":
+		value, position = parse_javascript_literal(contents, position, brackets, depth)
+		if isinstance(value, (int, long, float)) == False or isinstance(value, bool):
+			raise ValueError("expected a number at %d" % position)
+		return (-value, position)
+	if text != "[" and text != "{":
+		raise ValueError("expected a literal at %d" % position)
+
+	close_position = brackets.get(position - 1)
+	if close_position == None:
+		raise ValueError("unbalanced %s at %d" % (text, position - 1))
+	if depth <= 0:
+		return (None, close_position + 1)
+
+	is_object = (text == "{")
+	value = {} if is_object else []
+	while True:
+		kind, text, next_position = javascript_token(contents, position)
+		if next_position == close_position + 1:
+			return (value, next_position)
+		if is_object:
+			if kind not in ("name", "string", "number"):
+				raise ValueError("expected a key at %d" % position)
+			key = unescaped_javascript_string(text) if kind == "string" else text
+			kind, text, position = javascript_token(contents, next_position)
+			if text != ":":
+				raise ValueError("expected : at %d" % position)
+			value[key], position = parse_javascript_literal(contents, position, brackets, depth - 1)
+		else:
+			item, position = parse_javascript_literal(contents, position, brackets, depth - 1)
+			value.append(item)
+		kind, text, next_position = javascript_token(contents, position)
+		if next_position == close_position + 1:
+			return (value, next_position)
+		if text != ",":
+			raise ValueError("expected , at %d" % position)
+		position = next_position
+
+# [(key or index, start, end)] of the entries of the javascript object or array literal at position
+# raises ValueError if there is no object or array literal at position
+def javascript_literal_entries(contents, position, brackets):
+	kind, text, position = javascript_token(contents, position)
+	close_position = brackets.get(position - 1) if text in ("[", "{") else None
+	if close_position == None:
+		raise ValueError("expected an object or array at %d" % position)
+
+	is_object = (text == "{")
+	entries = []
+	while True:
+		kind, text, next_position = javascript_token(contents, position)
+		if next_position == close_position + 1:
+			return entries
+		key = len(entries)
+		if is_object:
+			if kind not in ("name", "string", "number"):
+				raise ValueError("expected a key at %d" % position)
+			key = unescaped_javascript_string(text) if kind == "string" else text
+			kind, text, position = javascript_token(contents, next_position)
+			if text != ":":
+				raise ValueError("expected : at %d" % position)
+		match = javascript_token_regex.match(contents, position)
+		start = match.start(match.lastgroup) if match != None else position
+		value, position = parse_javascript_literal(contents, position, brackets, 0)
+		entries.append((key, start, position))
+		kind, text, next_position = javascript_token(contents, position)
+		if next_position == close_position + 1:
+			return entries
+		if text != ",":
+			raise ValueError("expected , at %d" % position)
+		position = next_position
+
+def is_generated_script_scene(value):
+	return isinstance(value, dict) and isinstance(value.get("n"), basestring) and "o" in value and isinstance(value.get("X"), list)
+
+def is_generated_script_layout(value):
+	return isinstance(value, dict) and isinstance(value.get("Y"), (int, long, float)) and isinstance(value.get("Z"), (int, long, float))
+
+# the first array of scenes in a generated script and the position after it, or (None, None)
+def generated_script_scene_table(contents, brackets):
+	for position in sorted(brackets):
+		if contents[position] != "[" or re.match(r'\[\s*\{', contents[position:position + 64]) == None:
+			continue
+		try:
+			value, end_position = parse_javascript_literal(contents, position, brackets, 3)
+		except ValueError:
+			continue
+		if len(value) > 0 and all(is_generated_script_scene(item) for item in value):
+			return (value, end_position)
+	return (None, None)
+
+# The scene table of a *_hype_generated_script.js, in scene order:
+#	[{"index" : int, "name" : string, "id" : string, "width" : number, "height" : number, "layouts" : [{"name", "width", "height", "breakpoint"}]}]
+# Scenes are the first array of {n:name, o:id, X:[layout indexes]} objects; the layouts follow it
+# as the next argument to the HYPE constructor. width and height are those of the scene's first
+# layout (None if the script doesn't say). Returns [] if there is no scene table.
+def generated_script_scenes_from_contents(contents):
+	if isinstance(contents, str):
+		contents = contents.decode("utf-8", "replace")
+
+	brackets = javascript_brackets(contents)
+	scene_table, end_position = generated_script_scene_table(contents, brackets)
+	if scene_table == None:
+		return []
+
+	# layouts are listed in an array, or keyed by id with their index in "_"
+	layouts = {}
+	kind, text, layouts_position = javascript_token(contents, end_position)
+	try:
+		layout_table = parse_javascript_literal(contents, layouts_position, brackets, 2)[0] if text == "," else None
+	except ValueError:
+		layout_table = None
+	if isinstance(layout_table, (list, dict)):
+		for position, layout in enumerate(layout_table if isinstance(layout_table, list) else layout_table.values()):
+			if is_generated_script_layout(layout):
+				layouts[layout["_"] if isinstance(layout.get("_"), (int, long)) else position] = layout
+
+	scenes = []
+	for index, scene in enumerate(scene_table):
+		scene_layouts = []
+		for layout_index in scene["X"]:
+			layout = layouts.get(layout_index)
+			if layout != None:
+				scene_layouts.append({"name" : layout.get("n"), "width" : layout["Y"], "height" : layout["Z"], "breakpoint" : layout.get("p")})
+		scenes.append({
+			"index" : index,
+			"name" : scene["n"],
+			"id" : unicode(scene["o"]),
+			"width" : scene_layouts[0]["width"] if len(scene_layouts) > 0 else None,
+			"height" : scene_layouts[0]["height"] if len(scene_layouts) > 0 else None,
+			"layouts" : scene_layouts,
+		})
+	return scenes
+
+# generated_script_scenes_from_contents() for a file, cached by the sha1 of its contents so
+# exporting the same document again doesn't rescan it
+def generated_script_scenes(generated_script_path):
+	with open(generated_script_path, 'rb') as generated_script_file:
+		contents = generated_script_file.read()
+
+	entry_path = cache_path("generated-scripts", "%s-%d.json" % (hashlib.sha1(contents).hexdigest(), generated_script_scan_version))
+	scenes = read_json_file(entry_path)
+	if scenes != None:
+		return scenes
+
+	scenes = generated_script_scenes_from_contents(contents)
+	try:
+		write_file_atomically(entry_path, json.dumps(scenes))
+	except (IOError, OSError):
+		pass
+	return scenes
+
+
+# LAZY SCENE RESOURCES
+
+# Hype loads every resource marked for preloading (p:1 in the generated script's resource table)
+# before it shows the first scene, including images only later scenes show. Resources named only in
+# the layouts of later scenes are deferred instead: their p:1 becomes p:0, and lazy_scene_loader
+# prefetches them once the first scene is shown and the main thread is idle. It asks the page's
+# HypeResourceLoad listeners for each url the way Hype does, so DoubleClick Studio's Enabler.getUrl()
+# still applies. A resource named anywhere else (the first scene, custom functions, the html, other
+# javascript) stays preloaded. Video and audio are left to LAZY MEDIA, since prefetching them would
+# download them at impression time all the same. This is done at --modify_staging_path, because
+# --replace_url runs before the generated script exists.
+hype_resource_url_javascript = 'function u(d,r){var f=d.resourcesFolderURL(),l=window.HYPE_eventListeners,x=(f?f+"/":"")+r,i,v;for(i=0;i<l.length;i++)if(l[i].type=="HypeResourceLoad"){v=l[i].callback(d,null,{type:"HypeResourceLoad",url:x});if(typeof v=="string")x=v}return x}'
+lazy_scene_loader = '<script>(function(){var n=%s,s=!1;' + hype_resource_url_javascript + 'function p(d){n.forEach(function(r){var x=u(d,r),q;if(/\\.(png|jpe?g|gif|svg|webp)$/i.test(r))(new Image).src=x;else{q=new XMLHttpRequest;q.open("GET",x,!0);q.send()}})}if(("HYPE_eventListeners" in window)===!1)window.HYPE_eventListeners=Array();window.HYPE_eventListeners.push({type:"HypeSceneLoad",callback:function(d){if(s)return;s=!0;(window.requestIdleCallback||function(c){setTimeout(c,1)})(function(){p(d)},{timeout:2000})}})})();</script>'
+
+# (html, generated script path, generated script contents) of a staged document whose html file is at
+# html_path and whose generated script is inlined in it (the path is then None) or in the staging
+# folder. The contents are unicode. returns None if there is no generated script or no </head> to
+# inject into
+def staged_generated_script(staging_path, html_path):
+	with open(html_path, 'rb') as html_file:
+		html = html_file.read()
+	generated_script_path = None
+	if generated_script_regex.search(html) == None:
+		for dirname, subdirs, filenames in os.walk(staging_path):
+			for filename in filenames:
+				if filename.endswith("_hype_generated_script.js"):
+					generated_script_path = os.path.join(dirname, filename)
+		if generated_script_path == None:
+			return None
+	if re.search(r'</head\s*>', html, re.IGNORECASE) == None:
+		return None
+	if generated_script_path != None:
+		with open(generated_script_path, 'rb') as generated_script_file:
+			generated_script = generated_script_file.read()
+	else:
+		generated_script = html
+	try:
+		return (html, generated_script_path, generated_script.decode("utf-8"))
+	except UnicodeDecodeError:
+		return None
+
+# writes a document read by staged_generated_script back, with head_script (if any) injected before
+# </head>
+def write_staged_generated_script(html_path, html, generated_script_path, contents, head_script):
+	contents = contents.encode("utf-8")
+	if generated_script_path != None:
+		with open(generated_script_path, 'wb') as generated_script_file:
+			generated_script_file.write(contents)
+	else:
+		html = contents
+	if head_script:
+		html = re.sub(r'</head\s*>', lambda match: head_script + "\n" + match.group(0), html, count=1, flags=re.IGNORECASE)
+	with open(html_path, 'wb') as html_file:
+		html_file.write(html)
+
+# [(name, is preloaded, match)] of the resource table entries in a generated script's contents
+def generated_script_resources(contents):
+	resources = []
+	for match in generated_script_resource_regex.finditer(contents):
+		name_match = generated_script_resource_name_regex.search(match.group(0))
+		if name_match != None and re.search(r'\bt:"', match.group(0)):
+			resources.append((unescaped_javascript_string('"' + name_match.group(1) + '"'), match.group(1) == "1", match))
+	return resources
+
+# contents with the p:1 of the given resource table entries changed to p:0; both have the same
+# length, so other positions stay valid
+def without_preload_flags(contents, matches):
+	characters = list(contents)
+	for match in matches:
+		characters[match.start() + re.search(r'\bp:1', match.group(0)).start() + 2] = u"0"
+	return u"".join(characters)
+
+# { file name : bytes } of the files in the staging folder
+def staged_file_sizes(staging_path):
+	sizes = {}
+	for dirname, subdirs, filenames in os.walk(staging_path):
+		for filename in filenames:
+			name = filename.decode("utf-8", "replace")
+			sizes[name] = sizes.get(name, 0) + os.path.getsize(os.path.join(dirname, filename))
+	return sizes
+
+# { scene index : [(start, end)] } of the layouts of each scene in a generated script's contents
+def generated_script_scene_layout_spans(contents):
+	brackets = javascript_brackets(contents)
+	scene_table, end_position = generated_script_scene_table(contents, brackets)
+	if scene_table == None:
+		return {}
+	kind, text, layouts_position = javascript_token(contents, end_position)
+	try:
+		entries = javascript_literal_entries(contents, layouts_position, brackets) if text == "," else []
+	except ValueError:
+		entries = []
+
+	layout_spans = {}
+	for position, (key, start, end) in enumerate(entries):
+		try:
+			layout = parse_javascript_literal(contents, start, brackets, 1)[0]
+		except ValueError:
+			continue
+		if is_generated_script_layout(layout):
+			layout_spans[layout["_"] if isinstance(layout.get("_"), (int, long)) else position] = (start, end)
+	return dict((index, [layout_spans[layout_index] for layout_index in scene["X"] if layout_index in layout_spans]) for index, scene in enumerate(scene_table))
+
+def is_resource_named_in(name, contents):
+	return re.search(r'(?<![\w.-])%s(?![\w.-])' % re.escape(name), contents) != None
+
+# ({ scene index : text of the scene's layouts }, everything else that can name a resource: custom
+# functions, the rest of the generated script and html, other javascript) for a staged document's
+# generated script contents, leaving out the resource table entries in resources [(name, match)]
+def generated_script_scene_texts(staging_path, html, contents, resources, scene_layout_spans):
+	scene_texts = dict((index, u"".join(contents[start:end] for start, end in spans)) for index, spans in scene_layout_spans.items())
+	cut_spans = sorted([(match.start(), match.end()) for name, match in resources] + [span for spans in scene_layout_spans.values() for span in spans])
+	elsewhere = []
+	position = 0
+	for start, end in cut_spans:
+		elsewhere.append(contents[position:max(position, start)])
+		position = max(position, end)
+	elsewhere.append(contents[position:])
+	for code in document_code_contents(staging_path):
+		if code != html and code.decode("utf-8", "replace") != contents:
+			elsewhere.append(code.decode("utf-8", "replace"))
+	return (scene_texts, u"".join(elsewhere))
+
+# Defers the resources only later scenes use (see above) in a staged document whose html file is
+# at html_path and whose generated script is inlined in it or in the staging folder.
+# returns the names of the deferred resources
+def defer_non_initial_scene_resources(staging_path, html_path):
+	staged = staged_generated_script(staging_path, html_path)
+	if staged == None:
+		return []
+	html, generated_script_path, contents = staged
+
+	resources = [(name, match) for name, preloaded, match in generated_script_resources(contents) if preloaded and is_media_resource(name, match.group(0)) == False]
+	scene_layout_spans = generated_script_scene_layout_spans(contents)
+	if len(resources) == 0 or len(scene_layout_spans) < 2:
+		return []
+
+	scene_texts, elsewhere = generated_script_scene_texts(staging_path, html, contents, resources, scene_layout_spans)
+	later_scenes = u"".join(scene_texts[index] for index in scene_texts if index > 0)
+	deferred = [(name, match) for name, match in resources if is_resource_named_in(name, later_scenes) and is_resource_named_in(name, scene_texts[0]) == False and is_resource_named_in(name, elsewhere) == False]
+	if len(deferred) == 0:
+		return []
+
+	names = [name for name, match in deferred]
+	contents = without_preload_flags(contents, [match for name, match in deferred])
+	write_staged_generated_script(html_path, html, generated_script_path, contents, lazy_scene_loader % json.dumps(names).replace("</", "<\\/"))
+
+	sizes = staged_file_sizes(staging_path)
+	add_to_report("lazy_scene_resources", {"count" : len(names), "bytes" : sum(sizes.get(name, 0) for name in names), "names" : names})
+	return names
+
+# Writes a page for each scene of a staged document, for exports that give every scene a page of
+# its own: page_paths[index] gets the html file with head_scripts[index] injected before </head>,
+# and a generated script that preloads only what that scene needs. Resources that other scenes'
+# layouts name but this scene and everything else (see generated_script_scene_texts()) don't lose
+# their p:1, video and audio included, since no other scene is shown on the page. A generated
+# script in its own file is written next to it for each page as <page name>_<file name>, and the
+# original is removed.
+# returns False, writing nothing, if there is no generated script or no </head>
+def write_scene_pages(staging_path, html_path, page_paths, head_scripts):
+	staged = staged_generated_script(staging_path, html_path)
+	if staged == None:
+		return False
+	html, generated_script_path, contents = staged
+	resources = [(name, match) for name, preloaded, match in generated_script_resources(contents) if preloaded]
+	scene_layout_spans = generated_script_scene_layout_spans(contents)
+
+	# { resource name : indexes of the scenes naming it }, for the resources nothing else names; when
+	# the layouts don't match the pages' scenes, every page keeps the document's preloading
+	naming_scenes = {}
+	if len(scene_layout_spans) == len(page_paths):
+		scene_texts, elsewhere = generated_script_scene_texts(staging_path, html, contents, resources, scene_layout_spans)
+		naming_scenes = dict((name, set(index for index in scene_texts if is_resource_named_in(name, scene_texts[index]))) for name, match in resources if is_resource_named_in(name, elsewhere) == False)
+	sizes = staged_file_sizes(staging_path)
+
+	pages = []
+	for index, page_path in enumerate(page_paths):
+		deferred = [(name, match) for name, match in resources if name in naming_scenes and len(naming_scenes[name]) > 0 and index not in naming_scenes[name]]
+		page_contents = without_preload_flags(contents, [match for name, match in deferred])
+		page_html = html
+		page_generated_script_path = None
+		if generated_script_path != None:
+			generated_script_name = os.path.basename(generated_script_path)
+			page_generated_script_name = os.path.splitext(os.path.basename(page_path))[0] + "_" + generated_script_name
+			page_generated_script_path = os.path.join(os.path.dirname(generated_script_path), page_generated_script_name)
+			page_html = re.sub(r'(?<=[/"\'])%s(?=[?#"\'])' % re.escape(generated_script_name), page_generated_script_name, html, count=1)
+		write_staged_generated_script(page_path, page_html, page_generated_script_path, page_contents, head_scripts[index])
+		pages.append({"page" : os.path.basename(page_path), "deferred_count" : len(deferred), "deferred_bytes" : sum(sizes.get(name, 0) for name, match in deferred)})
+
+	if generated_script_path != None:
+		os.remove(generated_script_path)
+	if os.path.abspath(html_path) not in [os.path.abspath(page_path) for page_path in page_paths]:
+		os.remove(html_path)
+	add_to_report("scene_pages", pages)
+	return True
+
+
+# LAZY MEDIA
+
+# Nothing stops a video or audio file from downloading at impression time: Hype preloads the ones
+# marked for preloading before the first scene, and browsers start fetching the rest as soon as their
+# elements exist, even in scenes that aren't shown yet. Media only becomes needed when its scene is
+# shown, so:
+#  - media in the resource table the first scene doesn't name isn't preloaded (p:1 becomes p:0)
+#  - <video> and <audio> tags in the inner html of later scenes get preload=none, remembering their
+#    preload in data-hype-preload, and tags in the html outside the Hype document get preload=metadata
+#  - lazy_media_loader does the same for the media elements Hype creates when the document loads,
+#    and puts back the remembered preload of the media in each scene as it is shown
+# Videos get a poster when the package has an image named like them (video.jpg or video-poster.png
+# next to video.mp4) and they don't have one. Media that autoplays is left alone, since autoplay
+# loads it regardless of preload.
+media_extensions = (".mp4", ".m4v", ".mov", ".webm", ".ogv", ".ogg", ".mp3", ".m4a", ".aac", ".wav", ".oga", ".opus", ".flac")
+video_extensions = (".mp4", ".m4v", ".mov", ".webm", ".ogv")
+poster_extensions = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+media_tag_regex = re.compile(r'''<(video|audio)\b((?:[^>"']|"[^"]*"|'[^']*')*)>''', re.IGNORECASE)
+script_element_regex = re.compile(r'<script\b.*?</script\s*>', re.IGNORECASE | re.DOTALL)
+lazy_media_loader = '<script>(function(){var o=%s;' + hype_resource_url_javascript + 'if(("HYPE_eventListeners" in window)===!1)window.HYPE_eventListeners=Array();window.HYPE_eventListeners.push({type:"HypeDocumentLoad",callback:function(d){var c=document.getElementById(d.documentId()),m=c?c.querySelectorAll("video,audio"):[],i,v,s,n;for(i=0;i<m.length;i++){v=m[i];if(!v.autoplay&&!v.hasAttribute("data-hype-preload")){v.setAttribute("data-hype-preload",v.getAttribute("preload")||"auto");v.preload="none"}s=v.querySelector("source");n=(v.getAttribute("src")||s&&s.getAttribute("src")||"").split("/").pop();if(v.tagName=="VIDEO"&&!v.getAttribute("poster")&&o.hasOwnProperty(n))v.poster=u(d,o[n])}}});window.HYPE_eventListeners.push({type:"HypeSceneLoad",callback:function(d,e){var m=e.querySelectorAll("[data-hype-preload]"),i;for(i=0;i<m.length;i++){m[i].preload=m[i].getAttribute("data-hype-preload");m[i].removeAttribute("data-hype-preload")}}})})();</script>'
+
+def is_media_resource(name, entry):
+	return re.search(r'\bt:"(?:video|audio)/', entry) != None or os.path.splitext(name)[1].lower() in media_extensions
+
+# { video name : poster image name } for the videos in the staging folder with an image named like
+# them in the same folder
+def media_poster_names(staging_path):
+	posters = {}
+	for dirname, subdirs, filenames in os.walk(staging_path):
+		images = dict((filename.lower(), filename) for filename in filenames if os.path.splitext(filename)[1].lower() in poster_extensions)
+		for filename in filenames:
+			stem, extension = os.path.splitext(filename)
+			if extension.lower() not in video_extensions:
+				continue
+			for suffix in ["", "-poster", "_poster"]:
+				candidates = [images[(stem + suffix + poster_extension).lower()] for poster_extension in poster_extensions if (stem + suffix + poster_extension).lower() in images]
+				if len(candidates) > 0 and re.match(r'^[\w.-]+$', candidates[0]):
+					posters[filename.decode("utf-8", "replace")] = candidates[0].decode("utf-8", "replace")
+					break
+	return posters
+
+# the match of an attribute in the inside of a tag, with the value (without quotes, or None if the
+# attribute has none) in group 2; quotes may be escaped when the tag is in a javascript string
+def media_tag_attribute(attributes, name):
+	return re.search(r'''(?<![\w-])%s(?:\s*=\s*(\\?["'])?(.*?)(?(1)\1(?=[\s/\\]|$)|(?=\s|$)))?(?![\w-])''' % re.escape(name), attributes, re.IGNORECASE)
+
+# (the inside of a <video> or <audio> tag with its preload changed to preload, remembering the one it
+# had in data-hype-preload when restore is set, and a poster added; whether the preload changed; the
+# poster) or None if neither applies. Values are left unquoted, since the tag may be inside a
+# javascript string.
+def lazy_media_tag_attributes(tag_name, attributes, preload, restore, posters):
+	added = []
+	preload_match = media_tag_attribute(attributes, "preload")
+	current = preload_match.group(2) if preload_match != None else None
+	changes_preload = (preload != None and media_tag_attribute(attributes, "autoplay") == None and media_tag_attribute(attributes, "data-hype-preload") == None and current not in ("none", preload))
+	if changes_preload:
+		added.append("preload=" + preload)
+		if restore:
+			added.append("data-hype-preload=" + (current if current != None and re.match(r'^\w+$', current) else "auto"))
+		if preload_match != None:
+			attributes = attributes[:preload_match.start()].rstrip() + attributes[preload_match.end():]
+	poster = None
+	src_match = media_tag_attribute(attributes, "src")
+	if tag_name.lower() == "video" and src_match != None and src_match.group(2) and media_tag_attribute(attributes, "poster") == None:
+		src = src_match.group(2)
+		name = src.split("/")[-1]
+		if name in posters and re.match(r'''^[^\s"'=<>`\\]+$''', src):
+			poster = posters[name]
+			added.append("poster=" + src[:len(src) - len(name)] + poster)
+	if len(added) == 0:
+		return None
+	return (" " + " ".join(added) + ("" if attributes == "" or attributes[:1].isspace() else " ") + attributes, changes_preload, poster)
+
+# Makes the media of a staged document load when its scene is shown (see above), in a document whose
+# html file is at html_path and whose generated script is inlined in it or in the staging folder.
+# returns the names of the media that no longer loads up front
+def defer_scene_media(staging_path, html_path):
+	staged = staged_generated_script(staging_path, html_path)
+	if staged == None:
+		return []
+	html, generated_script_path, contents = staged
+
+	scene_layout_spans = generated_script_scene_layout_spans(contents)
+	first_scene_spans = scene_layout_spans.get(0, [])
+	later_scene_spans = [span for index in scene_layout_spans if index > 0 for span in scene_layout_spans[index]]
+	first_scene = u"".join(contents[start:end] for start, end in first_scene_spans)
+	media = [(name, preloaded, match) for name, preloaded, match in generated_script_resources(contents) if is_media_resource(name, match.group(0))]
+	deferred = [(name, match) for name, preloaded, match in media if preloaded and is_resource_named_in(name, first_scene) == False]
+	posters = media_poster_names(staging_path)
+	# posters for the videos Hype creates are attached by lazy_media_loader
+	loader_posters = dict((name, poster) for name, poster in posters.items() if any(name == media_name for media_name, preloaded, match in media))
+
+	names = [name for name, match in deferred]
+	# media the first scene preloads is downloaded up front whatever its tags say
+	preloaded_names = set(name for name, preloaded, match in media if preloaded) - set(names)
+	attached_posters = dict(loader_posters)
+	waiting_tags = []
+	# tags in later scenes wait for their scene, tags outside the Hype document only load metadata,
+	# and the rest (the first scene, javascript) only gets posters
+	def rewrite_tags(text, later_spans, first_spans, script_spans):
+		def rewritten(match):
+			position = match.start()
+			if any(start <= position < end for start, end in later_spans):
+				preload = "none"
+			elif any(start <= position < end for start, end in first_spans + script_spans):
+				preload = None
+			else:
+				preload = "metadata"
+			rewrite = lazy_media_tag_attributes(match.group(1), match.group(2), preload, preload == "none", posters)
+			if rewrite == None:
+				return match.group(0)
+			attributes, changes_preload, poster = rewrite
+			src_match = media_tag_attribute(attributes, "src")
+			name = src_match.group(2).split("/")[-1] if src_match != None and src_match.group(2) else None
+			if changes_preload:
+				if name != None and name not in names and name not in preloaded_names:
+					names.append(name)
+				if preload == "none":
+					waiting_tags.append(name)
+			if poster != None:
+				attached_posters[name] = poster
+			return "<" + match.group(1) + attributes + ">"
+		return media_tag_regex.sub(rewritten, text)
+
+	original = (html, contents)
+	contents = without_preload_flags(contents, [match for name, match in deferred])
+	if generated_script_path != None:
+		contents = rewrite_tags(contents, later_scene_spans, first_scene_spans, [(0, len(contents))])
+		try:
+			html = rewrite_tags(html.decode("utf-8"), [], [], [match.span() for match in script_element_regex.finditer(html)]).encode("utf-8")
+		except UnicodeDecodeError:
+			pass
+	else:
+		contents = rewrite_tags(contents, later_scene_spans, first_scene_spans, [match.span() for match in script_element_regex.finditer(contents)])
+	if (html, contents) == original and len(loader_posters) == 0:
+		return []
+
+	# the loader is needed for the media Hype creates, and to put back the preload of tags that wait
+	needs_loader = (len(media) > 0 or len(waiting_tags) > 0)
+	write_staged_generated_script(html_path, html, generated_script_path, contents, lazy_media_loader % json.dumps(loader_posters).replace("</", "<\\/") if needs_loader else None)
+
+	sizes = staged_file_sizes(staging_path)
+	add_to_report("lazy_media", {"count" : len(names), "bytes" : sum(sizes.get(name, 0) for name in names), "names" : names, "posters" : attached_posters})
+	return names
+
+
+# EXTRA ACTIONS
+
+# export_info's extra_actions has an entry for every usage of an extra action, so an action used on
+# hundreds of timeline keyframes is listed hundreds of times with the same arguments.
+# returns [{"function", "arguments", "count"}], one per distinct (function, arguments) in the order
+# they are first used
+def extra_action_index(export_info):
+	usages = []
+	usages_by_key = {}
+	for action_info in export_info.get("extra_actions", []):
+		arguments = action_info.get("arguments", [])
+		key = (action_info.get("function"), tuple(arguments))
+		usage = usages_by_key.get(key)
+		if usage == None:
+			usage = {"function" : key[0], "arguments" : list(arguments), "count" : 0}
+			usages_by_key[key] = usage
+			usages.append(usage)
+		usage["count"] += 1
+	return usages
+
+# usage counts for the export report, per function and per distinct usage
+def extra_action_report(usages):
+	function_counts = {}
+	for usage in usages:
+		function_counts[usage["function"]] = function_counts.get(usage["function"], 0) + usage["count"]
+	return {
+		"usage_count" : sum(usage["count"] for usage in usages),
+		"distinct_count" : len(usages),
+		"functions" : function_counts,
+		"usages" : usages,
+	}
+
+# distinct argument lists of the extra action usages calling function_name
+def extra_action_arguments(export_info, function_name):
+	return [usage["arguments"] for usage in extra_action_index(export_info) if usage["function"] == function_name]
+
+
+# SHIMS
+
+# The ad network scripts define javascript functions for their extra actions (hypeAdExit(),
+# hypeAdCounter(), etc.) that wrap the network's API. A shim is an ordered list of (function name,
+# javascript source) pairs, and only the functions a document uses are injected: the ones its extra
+# actions call, the ones named anywhere in its own html and javascript (custom functions may call
+# them directly), the ones the network's ad parser requires, and the ones the included functions call.
+
+# the document's html and javascript in the staging folder, without Hype's runtime files
+def document_code_contents(staging_path):
+	contents = []
+	for dirname, subdirs, filenames in os.walk(staging_path):
+		for filename in filenames:
+			if filename.lower().endswith((".js", ".html", ".htm")) and is_runtime_file(filename) == False:
+				with open(os.path.join(dirname, filename), 'rb') as code_file:
+					contents.append(code_file.read())
+	return contents
+
+# { name : [argument source of each use] } for the names the document's code refers to; a use that
+# isn't a plain call (like passing the function around) has None as its arguments
+def document_name_references(staging_path, names):
+	references = {}
+	if len(names) == 0:
+		return references
+	name_regex = re.compile(r'(?<![\w$])(%s)(?![\w$])(?:\s*\(([^()]*)\))?' % "|".join(re.escape(name) for name in names))
+	for contents in document_code_contents(staging_path):
+		for match in name_regex.finditer(contents):
+			references.setdefault(match.group(1), []).append(match.group(2))
+	return references
+
+# the (name, source) pairs of shim_functions the document uses, in their original order
+def used_shim_functions(shim_functions, export_info, staging_path, required_function_names=[], references=None):
+	if references == None:
+		references = document_name_references(staging_path, [name for name, source in shim_functions])
+	used_names = set(required_function_names) | set(references)
+	used_names.update(action_info.get("function") for action_info in export_info.get("extra_actions", []))
+
+	# functions called by the included ones
+	sources = dict(shim_functions)
+	pending_names = [name for name in used_names if name in sources]
+	while len(pending_names) > 0:
+		source = sources[pending_names.pop()]
+		for name in sources:
+			if name not in used_names and re.search(r'(?<![\w$])%s(?![\w$])' % re.escape(name), source):
+				used_names.add(name)
+				pending_names.append(name)
+
+	return [(name, source) for name, source in shim_functions if name in used_names]
+
+
+# CLICK TAGS
+
+# The networks that pass the click tag in the ad's url (IABPoliteAd, AxelSpringer, TheTradeDesk and
+# Emerse) inject this runtime instead of each parsing the url their own way. It parses the url once
+# as the page loads into hypeAdURL:
+#	hypeAdURL.param(name, fallback)		the decoded query parameter, matching the name regardless of case
+#										(clickTag, clickTAG, etc.); empty values count as missing
+#	hypeAdURL.hash						the decoded fragment without the #, or ""
+# It is kept minified by hand; Tools/check_click_tag_runtime.py checks it against
+# click_tag_runtime_byte_budget and runs it on sample urls.
+click_tag_runtime = 'var hypeAdURL=function(l){var p=Object.create(null),q=l.search.substring(1).split("&"),i,k,v;function d(s){try{return decodeURIComponent(s)}catch(e){return s}}for(i=0;i<q.length;i++){k=q[i].split("=");v=d(k.slice(1).join("="));k=d(k[0]).toLowerCase();if(k&&v)p[k]=v}return{param:function(n,f){var r=p[n.toLowerCase()];return r===undefined?f:r},hash:d(l.hash.substring(1))}}(location);'
+click_tag_runtime_byte_budget = 512
+
+
+# LOAD ESTIMATES
+
+# Estimates how long an exported package takes to show its first frame and to finish loading, without
+# a browser. The package's html is read in document order for the requests a browser would make and
+# what each one waits on: parser-blocking <script src> (ad network sdks), scripts they add with
+# document.write(), scripts inline code adds later (polite loading after DOMContentLoaded and a
+# timeout), then Hype's generated script, the runtime it loads, and the resources it marks for
+# preloading (p:1). The requests are then simulated over a network profile: a new connection costs
+# dns, tcp and tls round trips, every request one more, and transfers in flight share the bandwidth.
+# Text files count at their gzipped size, as ad servers compress them. Resources that aren't
+# preloaded are requested after the first frame and only count towards the total. Pages that wait
+# for their sdk before showing the first scene (DoubleClick Studio, Sizmek) show it after the window
+# load event and the sdk's initialization round trips. Ad network sdks aren't in the package, so their
+# sizes are assumed (load_estimate_external_scripts) and listed as such in the estimate.
+
+# when set to a profile name (or custom values like "rtt_ms=300,kbps=1000"), --modify_staging_path
+# adds a load estimate of what it wrote to the export report
+load_profile_environment_variable = "HYPE_EXPORT_LOAD_PROFILE"
+# when set to milliseconds, exports whose estimated first frame is later are removed and fail (previews are only reported)
+load_target_environment_variable = "HYPE_EXPORT_LOAD_TARGET_MS"
+
+# round trip time, download bandwidth, and main thread time to parse and run a kilobyte of javascript
+load_profiles = {
+	"slow-3g" : {"rtt_ms" : 2000.0, "kbps" : 400.0, "cpu_ms_per_kb" : 1.0},	# chrome devtools' Slow 3G
+	"fast-3g" : {"rtt_ms" : 562.5, "kbps" : 1600.0, "cpu_ms_per_kb" : 1.0},	# chrome devtools' Fast 3G
+	"slow-4g" : {"rtt_ms" : 150.0, "kbps" : 1638.4, "cpu_ms_per_kb" : 1.0},	# lighthouse's mobile throttling
+	"cable" : {"rtt_ms" : 28.0, "kbps" : 5000.0, "cpu_ms_per_kb" : 0.25},	# webpagetest's Cable
+}
+default_load_profile = "slow-4g"
+
+# (url substring, assumed transfer bytes, round trips the sdk makes before it is initialized)
+load_estimate_external_scripts = [
+	("s0.2mdn.net/ads/studio/Enabler.js", 45 * 1024, 1),
+	("serving-sys.com/BurstingScript/EBLoader.js", 12 * 1024, 2),
+	("adform.net/banners/scripts/rmb/Adform.DHTML.js", 15 * 1024, 1),
+	("banners.adfox.ru/files/adfox_HTML5.js", 6 * 1024, 0),
+	("acdn.adnxs.com/html5-lib/", 4 * 1024, 0),
+	("sting.de17a.com/html5.js", 10 * 1024, 0),
+]
+load_estimate_default_external_bytes = 20 * 1024
+# Hype's runtime when the document loads it from a server instead of the package
+load_estimate_external_runtime_bytes = 45 * 1024
+load_estimate_connections_per_host = 6
+load_estimate_text_extensions = [".html", ".htm", ".js", ".css", ".svg", ".json", ".txt", ".xml"]
+
+html_comment_regex = re.compile(r'<!--.*?-->', re.DOTALL)
+html_element_regex = re.compile(r'<script\b([^>]*)>(.*?)</script\s*>|<(link|img)\b([^>]*)>', re.DOTALL | re.IGNORECASE)
+html_attribute_regex = re.compile(r'''([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?''')
+document_write_regex = re.compile(r'document\.write(?:ln)?\s*\((.*?)\)\s*;', re.DOTALL)
+written_script_url_regex = re.compile(r'''(?:https?:)?//[^"'\s\\<>]+?\.js\b|\b[\w-]+(?:\.[\w-]+)+/[^"'\s\\<>]*?\.js\b|src=\\*["']?([^"'\s\\<>+]+\.js)\b''')
+script_url_literal_regex = re.compile(r'''["']([^"'\s]+?\.js)(?:\?[^"'\s]*)?["']''')
+timeout_delay_regex = re.compile(r'\}\s*,\s*(\d+)\s*(?:/\*.*?\*/\s*)?\)')
+
+# the profile named by name (see load_profiles), or custom values like "rtt_ms=300,kbps=1000"
+# raises ValueError for unknown profiles
+def load_profile(name):
+	name = name or default_load_profile
+	if name in load_profiles:
+		return dict(load_profiles[name], name=name)
+	if "=" not in name:
+		raise ValueError("unknown load profile %r (known profiles: %s)" % (name, ", ".join(sorted(load_profiles))))
+	profile = dict(load_profiles[default_load_profile], name=name)
+	for setting in name.split(","):
+		key, value = setting.split("=", 1)
+		if key.strip() not in profile:
+			raise ValueError("unknown load profile setting %r" % key)
+		profile[key.strip()] = float(value)
+	return profile
+
+# The files of an exported package, which is a folder or a zip file.
+class LoadEstimatePackage:
+	def __init__(self, package_path):
+		import zipfile
+
+		self.zip_file = None
+		self.folder_path = None
+		self.sizes = {}
+		if os.path.isfile(package_path):
+			self.zip_file = zipfile.ZipFile(package_path, "r")
+			for member in self.zip_file.infolist():
+				if member.filename.endswith("/") == False:
+					self.sizes[member.filename] = member.file_size
+		else:
+			self.folder_path = package_path
+			for dirname, subdirs, filenames in os.walk(package_path):
+				for filename in filenames:
+					file_path = os.path.join(dirname, filename)
+					self.sizes[os.path.relpath(file_path, package_path).replace(os.sep, "/")] = os.path.getsize(file_path)
+		self.names_by_basename = {}
+		for name in sorted(self.sizes):
+			self.names_by_basename.setdefault(name.rsplit("/", 1)[-1], name)
+		self.transfer_sizes = {}
+
+	def close(self):
+		if self.zip_file != None:
+			self.zip_file.close()
+
+	def read(self, name):
+		if self.zip_file != None:
+			return self.zip_file.read(name)
+		with open(os.path.join(self.folder_path, name), 'rb') as package_file:
+			return package_file.read()
+
+	# the page: html_filename if the package has it, otherwise the shallowest html file
+	def html_name(self, html_filename=None):
+		if html_filename != None and html_filename in self.sizes:
+			return html_filename
+		html_names = sorted((name.count("/"), name != "index.html", name) for name in self.sizes if os.path.splitext(name)[1].lower() in (".html", ".htm"))
+		if len(html_names) == 0:
+			raise ValueError("no html file in the package")
+		return html_names[0][2]
+
+	# name of the package file at url (relative to the folder base), falling back to a file with the
+	# same name elsewhere in the package (scripts flatten or move resources); None if there isn't one
+	def file_name(self, base, url):
+		path = url.split("#")[0].split("?")[0]
+		if path.startswith("//") or "://" in path:
+			path = path.split("//", 1)[1].split("/", 1)[-1]
+		else:
+			path = os.path.normpath(os.path.join(base, path)).replace(os.sep, "/")
+		if path in self.sizes:
+			return path
+		return self.names_by_basename.get(path.rsplit("/", 1)[-1])
+
+	# bytes sent over the network: text files gzipped, media as they are
+	def transfer_size(self, name):
+		import zlib
+
+		if name not in self.transfer_sizes:
+			if os.path.splitext(name)[1].lower() in load_estimate_text_extensions:
+				# zlib's stream plus gzip's 18 byte header and trailer
+				self.transfer_sizes[name] = len(zlib.compress(self.read(name), 6)) + 12
+			else:
+				self.transfer_sizes[name] = self.sizes[name]
+		return self.transfer_sizes[name]
+
+def html_attributes(source):
+	attributes = {}
+	for match in html_attribute_regex.finditer(source):
+		value = match.group(2) if match.group(2) != None else (match.group(3) if match.group(3) != None else match.group(4))
+		attributes[match.group(1).lower()] = value if value != None else ""
+	return attributes
+
+def is_external_url(url):
+	return url.startswith("//") or re.match(r'^[a-zA-Z][\w+.-]*://', url) != None
+
+def url_host(url):
+	if url.startswith("//") or "://" in url:
+		return url.split("//", 1)[1].split("/", 1)[0]
+	return url.split("/", 1)[0]
+
+# Discrete event simulation of the requests of one page load: requests start when a connection to
+# their host is free, wait out their round trips, then share the bandwidth with the other transfers.
+class LoadSimulation:
+	def __init__(self, profile):
+		import heapq
+
+		self.heapq = heapq
+		self.profile = profile
+		self.time = 0.0
+		self.requests = []
+		self.waiting = []
+		self.active = []
+		self.timers = []
+		self.timer_count = 0
+		self.hosts = {}
+		# called after every step, so the page can tell when the load event fires
+		self.step_handler = None
+
+	def cpu_ms(self, byte_count):
+		return byte_count / 1024.0 * self.profile["cpu_ms_per_kb"]
+
+	# callback(request) runs once the request has finished
+	def request(self, url, host, byte_count, kind, callback=None, assumed=False):
+		request = {"url" : url, "host" : host, "bytes" : byte_count, "kind" : kind, "assumed" : assumed, "discovered_ms" : self.time, "start_ms" : None, "end_ms" : None, "callback" : callback}
+		self.requests.append(request)
+		self.waiting.append(request)
+		return request
+
+	def at(self, time_ms, callback):
+		self.timer_count += 1
+		self.heapq.heappush(self.timers, (time_ms, self.timer_count, callback))
+
+	def start_waiting_requests(self):
+		for request in list(self.waiting):
+			host = self.hosts.setdefault(request["host"], {"idle" : 0, "open" : 0, "resolved" : False})
+			if host["idle"] > 0:
+				host["idle"] -= 1
+				round_trips = 1
+			elif host["open"] < load_estimate_connections_per_host:
+				host["open"] += 1
+				# dns once per host, then tcp and tls for every connection
+				round_trips = (1 if host["resolved"] else 2) + 2
+				host["resolved"] = True
+			else:
+				continue
+			self.waiting.remove(request)
+			request["start_ms"] = self.time
+			request["response_ms"] = self.time + round_trips * self.profile["rtt_ms"]
+			request["remaining"] = float(request["bytes"])
+			self.active.append(request)
+
+	def run(self):
+		bytes_per_ms = self.profile["kbps"] * 1000.0 / 8.0 / 1000.0
+		while True:
+			self.start_waiting_requests()
+			transferring = [request for request in self.active if request["response_ms"] <= self.time]
+			next_times = [request["response_ms"] for request in self.active if request["response_ms"] > self.time]
+			if len(self.timers) > 0:
+				next_times.append(self.timers[0][0])
+			share = bytes_per_ms / max(1, len(transferring))
+			if len(transferring) > 0:
+				next_times.append(self.time + min(request["remaining"] for request in transferring) / share)
+			if len(next_times) == 0:
+				break
+
+			next_time = max(self.time, min(next_times))
+			for request in transferring:
+				request["remaining"] -= share * (next_time - self.time)
+			self.time = next_time
+
+			for request in transferring:
+				if request["remaining"] > 0.001:
+					continue
+				self.active.remove(request)
+				self.hosts[request["host"]]["idle"] += 1
+				request["end_ms"] = self.time
+				if request["callback"] != None:
+					request["callback"](request)
+			while len(self.timers) > 0 and self.timers[0][0] <= self.time:
+				self.heapq.heappop(self.timers)[2]()
+			if self.step_handler != None:
+				self.step_handler()
+
+	def is_idle(self):
+		return len(self.waiting) == 0 and len(self.active) == 0
+
+# The page side of a load estimate: parses the html and the scripts it runs, and asks the simulation
+# for their requests in the order a browser discovers them.
+class LoadEstimatePage:
+	def __init__(self, package, html_name, simulation):
+		self.package = package
+		self.html_name = html_name
+		self.base = os.path.dirname(html_name)
+		self.simulation = simulation
+		self.items = []
+		self.cursor = 0
+		# the parser is waiting for a script it reached to run
+		self.parser_blocked = False
+		self.requested_urls = set()
+		self.dom_content_loaded_ms = None
+		self.dom_content_loaded_handlers = []
+		self.load_ms = None
+		self.load_handlers = []
+		# work that delays the load event, like a downloaded script waiting to run
+		self.pending_work = 0
+		self.polite_delay_ms = 0
+		self.waits_for_sdk = False
+		self.sdk_ready_ms = 0.0
+		self.documents = []
+		self.notes = []
+		self.first_frame_ms = None
+		self.later_resources = []
+
+	def start(self):
+		self.pending_work += 1
+		self.simulation.step_handler = self.check_load
+		self.simulation.request(self.html_name, "package", self.package.transfer_size(self.html_name), "html", self.html_loaded)
+
+	def later(self, delay_ms, callback):
+		self.pending_work += 1
+		def run():
+			self.pending_work -= 1
+			callback()
+		self.simulation.at(self.simulation.time + delay_ms, run)
+
+	# urls written without a scheme, like "ds.serving-sys.com/BurstingScript/EBLoader.js"
+	def is_host_url(self, url):
+		if re.match(r'^[\w-]+(?:\.[\w-]+)*\.[a-zA-Z]{2,}/', url) == None:
+			return False
+		folder = url.split("/", 1)[0] + "/"
+		return any(name.startswith(folder) for name in self.package.sizes) == False
+
+	# the request for a script or resource url, or None for urls already requested or that can't be loaded
+	def request_url(self, url, kind, callback=None):
+		if url.startswith("data:") or url.startswith("javascript:"):
+			return None
+		external = is_external_url(url) or self.is_host_url(url)
+		# resources served from elsewhere are usually the package's own files; scripts are the network's
+		name = self.package.file_name(self.base, url) if external == False or kind in ("runtime", "preload", "resource") else None
+		key = url if external else name
+		if key == None:
+			self.notes.append("%s is not in the package" % url)
+			return None
+		if key in self.requested_urls:
+			return None
+		self.requested_urls.add(key)
+
+		if external == False:
+			return self.simulation.request(name, "package", self.package.transfer_size(name), kind, callback)
+		if name != None:
+			return self.simulation.request(url, url_host(url), self.package.transfer_size(name), kind, callback)
+		byte_count = load_estimate_default_external_bytes
+		sdk_round_trips = 0
+		for url_part, assumed_bytes, round_trips in load_estimate_external_scripts:
+			if url_part in url:
+				byte_count = assumed_bytes
+				sdk_round_trips = round_trips
+		request = self.simulation.request(url, url_host(url), byte_count, kind, callback, assumed=True)
+		request["sdk_round_trips"] = sdk_round_trips
+		return request
+
+	def html_loaded(self, request):
+		contents = html_comment_regex.sub("", self.package.read(self.html_name))
+		for match in html_element_regex.finditer(contents):
+			if match.group(3) != None:
+				attributes = html_attributes(match.group(4))
+				if match.group(3).lower() == "img" and attributes.get("src"):
+					self.items.append({"type" : "image", "url" : attributes["src"]})
+				elif match.group(3).lower() == "link" and "stylesheet" in attributes.get("rel", "").lower() and attributes.get("href"):
+					self.items.append({"type" : "stylesheet", "url" : attributes["href"]})
+				continue
+			attributes = html_attributes(match.group(1))
+			if attributes.get("src"):
+				blocking = ("async" not in attributes and "defer" not in attributes)
+				self.items.append({"type" : "script" if blocking else "async_script", "url" : attributes["src"]})
+			else:
+				self.items.append({"type" : "inline_script", "contents" : match.group(2)})
+
+		# the preload scanner requests everything in the html right away; scripts still run in order
+		for item in self.items:
+			if item.get("url") != None:
+				item["request"] = self.request_url(item["url"], item["type"], self.item_loaded)
+		self.pending_work -= 1
+		self.parse()
+
+	def item_loaded(self, request):
+		for item in self.items:
+			if item.get("request") is request and item["type"] == "async_script":
+				self.run_script_request(request)
+		if self.parser_blocked == False and self.cursor < len(self.items) and self.items[self.cursor].get("request") is request:
+			self.parse()
+
+	def resume_parse(self):
+		self.parser_blocked = False
+		self.parse()
+
+	def parse(self):
+		while self.cursor < len(self.items):
+			item = self.items[self.cursor]
+			if item["type"] == "inline_script":
+				self.cursor += 1
+				self.parser_blocked = True
+				self.run_script(item["contents"], len(item["contents"]), self.resume_parse)
+				return
+			if item["type"] == "script" and item.get("request") != None:
+				if item["request"]["end_ms"] == None:
+					return
+				self.cursor += 1
+				self.parser_blocked = True
+				self.run_script_request(item["request"], self.resume_parse)
+				return
+			self.cursor += 1
+		if self.dom_content_loaded_ms == None:
+			self.dom_content_loaded_ms = self.simulation.time
+			for handler in self.dom_content_loaded_handlers:
+				handler()
+
+	def check_load(self):
+		if self.load_ms == None and self.dom_content_loaded_ms != None and self.pending_work == 0 and self.simulation.is_idle():
+			self.load_ms = self.simulation.time
+			for handler in self.load_handlers:
+				handler()
+			self.check_first_frame()
+
+	def run_script_request(self, request, callback=None):
+		name = self.package.file_name(self.base, request["url"]) if request["assumed"] == False else None
+		contents = self.package.read(name) if name != None else ""
+		if request.get("sdk_round_trips", 0) > 0:
+			self.sdk_ready_ms = max(self.sdk_ready_ms, self.simulation.time + self.simulation.cpu_ms(request["bytes"]) + request["sdk_round_trips"] * self.simulation.profile["rtt_ms"])
+		self.run_script(contents, len(contents) if name != None else request["bytes"], callback)
+
+	# runs a script on the main thread, then what it does: write more scripts, add scripts later, or load a Hype document
+	def run_script(self, contents, byte_count, callback=None):
+		def ran():
+			self.script_effects(contents)
+			if callback != None:
+				callback()
+		self.later(self.simulation.cpu_ms(byte_count), ran)
+
+	def script_effects(self, contents):
+		written_urls = []
+		for write_match in document_write_regex.finditer(contents):
+			for url_match in written_script_url_regex.finditer(write_match.group(1)):
+				written_urls.append(url_match.group(1) or url_match.group(0))
+		# written scripts block the parser like the script that wrote them
+		for index, url in enumerate(written_urls):
+			item = {"type" : "script", "url" : url}
+			item["request"] = self.request_url(url, "script", self.item_loaded)
+			self.items.insert(self.cursor + index, item)
+
+		generated_script_match = generated_script_regex.search(contents)
+		if generated_script_match != None:
+			self.load_document(contents, generated_script_match)
+			return
+
+		# the page shows the first scene itself once its sdk is ready
+		if "showSceneNamed" in contents:
+			self.waits_for_sdk = True
+
+		# script urls in the code that aren't in the html or written are added by the script itself
+		added_urls = [match.group(1) for match in script_url_literal_regex.finditer(document_write_regex.sub("", contents))]
+		if len(added_urls) == 0:
+			return
+		delay_ms = 0
+		if "setTimeout" in contents:
+			delay_ms = max([0] + [int(delay) for delay in timeout_delay_regex.findall(contents)])
+		self.polite_delay_ms = max(self.polite_delay_ms, delay_ms)
+		def add_scripts():
+			for url in added_urls:
+				self.request_url(url, "added_script", self.run_script_request)
+		def add_scripts_later():
+			self.later(delay_ms, add_scripts)
+		if "DOMContentLoaded" in contents and self.dom_content_loaded_ms == None:
+			self.dom_content_loaded_handlers.append(add_scripts_later)
+		elif re.search(r'''addEventListener\(\s*["']load["']|\.onload\s*=''', contents) and self.load_ms == None:
+			self.load_handlers.append(add_scripts_later)
+		else:
+			add_scripts_later()
+
+	# a generated script ran: load the runtime (unless the page already has it), then the preloaded resources
+	def load_document(self, contents, generated_script_match):
+		hype_build = generated_script_match.group(1)
+		folder_match = re.search(r'\b%s="((?:[^"\\]|\\.)*)"' % re.escape(generated_script_match.group(2)), contents)
+		resources_folder = folder_match.group(1) if folder_match != None else ""
+		resources = []
+		for match in generated_script_resource_regex.finditer(contents):
+			name_match = generated_script_resource_name_regex.search(match.group(0))
+			if name_match != None and re.search(r'\bt:"', match.group(0)):
+				resources.append({"url" : resources_folder.rstrip("/") + "/" + name_match.group(1) if resources_folder else name_match.group(1), "preload" : match.group(1) == "1", "media" : is_media_resource(name_match.group(1), match.group(0))})
+		document = {"build" : hype_build, "ready_ms" : None, "resources" : resources}
+		self.documents.append(document)
+
+		runtime_request = None
+		if ("HYPE_" + hype_build) not in self.requested_urls:
+			self.requested_urls.add("HYPE_" + hype_build)
+			for runtime_name in ["HYPE-%s.thin.min.js" % hype_build, "HYPE-%s.full.min.js" % hype_build]:
+				runtime_url = (resources_folder.rstrip("/") + "/" if resources_folder else "") + runtime_name
+				if self.package.file_name(self.base, runtime_url) != None:
+					runtime_request = self.request_url(runtime_url, "runtime")
+					break
+			if runtime_request == None and is_external_url(resources_folder):
+				runtime_request = self.simulation.request(resources_folder.rstrip("/") + "/HYPE-%s.thin.min.js" % hype_build, url_host(resources_folder), load_estimate_external_runtime_bytes, "runtime", assumed=True)
+			if runtime_request == None:
+				self.notes.append("the Hype runtime is inlined, loaded by the page, or not in the package")
+
+		def construct():
+			waiting = [resource for resource in resources if resource["preload"]]
+			# media that isn't preloaded is only fetched once its scene is shown or it plays
+			self.later_resources.extend(resource for resource in resources if resource["preload"] == False and resource["media"] == False)
+			remaining = [0]
+			def preloaded(request):
+				remaining[0] -= 1
+				if remaining[0] == 0:
+					document["ready_ms"] = self.simulation.time
+					self.check_first_frame()
+			for resource in waiting:
+				if self.request_url(resource["url"], "preload", preloaded) != None:
+					remaining[0] += 1
+			if remaining[0] == 0:
+				document["ready_ms"] = self.simulation.time
+				self.check_first_frame()
+
+		if runtime_request != None:
+			self.pending_work += 1
+			def runtime_loaded(request):
+				self.pending_work -= 1
+				self.later(self.simulation.cpu_ms(self.package.sizes.get(request["url"], request["bytes"])), construct)
+			runtime_request["callback"] = runtime_loaded
+		else:
+			construct()
+
+	def check_first_frame(self):
+		if self.first_frame_ms != None or len(self.documents) == 0 or any(document["ready_ms"] == None for document in self.documents):
+			return
+		first_frame_ms = max(document["ready_ms"] for document in self.documents)
+		if self.waits_for_sdk:
+			if self.load_ms == None:
+				return
+			first_frame_ms = max(first_frame_ms, self.load_ms, self.sdk_ready_ms)
+		self.first_frame_ms = first_frame_ms
+		def request_later_resources():
+			for resource in self.later_resources:
+				self.request_url(resource["url"], "resource")
+		self.simulation.at(first_frame_ms, request_later_resources)
+
+# Estimated load of the package at package_path (a folder or zip) under a profile (see load_profile()).
+# returns {"profile", "first_frame_ms", "load_event_ms", "total_ms", "request_count", "transfer_bytes",
+# "first_frame_bytes", "polite_delay_ms", "waits_for_sdk", "assumed", "notes", "requests"}
+def estimate_load_time(package_path, html_filename=None, profile_name=None):
+	profile = load_profile(profile_name)
+	package = LoadEstimatePackage(package_path)
+	try:
+		simulation = LoadSimulation(profile)
+		page = LoadEstimatePage(package, package.html_name(html_filename), simulation)
+		page.start()
+		simulation.run()
+	finally:
+		package.close()
+
+	requests = [request for request in simulation.requests if request["end_ms"] != None]
+	total_ms = max([request["end_ms"] for request in requests] + [page.first_frame_ms or 0, page.load_ms or 0])
+	if len(page.documents) == 0:
+		page.notes.append("no Hype document found, the first frame is the load event")
+	first_frame_ms = page.first_frame_ms if page.first_frame_ms != None else (page.load_ms or total_ms)
+	return {
+		"profile" : profile,
+		"html" : page.html_name,
+		"first_frame_ms" : round(first_frame_ms, 1),
+		"load_event_ms" : round(page.load_ms, 1) if page.load_ms != None else None,
+		"total_ms" : round(total_ms, 1),
+		"request_count" : len(requests),
+		"transfer_bytes" : sum(request["bytes"] for request in requests),
+		"first_frame_bytes" : sum(request["bytes"] for request in requests if request["end_ms"] <= first_frame_ms),
+		"polite_delay_ms" : page.polite_delay_ms,
+		"waits_for_sdk" : page.waits_for_sdk,
+		"assumed" : [request["url"] for request in requests if request["assumed"]],
+		"notes" : page.notes,
+		"requests" : [{"url" : request["url"], "kind" : request["kind"], "bytes" : request["bytes"], "start_ms" : round(request["start_ms"], 1), "end_ms" : round(request["end_ms"], 1), "assumed" : request["assumed"]} for request in requests],
+	}
+
+# one line describing an estimate, ex. "load estimate (slow-4g): first frame 1.84s, loaded 3.20s, 9 requests, 412 KB"
+def load_estimate_summary(estimate):
+	summary = "load estimate (%s): first frame %.2fs, loaded %.2fs, %d requests, %d KB" % (estimate["profile"]["name"], estimate["first_frame_ms"] / 1000.0, estimate["total_ms"] / 1000.0, estimate["request_count"], estimate["transfer_bytes"] // 1024)
+	if estimate.get("target_ms") != None:
+		summary += " (target %.2fs)" % (estimate["target_ms"] / 1000.0)
+	return summary
+
+# Wraps the script's exit_with_result() so a finished --modify_staging_path export estimates the load
+# time of what it wrote before returning its result: the estimate is added to the export report and
+# its summary printed before the result. With load_target_environment_variable set, an export that
+# misses the target is removed and the script exits with an error instead.
+def install_load_estimate(script_globals):
+	exit_with_result = script_globals.get("exit_with_result")
+	if callable(exit_with_result) == False:
+		return
+	def estimating_exit_with_result(result):
+		if result == True:
+			check_load_estimate(sys.argv[1:])
+		exit_with_result(result)
+	script_globals["exit_with_result"] = estimating_exit_with_result
+
+def check_load_estimate(arguments):
+	import zipfile
+
+	destination_path = invocation_argument(arguments, "--destination_path")
+	package_path = destination_path if destination_path != None and os.path.exists(destination_path) else invocation_argument(arguments, "--modify_staging_path")
+	export_info = read_json_file(invocation_argument(arguments, "--export_info_json_path") or "", {})
+	try:
+		estimate = estimate_load_time(package_path, export_info.get("html_filename"), os.environ.get(load_profile_environment_variable))
+	except (IOError, OSError, ValueError, zipfile.BadZipfile) as e:
+		add_to_report("load_estimate", {"error" : str(e)})
+		print "load estimate failed: %s" % e
+		return
+
+	# a target that isn't a number is reported and ignored, since the package is already written
+	target_ms = None
+	if os.environ.get(load_target_environment_variable):
+		try:
+			target_ms = float(os.environ.get(load_target_environment_variable))
+			estimate["target_ms"] = target_ms
+		except ValueError:
+			estimate["target_error"] = "%s is not a number of milliseconds: %r" % (load_target_environment_variable, os.environ.get(load_target_environment_variable))
+			print "load estimate target ignored: %s" % estimate["target_error"]
+	add_to_report("load_estimate", estimate)
+	print load_estimate_summary(estimate)
+
+	is_preview = (invocation_argument(arguments, "--is_preview") or "False").lower() in ("true", "yes", "1")
+	if target_ms != None and estimate["first_frame_ms"] > target_ms and is_preview == False:
+		# only the destination is removed; a staging folder measured in its place is left to Hype
+		is_destination = (package_path == destination_path)
+		sys.stderr.write("Estimated first frame at %.2fs on %s is later than the %.2fs target%s.\n" % (estimate["first_frame_ms"] / 1000.0, estimate["profile"]["name"], target_ms / 1000.0, "; the export was removed" if is_destination else ""))
+		if is_destination:
+			remove_path(destination_path)
+		sys.exit(1)
+
+
+# UPDATES
+
+update_check_timeout_in_seconds = 3
+
+# Answers --check_for_updates without spawning processes: the script's version_info_url is fetched
+# at most once every minimum_update_check_duration_in_seconds, with a conditional GET and a short
+# timeout, and otherwise answered from the cache.
+# returns the --check_for_updates result dictionary, or None if there is no update
+def check_for_updates(version_info_url, current_script_version, download_url, minimum_update_check_duration_in_seconds):
+	try:
+		latest_script_version = int(cached_url_contents(version_info_url, minimum_update_check_duration_in_seconds).strip())
+	except (AttributeError, ValueError):
+		return None
+
+	if latest_script_version > current_script_version:
+		return {"url" : download_url, "from_version" : str(current_script_version), "to_version" : str(latest_script_version)}
+	return None
+
+# Contents of url, fetched at most once every maximum_age seconds (shared by all scripts and processes).
+# Refreshes use a conditional GET with the stored ETag/Last-Modified and a short timeout. Failed
+# fetches also wait for the next refresh, like the timestamp the scripts used to keep in defaults.
+# returns None if the url has never been fetched successfully
+def cached_url_contents(url, maximum_age):
+	entry_path = cache_path("updates", hashlib.sha1(url).hexdigest() + ".json")
+	entry = read_json_file(entry_path, {})
+	if time.time() - entry.get("checked", 0) < maximum_age:
+		return entry.get("body")
+
+	# the first script to get here refreshes the entry, the others wait and reuse it
+	with FileLock(entry_path + ".lock", update_check_timeout_in_seconds + 1):
+		entry = read_json_file(entry_path, {})
+		if time.time() - entry.get("checked", 0) < maximum_age:
+			return entry.get("body")
+
+		entry = fetch_if_modified(url, entry)
+		entry["checked"] = time.time()
+		try:
+			write_file_atomically(entry_path, json.dumps(entry))
+		except (IOError, OSError):
+			pass
+		return entry.get("body")
+
+def fetch_if_modified(url, entry):
+	import socket
+	import urllib2
+
+	headers = {'User-Agent' : "Magic Browser"}
+	if entry.get("body") != None:
+		if entry.get("etag") != None:
+			headers["If-None-Match"] = entry["etag"]
+		if entry.get("last_modified") != None:
+			headers["If-Modified-Since"] = entry["last_modified"]
+
+	try:
+		response = urllib2.urlopen(urllib2.Request(url, headers=headers), timeout=update_check_timeout_in_seconds)
+		body = response.read()
+		return {"body" : body, "etag" : response.info().getheader("ETag"), "last_modified" : response.info().getheader("Last-Modified")}
+	except urllib2.HTTPError as e:
+		if e.code == 304:
+			return entry
+		return {}
+	except (urllib2.URLError, socket.error, socket.timeout, ValueError):
+		# offline; keep whatever we had
+		return entry
+
+
+# INSTRUMENTATION
+
+# when set to a folder, every script invocation writes a json timing record there
+timing_folder_environment_variable = "HYPE_EXPORT_TIMING_FOLDER"
+# when set, a timing summary is also returned next to the "result" key Hype reads after the delimiter
+timing_in_result_environment_variable = "HYPE_EXPORT_TIMING_IN_RESULT"
+# when set to a folder, every script invocation writes Chrome trace events to <folder>/<export_uid>/
+trace_folder_environment_variable = "HYPE_EXPORT_TRACE_FOLDER"
+# when set to a folder, every script invocation is profiled into <folder>/<export_uid>/
+profile_folder_environment_variable = "HYPE_EXPORT_PROFILE_FOLDER"
+# when set to a folder, every script invocation is recorded for Tools/replay_session.py
+record_folder_environment_variable = "HYPE_EXPORT_RECORD_FOLDER"
+
+# details a script adds about its export with add_to_report(), included in timing records and summaries
+export_report = {}
+
+# script functions timed as export phases, by the phase they are reported as
+timed_script_functions = {
+	"build_dummy_interactions" : "html_rewrite",
+	"perform_html_additions" : "html_rewrite",
+	"remove_console_usage" : "html_rewrite",
+	"write_manifest" : "html_rewrite",
+	"writeEBLoader" : "html_rewrite",
+	"folder_contains_file_of_types" : "tree_walk",
+	"zip" : "zip",
+}
+
+# shared helpers timed as export phases while a script runs, by the phase they are reported as
+timed_shared_functions = {
+	"defer_non_initial_scene_resources" : "html_rewrite",
+	"defer_scene_media" : "html_rewrite",
+	"transform_runtime_file" : "html_rewrite",
+	"write_scene_pages" : "html_rewrite",
+	"replace_with_rename" : "move",
+	"sync_changed_files" : "move",
+	"remove_path" : "remove",
+	"write_zip" : "zip",
+}
+
+def add_to_report(key, value):
+	export_report[key] = value
+
+# Entry point for the Export Scripts: runs main(), recording, timing, tracing or profiling it when enabled in the environment.
+# With all of them disabled this only costs a few environment lookups.
+def run_main(main):
+	# the staging folder is snapshotted first so it isn't counted in the timings
+	recorder = None
+	if os.environ.get(record_folder_environment_variable):
+		recorder = ExportRecorder(main.__globals__, os.environ.get(record_folder_environment_variable))
+		recorder.start()
+
+	timer = None
+	if os.environ.get(timing_folder_environment_variable) or os.environ.get(timing_in_result_environment_variable) or os.environ.get(trace_folder_environment_variable):
+		timer = ExportTimer(main.__globals__)
+		timer.install()
+		if os.environ.get(trace_folder_environment_variable):
+			ExportTracer(timer, os.environ.get(trace_folder_environment_variable)).install()
+
+	profiler = None
+	if os.environ.get(profile_folder_environment_variable):
+		profiler = ExportProfiler(main.__globals__, os.environ.get(profile_folder_environment_variable))
+
+	# installed after the timer, so the estimate is in the report before the timer returns it
+	if os.environ.get(load_profile_environment_variable) and invocation_mode(sys.argv[1:]) == "modify_staging_path":
+		install_load_estimate(main.__globals__)
+
+	if timer == None and profiler == None and recorder == None:
+		main()
+		return
+
+	exit_code = 0
+	try:
+		if profiler != None:
+			profiler.run(main)
+		else:
+			main()
+	except SystemExit as e:
+		exit_code = e.code if isinstance(e.code, int) else (0 if e.code == None else 1)
+		raise
+	except:
+		exit_code = 1
+		raise
+	finally:
+		if profiler != None:
+			profiler.finish()
+		if timer != None:
+			timer.exit_code = exit_code
+			timer.finish()
+		if recorder != None:
+			recorder.finish(exit_code)
+
+# short name of the running script, ex. "DoubleClick DCM"
+def invocation_script_name(script_globals):
+	script_path = script_globals.get("__file__", sys.argv[0])
+	return os.path.basename(script_path).replace(".hype-export.py", "").replace(".pyc", "").replace(".py", "")
+
+# mode of an invocation from its arguments, ex. "modify_staging_path"
+def invocation_mode(arguments):
+	for mode in ["get_options", "replace_url", "modify_staging_path", "check_for_updates"]:
+		if ("--" + mode) in arguments:
+			return mode
+	return None
+
+def invocation_argument(arguments, name):
+	if name in arguments and arguments.index(name) + 1 < len(arguments):
+		return arguments[arguments.index(name) + 1]
+	return None
+
+# Times the phases of one script invocation by wrapping the script's own functions and the shared
+# helpers it calls; the standard library is left alone, so nothing else in the process is affected.
+# Nested phases count towards the outermost one, so time is never counted twice; time outside all
+# phases is reported as "other".
+class ExportTimer:
+	def __init__(self, script_globals):
+		self.script_globals = script_globals
+		self.script_name = invocation_script_name(script_globals)
+		self.mode = invocation_mode(sys.argv[1:])
+		self.export_uid = invocation_argument(sys.argv[1:], "--export_uid")
+		self.start_time = time.time()
+		self.phases = {}
+		self.active_phase = None
+		self.exit_code = 0
+		self.restorations = []
+		# (phase name, start time, end time) of every timed call, kept for traces
+		self.spans = None
+		self.finish_handlers = []
+
+	def install(self):
+		for function_name, phase_name in timed_script_functions.items():
+			if callable(self.script_globals.get(function_name)):
+				self.replace(self.script_globals, function_name, self.timed(phase_name, self.script_globals[function_name]))
+		shared_globals = globals()
+		for function_name, phase_name in timed_shared_functions.items():
+			self.replace(shared_globals, function_name, self.timed(phase_name, shared_globals[function_name]))
+
+		if os.environ.get(timing_in_result_environment_variable) and callable(self.script_globals.get("exit_with_result")):
+			self.replace(self.script_globals, "exit_with_result", self.exit_with_result)
+
+	def replace(self, namespace, name, value):
+		self.restorations.append((namespace, name, namespace[name]))
+		namespace[name] = value
+
+	def restore(self):
+		for namespace, name, value in reversed(self.restorations):
+			namespace[name] = value
+		self.restorations = []
+
+	def add(self, phase_name, seconds, calls=1):
+		phase = self.phases.setdefault(phase_name, {"seconds" : 0.0, "calls" : 0})
+		phase["seconds"] += seconds
+		phase["calls"] += calls
+
+	def timed(self, phase_name, function):
+		def timed_function(*args, **kwargs):
+			if self.active_phase != None:
+				return function(*args, **kwargs)
+			self.active_phase = phase_name
+			start_time = time.time()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				end_time = time.time()
+				self.add(phase_name, end_time - start_time)
+				if self.spans != None:
+					self.spans.append((phase_name, start_time, end_time))
+				self.active_phase = None
+		timed_function.__wrapped__ = function
+		return timed_function
+
+	def summary(self):
+		duration = time.time() - self.start_time
+		phases = dict((phase_name, round(phase["seconds"], 6)) for phase_name, phase in self.phases.items())
+		phases["other"] = round(max(0.0, duration - sum(phase["seconds"] for phase in self.phases.values())), 6)
+		summary = {"duration" : round(duration, 6), "phases" : phases}
+		if len(export_report) > 0:
+			summary["report"] = export_report
+		return summary
+
+	def record(self):
+		summary = self.summary()
+		record = {
+			"script" : self.script_name,
+			"mode" : self.mode,
+			"export_uid" : self.export_uid,
+			"pid" : os.getpid(),
+			"start_time" : self.start_time,
+			"exit_code" : self.exit_code,
+			"duration" : summary["duration"],
+			"phases" : self.phases,
+			"other" : summary["phases"]["other"],
+		}
+		if self.mode == "replace_url":
+			record["replace_url"] = invocation_argument(sys.argv[1:], "--replace_url")
+			record["url_type"] = invocation_argument(sys.argv[1:], "--url_type")
+		if len(export_report) > 0:
+			record["report"] = export_report
+		return record
+
+	# same output as the scripts' exit_with_result(), with the timing summary next to the result
+	def exit_with_result(self, result):
+		print "===================="
+		print json.dumps({"result" : result, "timing" : self.summary()})
+		sys.exit(0)
+
+	def finish(self):
+		self.restore()
+		for finish_handler in self.finish_handlers:
+			finish_handler()
+		timing_folder = os.environ.get(timing_folder_environment_variable)
+		if not timing_folder:
+			return
+		file_name = "%s-%s-%s-%d-%d.json" % (safe_file_name(self.script_name), self.mode, safe_file_name(self.export_uid or "none"), os.getpid(), int(self.start_time * 1000))
+		try:
+			write_file_atomically(prepared_path(os.path.join(os.path.expanduser(timing_folder), file_name)), json.dumps(self.record(), indent=4, sort_keys=True))
+		except (IOError, OSError):
+			pass
+
+# Writes Chrome trace events (https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU)
+# for one script invocation. Hype runs a script many times per export (--get_options, a --replace_url per
+# resource, --modify_staging_path), so each process writes its own file into a folder per export_uid
+# and Tools/merge_traces.py stitches them into a single timeline for chrome://tracing or Perfetto.
+class ExportTracer:
+	def __init__(self, timer, trace_folder):
+		self.timer = timer
+		self.trace_folder = os.path.expanduser(trace_folder)
+		self.run_main_time = time.time()
+		self.parse_arguments_end_time = None
+		self.exit_with_result_time = None
+		self.main_end_time = None
+		timer.spans = []
+
+	def install(self):
+		import argparse
+		import atexit
+
+		tracer = self
+		parse_known_args = argparse.ArgumentParser.parse_known_args
+		def traced_parse_known_args(parser, *args, **kwargs):
+			try:
+				return parse_known_args(parser, *args, **kwargs)
+			finally:
+				if tracer.parse_arguments_end_time == None:
+					tracer.parse_arguments_end_time = time.time()
+		argparse.ArgumentParser.parse_known_args = traced_parse_known_args
+		def restore_parse_known_args():
+			argparse.ArgumentParser.parse_known_args = parse_known_args
+		self.timer.finish_handlers.append(restore_parse_known_args)
+		self.timer.finish_handlers.append(self.main_finished)
+
+		exit_with_result = self.timer.script_globals.get("exit_with_result")
+		if callable(exit_with_result):
+			def traced_exit_with_result(result):
+				tracer.exit_with_result_time = time.time()
+				exit_with_result(result)
+			self.timer.replace(self.timer.script_globals, "exit_with_result", traced_exit_with_result)
+
+		# written as late as possible so the exit slice covers flushing the result to Hype
+		atexit.register(self.write)
+
+	def main_finished(self):
+		self.main_end_time = time.time()
+
+	def events(self, exit_time):
+		pid = os.getpid()
+		events = []
+		def complete_event(name, start_time, end_time, category="invocation", args=None):
+			if start_time == None or end_time == None:
+				return
+			event = {"name" : name, "cat" : category, "ph" : "X", "pid" : pid, "tid" : 1, "ts" : int(start_time * 1000000), "dur" : max(0, int((end_time - start_time) * 1000000))}
+			if args != None:
+				event["args"] = args
+			events.append(event)
+
+		process_name = "%s --%s" % (self.timer.script_name, self.timer.mode)
+		if self.timer.mode == "replace_url":
+			process_name += " " + (invocation_argument(sys.argv[1:], "--replace_url") or "")
+		events.append({"name" : "process_name", "ph" : "M", "pid" : pid, "tid" : 1, "args" : {"name" : process_name}})
+
+		spawn_time = process_start_time()
+		if spawn_time != None:
+			events.append({"name" : "spawn", "cat" : "invocation", "ph" : "i", "s" : "p", "pid" : pid, "tid" : 1, "ts" : int(spawn_time * 1000000)})
+			complete_event("startup", spawn_time, module_import_time)
+
+		work_end_time = self.exit_with_result_time or self.main_end_time or exit_time
+		complete_event("import", module_import_time, self.run_main_time)
+		complete_event("parse_args", self.run_main_time, self.parse_arguments_end_time)
+		complete_event("work", self.parse_arguments_end_time or self.run_main_time, work_end_time, args={"mode" : self.timer.mode, "export_uid" : self.timer.export_uid, "exit_code" : self.timer.exit_code})
+		complete_event("exit", work_end_time, exit_time)
+
+		for phase_name, start_time, end_time in self.timer.spans:
+			complete_event(phase_name, start_time, end_time, "phase")
+		return events
+
+	def write(self):
+		exit_time = time.time()
+		file_name = "%d-%d.json" % (int(self.run_main_time * 1000), os.getpid())
+		trace_path = os.path.join(self.trace_folder, safe_file_name(self.timer.export_uid or "no-export-uid"), file_name)
+		try:
+			write_file_atomically(prepared_path(trace_path), json.dumps(self.events(exit_time)))
+		except (IOError, OSError):
+			pass
+
+# Profiles one script invocation with cProfile, writing <folder>/<export_uid>/<script>.<mode>.<pid>.prof
+# and a matching .memory.json. Python 2.7 has no tracemalloc, so the memory summary is the peak rss and
+# the growth of gc-tracked objects by type (containers and instances; strings aren't tracked). Use
+# Tools/aggregate_profiles.py to combine the files of an export session.
+class ExportProfiler:
+	def __init__(self, script_globals, profile_folder):
+		self.profile_folder = os.path.expanduser(profile_folder)
+		self.script_name = invocation_script_name(script_globals)
+		self.mode = invocation_mode(sys.argv[1:])
+		self.export_uid = invocation_argument(sys.argv[1:], "--export_uid")
+		self.profile = None
+		self.object_counts = {}
+
+	def run(self, main):
+		import cProfile
+
+		self.object_counts = object_type_counts()
+		self.profile = cProfile.Profile()
+		self.profile.enable()
+		try:
+			main()
+		finally:
+			self.profile.disable()
+
+	def finish(self):
+		import resource
+
+		if self.profile == None:
+			return
+		object_counts = object_type_counts()
+		object_growth = sorted(((type_name, count - self.object_counts.get(type_name, 0), count) for type_name, count in object_counts.items()), key=lambda growth: -growth[1])
+		max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+		if sys.platform == "darwin":
+			max_rss_kb = max_rss_kb / 1024
+		memory = {
+			"script" : self.script_name,
+			"mode" : self.mode,
+			"export_uid" : self.export_uid,
+			"pid" : os.getpid(),
+			"max_rss_kb" : max_rss_kb,
+			"object_growth" : [{"type" : type_name, "growth" : growth, "count" : count} for type_name, growth, count in object_growth[:25] if growth > 0],
+		}
+
+		base_path = os.path.join(self.profile_folder, safe_file_name(self.export_uid or "no-export-uid"), "%s.%s.%d" % (safe_file_name(self.script_name), self.mode, os.getpid()))
+		try:
+			self.profile.dump_stats(prepared_path(base_path + ".prof"))
+			write_file_atomically(base_path + ".memory.json", json.dumps(memory, indent=4, sort_keys=True))
+		except (IOError, OSError):
+			pass
+
+# Records one script invocation so Tools/replay_session.py can run it again later, against any version
+# of the script. Each invocation appends its arguments, timing, output and exit code to
+# <folder>/<export_uid>/invocations.jsonl. --modify_staging_path also snapshots the staging folder and
+# export_info.json before the script changes them, and lists what it wrote to the destination.
+# Snapshot contents are stored once by sha1 in <folder>/objects, shared by all sessions.
+class ExportRecorder:
+	def __init__(self, script_globals, record_folder):
+		self.record_folder = os.path.expanduser(record_folder)
+		self.script_name = invocation_script_name(script_globals)
+		self.script_path = os.path.abspath(script_globals.get("__file__", sys.argv[0]))
+		self.arguments = sys.argv[1:]
+		self.mode = invocation_mode(self.arguments)
+		self.export_uid = invocation_argument(self.arguments, "--export_uid")
+		self.session_folder = os.path.join(self.record_folder, safe_file_name(self.export_uid or "no-export-uid"))
+		self.start_time = None
+		self.snapshot = None
+		self.saved_stdout = None
+		self.output = None
+
+	def start(self):
+		import StringIO
+
+		if self.mode == "modify_staging_path":
+			staging_path = invocation_argument(self.arguments, "--modify_staging_path")
+			export_info_json_path = invocation_argument(self.arguments, "--export_info_json_path")
+			self.snapshot = {
+				"staging" : self.store_folder(staging_path) if staging_path != None and os.path.isdir(staging_path) else None,
+				"export_info" : self.store_file(export_info_json_path) if export_info_json_path != None and os.path.isfile(export_info_json_path) else None,
+			}
+
+		# everything printed still goes to Hype, and is also kept for the record
+		self.output = StringIO.StringIO()
+		self.saved_stdout = sys.stdout
+		sys.stdout = TeeOutput(self.saved_stdout, self.output)
+		self.start_time = time.time()
+
+	def object_path(self, digest):
+		return os.path.join(self.record_folder, "objects", digest[:2], digest)
+
+	# copies a file into the object store, returning its sha1
+	def store_file(self, file_path):
+		digest = hashlib.sha1()
+		with open(file_path, 'rb') as source_file:
+			while True:
+				chunk = source_file.read(1024 * 1024)
+				if not chunk:
+					break
+				digest.update(chunk)
+		digest = digest.hexdigest()
+		if os.path.exists(self.object_path(digest)) == False:
+			temporary_path = prepared_path(self.object_path(digest)) + ".%d.tmp" % os.getpid()
+			shutil.copyfile(file_path, temporary_path)
+			os.rename(temporary_path, self.object_path(digest))
+		return digest
+
+	# { relative path : [sha1, mode] } for every file in folder_path
+	def store_folder(self, folder_path):
+		files = {}
+		for dirname, subdirs, filenames in os.walk(folder_path):
+			for filename in filenames:
+				file_path = os.path.join(dirname, filename)
+				files[os.path.relpath(file_path, folder_path)] = [self.store_file(file_path), os.stat(file_path).st_mode & 0777]
+		return files
+
+	def finish(self, exit_code):
+		end_time = time.time()
+		if self.saved_stdout != None:
+			sys.stdout = self.saved_stdout
+		output = self.output.getvalue() if self.output != None else ""
+
+		record = {
+			"script" : self.script_name,
+			"script_path" : self.script_path,
+			"arguments" : self.arguments,
+			"cwd" : os.getcwd(),
+			"mode" : self.mode,
+			"pid" : os.getpid(),
+			"start_time" : self.start_time,
+			"duration" : end_time - self.start_time if self.start_time != None else None,
+			"exit_code" : exit_code,
+			"output" : output,
+		}
+		if self.snapshot != None:
+			record["snapshot"] = self.snapshot
+			destination_path = invocation_argument(self.arguments, "--destination_path")
+			if destination_path != None:
+				record["destination"] = destination_manifest(destination_path)
+
+		try:
+			invocations_path = prepared_path(os.path.join(self.session_folder, "invocations.jsonl"))
+			with FileLock(invocations_path + ".lock"):
+				with open(invocations_path, 'a') as invocations_file:
+					invocations_file.write(json.dumps(record) + "\n")
+		except (IOError, OSError):
+			pass
+
+class TeeOutput:
+	def __init__(self, *outputs):
+		self.outputs = outputs
+
+	def write(self, text):
+		for output in self.outputs:
+			output.write(text)
+
+	def flush(self):
+		for output in self.outputs:
+			output.flush()
+
+# What an export wrote, for comparing exports: { name : crc32 } of the members of a zip package (which
+# doesn't depend on the dates zip stores), or of the files in a folder. None if nothing was written.
+def destination_manifest(destination_path):
+	import zipfile
+
+	if os.path.isfile(destination_path) and zipfile.is_zipfile(destination_path):
+		zf = zipfile.ZipFile(destination_path, "r")
+		try:
+			return dict((member.filename, member.CRC) for member in zf.infolist())
+		finally:
+			zf.close()
+	if os.path.isdir(destination_path):
+		files = {}
+		for dirname, subdirs, filenames in os.walk(destination_path):
+			for filename in filenames:
+				files[os.path.relpath(os.path.join(dirname, filename), destination_path)] = file_checksum(os.path.join(dirname, filename))
+		return files
+	if os.path.isfile(destination_path):
+		return {os.path.basename(destination_path) : file_checksum(destination_path)}
+	return None
+
+# { type name : number of live gc-tracked objects }
+def object_type_counts():
+	import gc
+
+	counts = {}
+	for tracked_object in gc.get_objects():
+		type_name = type(tracked_object).__name__
+		counts[type_name] = counts.get(type_name, 0) + 1
+	return counts
+
+# wall clock time the current process was started, or None if it can't be determined
+def process_start_time():
+	try:
+		if os.path.exists("/proc/self/stat"):
+			with open("/proc/self/stat", 'r') as stat_file:
+				start_ticks = int(stat_file.read().rsplit(")", 1)[1].split()[19])
+			# uptime uses the same clock as the start ticks (unlike the boot time in /proc/stat)
+			with open("/proc/uptime", 'r') as uptime_file:
+				uptime = float(uptime_file.read().split()[0])
+			return time.time() - (uptime - float(start_ticks) / os.sysconf("SC_CLK_TCK"))
+
+		# macOS: kinfo_proc from sysctl(CTL_KERN, KERN_PROC, KERN_PROC_PID), which starts with p_starttime
+		import ctypes
+		import ctypes.util
+		import struct
+		libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+		mib = (ctypes.c_int * 4)(1, 14, 1, os.getpid())
+		buffer = ctypes.create_string_buffer(1024)
+		size = ctypes.c_size_t(len(buffer))
+		if libc.sysctl(mib, 4, buffer, ctypes.byref(size), None, ctypes.c_size_t(0)) != 0:
+			return None
+		seconds, microseconds = struct.unpack_from("=qi", buffer.raw, 0)
+		return seconds + microseconds / 1000000.0
+	except Exception:
+		return None
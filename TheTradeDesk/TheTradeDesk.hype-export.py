@@ -12,12 +12,32 @@
 #		Copyright (c) 2024 Tumult Inc.
 #
 
+import os
+import sys
+
+# optional helpers shared by the Export Scripts, installed next to this script (or in the
+# repository's Shared folder); the script behaves as before when they are missing
+script_folder = os.path.dirname(os.path.realpath(__file__))
+sys.path.extend([script_folder, os.path.join(os.path.dirname(script_folder), "Shared")])
+
+# when a fork server is running (see hype_export_server.py) this call runs there instead, with
+# everything below already imported, and exits here with its result
+if __name__ == "__main__":
+	try:
+		import hype_export_launcher
+		hype_export_launcher.run_in_fork_server(__file__)
+	except ImportError:
+		pass
+
 import argparse
 import codecs
 import json
-import sys
 import distutils.util
-import os
+
+try:
+	import hype_export_shared
+except ImportError:
+	hype_export_shared = None
 
 # update info
 current_script_version = 2
@@ -30,13 +50,8 @@ defaults_bundle_identifier = "com.tumult.Hype2.hype-export.TheTradeDesk"
 insert_at_head_start = """
 	<meta name="ad.size" content="width=${width},height=${height}">
 	<script>
-		function getParameterByName(name) {
-			name = name.replace(/[\[]/,"\\\[").replace(/[\]]/,"\\\]");
-			var regex = new RegExp( "[\\?&]"+name+"=([^&#]*)" );
-			var results = regex.exec(location.search);
-			return results === null ? "" : decodeURIComponent(results[1].replace(/\+/g, " "));
-		}
-		var clickTAG = getParameterByName("clickTAG");
+${click_tag_parser}
+${click_tag_lookup}
 	</script>
 """
 
@@ -50,6 +65,19 @@ insert_at_body_end = """
 </a>
 """
 
+# reads clickTAG from the url, used when the shared helpers aren't installed
+click_tag_parser = """		function getParameterByName(name) {
+			name = name.replace(/[\[]/,"\\\[").replace(/[\]]/,"\\\]");
+			var regex = new RegExp( "[\\?&]"+name+"=([^&#]*)" );
+			var results = regex.exec(location.search);
+			return results === null ? "" : decodeURIComponent(results[1].replace(/\+/g, " "));
+		}"""
+
+click_tag_lookup = """		var clickTAG = getParameterByName("clickTAG");"""
+
+# the same with the shared click tag runtime (see hype_export_shared.click_tag_runtime)
+shared_click_tag_lookup = """		var clickTAG = hypeAdURL.param("clickTAG", "");"""
+
 class HypeURLType:
 	Unknown = 0
 	HypeJS = 1
@@ -183,28 +211,49 @@ def main():
 		export_info = json.loads(export_info_file.read())
 		export_info_file.close()
 				
-		# add in width/height into insert_at_head_start variable
+		# add in width/height and the click tag script into insert_at_head_start variable
 		global insert_at_head_start
 		template = string.Template(insert_at_head_start)
 
-		insert_at_head_start = template.substitute({'width' : export_info['main_container_width'], 'height' : export_info['main_container_height'] })
+		template_values = {'width' : export_info['main_container_width'], 'height' : export_info['main_container_height'] }
+		if hype_export_shared != None:
+			template_values.update({'click_tag_parser' : "\t\t" + hype_export_shared.click_tag_runtime, 'click_tag_lookup' : shared_click_tag_lookup })
+		else:
+			template_values.update({'click_tag_parser' : click_tag_parser, 'click_tag_lookup' : click_tag_lookup })
+
+		insert_at_head_start = template.substitute(template_values)
 		
 		index_path = os.path.join(args.modify_staging_path, export_info['html_filename'].encode("utf-8"))
 		perform_html_additions(index_path)
 
+		# resources only later scenes show are prefetched after the first scene instead of preloaded,
+		# and video and audio wait for their scene
+		if hype_export_shared != None:
+			hype_export_shared.defer_non_initial_scene_resources(args.modify_staging_path, index_path)
+			hype_export_shared.defer_scene_media(args.modify_staging_path, index_path)
+
 		import shutil
-		shutil.rmtree(args.destination_path, ignore_errors=True)
 		
 		if is_preview == True:
-			shutil.move(args.modify_staging_path, args.destination_path)
+			if hype_export_shared != None:
+				hype_export_shared.publish_preview(args.modify_staging_path, args.destination_path, args.export_uid)
+			else:
+				shutil.rmtree(args.destination_path, ignore_errors=True)
+				shutil.move(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 		else:
+			shutil.rmtree(args.destination_path, ignore_errors=True)
 			zip(args.modify_staging_path, args.destination_path)
 			exit_with_result(True)
 
 	## --check_for_updates
 	##		return a dictionary with "url", "from_version", and "to_version" keys if there is an update, otherwise don't return anything and exit
 	##		it is your responsibility to decide how often to check
+	elif args.check_for_updates and hype_export_shared != None:
+		update_info = hype_export_shared.check_for_updates(version_info_url, current_script_version, download_url, minimum_update_check_duration_in_seconds)
+		if update_info != None:
+			exit_with_result(update_info)
+
 	elif args.check_for_updates:
 		import subprocess
 		import urllib2
@@ -267,6 +316,10 @@ def exit_with_result(result):
 
 # from http://stackoverflow.com/questions/14568647/create-zip-in-python
 def zip(src, dst):
+	# the shared helpers write the zip atomically and verify it
+	if hype_export_shared != None:
+		hype_export_shared.write_zip(src, dst)
+		return
 	import os
 	import zipfile
 	zf = zipfile.ZipFile(dst, "w", zipfile.ZIP_DEFLATED)
@@ -280,4 +333,7 @@ def zip(src, dst):
 
 
 if __name__ == "__main__":
-	main()
+	if hype_export_shared != None:
+		hype_export_shared.run_main(main)
+	else:
+		main()
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+
+# 	aggregate_profiles.py
+#		Combines the cProfile files the Export Scripts write (with HYPE_EXPORT_PROFILE_FOLDER set)
+#		for one export session, so the cost of dozens of --replace_url processes and the final
+#		--modify_staging_path can be read as one profile.
+#
+#		Each script invocation writes <profile folder>/<export_uid>/<script>.<mode>.<pid>.prof and a
+#		.memory.json summary next to it. Profiles are printed per mode (or all together with
+#		--combined), followed by the peak memory and the object types that grew the most.
+#
+#		Usage:
+#			HYPE_EXPORT_PROFILE_FOLDER=~/hype-profiles <export from Hype>
+#			aggregate_profiles.py ~/hype-profiles/<export_uid> [--sort tottime] [--limit 30] [--output session.prof]
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import glob
+import json
+import os
+import pstats
+import sys
+
+
+# { mode : [profile paths] } from folders and .prof files
+def profile_paths_by_mode(paths):
+	profile_paths = []
+	for path in paths:
+		if os.path.isdir(path):
+			profile_paths += sorted(glob.glob(os.path.join(path, "*.prof")))
+		else:
+			profile_paths.append(path)
+
+	profile_paths_by_mode = {}
+	for profile_path in profile_paths:
+		# <script>.<mode>.<pid>.prof
+		name_components = os.path.basename(profile_path).rsplit(".", 3)
+		mode = name_components[1] if len(name_components) == 4 else "unknown"
+		profile_paths_by_mode.setdefault(mode, []).append(profile_path)
+	return profile_paths_by_mode
+
+def memory_summaries(profile_paths):
+	summaries = []
+	for profile_path in profile_paths:
+		try:
+			with open(profile_path[:-len(".prof")] + ".memory.json", 'r') as memory_file:
+				summaries.append(json.loads(memory_file.read()))
+		except (IOError, ValueError):
+			pass
+	return summaries
+
+def print_memory(summaries, limit):
+	if len(summaries) == 0:
+		return
+	max_rss_kb = [summary["max_rss_kb"] for summary in summaries]
+	print "peak memory: max %.1fMB, mean %.1fMB over %d processes" % (max(max_rss_kb) / 1024.0, sum(max_rss_kb) / 1024.0 / len(max_rss_kb), len(max_rss_kb))
+
+	object_growth = {}
+	for summary in summaries:
+		for growth in summary.get("object_growth", []):
+			object_growth[growth["type"]] = object_growth.get(growth["type"], 0) + growth["growth"]
+	if len(object_growth) > 0:
+		print "object growth (summed over processes):"
+		for type_name, growth in sorted(object_growth.items(), key=lambda item: -item[1])[:limit]:
+			print "\t%8d %s" % (growth, type_name)
+
+def print_profiles(title, profile_paths, sort, limit):
+	print "=" * 80
+	print "%s: %d profile%s" % (title, len(profile_paths), "" if len(profile_paths) == 1 else "s")
+	print "=" * 80
+	stats = pstats.Stats(*profile_paths)
+	stats.strip_dirs().sort_stats(sort).print_stats(limit)
+	print_memory(memory_summaries(profile_paths), 10)
+	print
+
+def main():
+	parser = argparse.ArgumentParser(description="Combine the Export Script profiles of an export session.")
+	parser.add_argument('paths', nargs='+', help="export_uid profile folders or .prof files")
+	parser.add_argument('--sort', default="cumulative", help="pstats sort key (cumulative, tottime, calls, ...)")
+	parser.add_argument('--limit', type=int, default=25, help="functions listed per profile")
+	parser.add_argument('--combined', action='store_true', help="print one profile for all modes instead of one per mode")
+	parser.add_argument('--output', help="also save the combined profile to this path (for snakeviz, gprof2dot, etc.)")
+	args = parser.parse_args()
+
+	paths_by_mode = profile_paths_by_mode([os.path.expanduser(path) for path in args.paths])
+	all_paths = sorted(sum(paths_by_mode.values(), []))
+	if len(all_paths) == 0:
+		print >> sys.stderr, "no .prof files found"
+		sys.exit(1)
+
+	if args.combined:
+		print_profiles("all modes", all_paths, args.sort, args.limit)
+	else:
+		for mode in sorted(paths_by_mode):
+			print_profiles("--" + mode, paths_by_mode[mode], args.sort, args.limit)
+
+	if args.output != None:
+		pstats.Stats(*all_paths).dump_stats(args.output)
+		print "wrote %s" % args.output
+
+
+if __name__ == "__main__":
+	main()
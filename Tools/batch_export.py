@@ -0,0 +1,266 @@
+#!/usr/bin/python
+
+# 	batch_export.py
+#		Replays staged Hype exports through the Export Scripts without Hype, running many
+#		--modify_staging_path jobs at once.
+#
+#		Every job runs the script as its own process with the same arguments Hype passes,
+#		so the behavior is identical to a Hype-driven export.
+#
+#		The manifest is a json array of jobs:
+#			[
+#				{
+#					"script" : "Sizmek",						# name or path of the export script
+#					"staging_path" : "./staging/300x250",
+#					"export_info_json_path" : "./staging/300x250-export_info.json",
+#					"destination_path" : "./out/300x250.zip",
+#					"is_preview" : false,						# optional
+#					"export_uid" : "nightly-300x250"			# optional
+#				},
+#				...
+#			]
+#		Relative paths are resolved against the manifest's folder.
+#
+#		Zip packages are checked (central directory and a CRC sample) on a separate thread while
+#		the next exports run; a package that fails the check is renamed to *.corrupt and its job
+#		is reported as failed.
+#
+#		Usage:
+#			batch_export.py manifest.json --jobs 8 --timeout 120 --summary_path summary.json
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import json
+import os
+import Queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import hype_export_tools
+import hype_export_shared
+
+
+def read_manifest(manifest_path):
+	with open(manifest_path, 'r') as manifest_file:
+		jobs = json.loads(manifest_file.read())
+
+	manifest_folder = os.path.dirname(os.path.abspath(manifest_path))
+	def resolve(path):
+		return os.path.join(manifest_folder, os.path.expanduser(path))
+
+	for index, job in enumerate(jobs):
+		job["index"] = index
+		job["script_path"] = hype_export_tools.find_export_script(resolve(job["script"]) if os.path.exists(resolve(job["script"])) else job["script"])
+		for key in ["staging_path", "export_info_json_path", "destination_path"]:
+			job[key] = resolve(job[key])
+	return jobs
+
+def job_arguments(job, staging_path):
+	arguments = [sys.executable, job["script_path"]]
+	arguments += hype_export_tools.modify_staging_path_arguments(staging_path, job["destination_path"], job["export_info_json_path"], job.get("is_preview", False), job.get("export_uid"))
+	return arguments
+
+def output_size(path):
+	if os.path.isfile(path):
+		return os.path.getsize(path)
+	total = 0
+	for dirname, subdirs, files in os.walk(path):
+		for filename in files:
+			total += os.path.getsize(os.path.join(dirname, filename))
+	return total
+
+# runs one job to completion, killing it after timeout seconds
+def run_job(job, timeout, copy_staging):
+	outcome = {"index" : job["index"], "script" : hype_export_tools.export_script_name(job["script_path"]), "staging_path" : job["staging_path"], "destination_path" : job["destination_path"]}
+	work_folder = None
+	start_time = time.time()
+	try:
+		staging_path = job["staging_path"]
+		if copy_staging:
+			# scripts move or rewrite the staging folder, so work on a copy to keep the input replayable
+			work_folder = tempfile.mkdtemp(prefix="hype-batch-")
+			staging_path = os.path.join(work_folder, os.path.basename(staging_path.rstrip(os.sep)))
+			shutil.copytree(job["staging_path"], staging_path)
+
+		destination_folder = os.path.dirname(job["destination_path"])
+		if destination_folder != "" and os.path.exists(destination_folder) == False:
+			try:
+				os.makedirs(destination_folder)
+			except OSError:
+				pass
+
+		# packages are verified by the batch's verification thread instead of inside the script
+		environment = dict(os.environ)
+		environment[hype_export_shared.defer_zip_verification_environment_variable] = "1"
+
+		output_file = tempfile.TemporaryFile()
+		process = subprocess.Popen(job_arguments(job, staging_path), stdout=output_file, stderr=subprocess.STDOUT, close_fds=True, env=environment)
+		deadline = start_time + timeout if timeout else None
+		while process.poll() == None:
+			if deadline != None and time.time() > deadline:
+				process.kill()
+				process.wait()
+				# a killed write_zip can't remove its temporary file, and nightly runs would pile them up
+				for temporary_path in hype_export_shared.leftover_zip_temporary_paths(job["destination_path"]):
+					try:
+						os.remove(temporary_path)
+					except OSError:
+						pass
+				outcome["error"] = "timed out after %ss" % timeout
+				break
+			time.sleep(0.01)
+
+		output_file.seek(0)
+		output = output_file.read()
+		output_file.close()
+
+		outcome["exit_code"] = process.returncode
+		outcome["result"] = hype_export_tools.parse_export_script_output(output)
+		if "error" not in outcome:
+			if process.returncode != 0:
+				outcome["error"] = "exited with code %d" % process.returncode
+			elif outcome["result"] != True:
+				outcome["error"] = "did not report a successful move to the destination"
+		if "error" in outcome:
+			outcome["output"] = output[-4000:]
+		elif os.path.exists(job["destination_path"]):
+			outcome["output_bytes"] = output_size(job["destination_path"])
+	except Exception as e:
+		outcome["error"] = "%s: %s" % (e.__class__.__name__, e)
+	finally:
+		outcome["duration"] = time.time() - start_time
+		if work_folder != None:
+			shutil.rmtree(work_folder, ignore_errors=True)
+
+	outcome["succeeded"] = ("error" not in outcome)
+	return outcome
+
+# checks finished packages one at a time while the workers move on to the next exports, calling
+# finished(outcome) once each is checked
+def start_verification_thread(verification_queue, finished):
+	def verify():
+		while True:
+			outcome = verification_queue.get()
+			if outcome == None:
+				return
+			try:
+				hype_export_shared.verify_zip(outcome["destination_path"], force=True)
+			except Exception as e:
+				outcome["error"] = "package failed verification: %s" % e
+				outcome["succeeded"] = False
+				os.rename(outcome["destination_path"], outcome["destination_path"] + ".corrupt")
+			finished(outcome)
+
+	thread = threading.Thread(target=verify)
+	thread.daemon = True
+	thread.start()
+	return thread
+
+def run_jobs(jobs, concurrency, timeout, copy_staging, report_progress=True):
+	import zipfile
+
+	job_queue = Queue.Queue()
+	for job in jobs:
+		job_queue.put(job)
+
+	outcomes = []
+	outcomes_lock = threading.Lock()
+	reported_count = [0]
+
+	# a job's status is only printed once it is final, after its package was verified
+	def finished(outcome):
+		with outcomes_lock:
+			reported_count[0] += 1
+			if report_progress:
+				status = "ok" if outcome["succeeded"] else "FAILED (" + outcome["error"] + ")"
+				print "[%d/%d] %s %s %.2fs %s" % (reported_count[0], len(jobs), outcome["script"], os.path.basename(outcome["staging_path"]), outcome["duration"], status)
+				sys.stdout.flush()
+
+	verification_queue = Queue.Queue()
+	verification_thread = start_verification_thread(verification_queue, finished)
+
+	def worker():
+		while True:
+			try:
+				job = job_queue.get_nowait()
+			except Queue.Empty:
+				return
+			outcome = run_job(job, timeout, copy_staging)
+			with outcomes_lock:
+				outcomes.append(outcome)
+			if outcome["succeeded"] and os.path.isfile(job["destination_path"]) and zipfile.is_zipfile(job["destination_path"]):
+				verification_queue.put(outcome)
+			else:
+				finished(outcome)
+
+	threads = [threading.Thread(target=worker) for i in range(max(1, min(concurrency, len(jobs))))]
+	for thread in threads:
+		thread.daemon = True
+		thread.start()
+	# join with a timeout so Ctrl-C still interrupts the main thread
+	for thread in threads:
+		while thread.is_alive():
+			thread.join(0.1)
+	verification_queue.put(None)
+	while verification_thread.is_alive():
+		verification_thread.join(0.1)
+
+	return sorted(outcomes, key=lambda outcome: outcome["index"])
+
+def summarize(outcomes, wall_time, concurrency):
+	durations = sorted(outcome["duration"] for outcome in outcomes)
+	succeeded = [outcome for outcome in outcomes if outcome["succeeded"]]
+	output_bytes = sum(outcome.get("output_bytes", 0) for outcome in succeeded)
+
+	def percentile(fraction):
+		if len(durations) == 0:
+			return 0
+		return durations[min(len(durations) - 1, int(round(fraction * (len(durations) - 1))))]
+
+	return {
+		"jobs" : len(outcomes),
+		"succeeded" : len(succeeded),
+		"failed" : len(outcomes) - len(succeeded),
+		"concurrency" : concurrency,
+		"wall_time" : wall_time,
+		"jobs_per_second" : (len(outcomes) / wall_time) if wall_time > 0 else 0,
+		"output_bytes_per_second" : (output_bytes / wall_time) if wall_time > 0 else 0,
+		"job_duration" : {"p50" : percentile(0.5), "p90" : percentile(0.9), "max" : percentile(1.0)},
+		"failures" : [{"index" : outcome["index"], "script" : outcome["script"], "staging_path" : outcome["staging_path"], "error" : outcome["error"], "output" : outcome.get("output", "")} for outcome in outcomes if outcome["succeeded"] == False],
+		"outcomes" : outcomes,
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="Run many staged --modify_staging_path exports through the Export Scripts in parallel.")
+	parser.add_argument('manifest_path')
+	parser.add_argument('--jobs', type=int, default=4, help="maximum number of exports running at once")
+	parser.add_argument('--timeout', type=float, default=300, help="seconds before a single export is killed (0 for no limit)")
+	parser.add_argument('--copy_staging', action='store_true', help="export a temporary copy of each staging folder so the input is left untouched")
+	parser.add_argument('--summary_path', help="write the summary as json to this path")
+	args = parser.parse_args()
+
+	jobs = read_manifest(args.manifest_path)
+
+	start_time = time.time()
+	outcomes = run_jobs(jobs, args.jobs, args.timeout, args.copy_staging)
+	summary = summarize(outcomes, time.time() - start_time, args.jobs)
+
+	print "%d jobs, %d failed, %.2fs wall time, %.2f jobs/s, %.1f KB/s written, p50 %.2fs, p90 %.2fs" % (summary["jobs"], summary["failed"], summary["wall_time"], summary["jobs_per_second"], summary["output_bytes_per_second"] / 1024.0, summary["job_duration"]["p50"], summary["job_duration"]["p90"])
+	for failure in summary["failures"]:
+		print "FAILED %s %s: %s" % (failure["script"], failure["staging_path"], failure["error"])
+
+	if args.summary_path != None:
+		hype_export_tools.write_json(args.summary_path, summary)
+
+	sys.exit(0 if summary["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+	main()
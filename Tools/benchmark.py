@@ -0,0 +1,225 @@
+#!/usr/bin/python
+
+# 	benchmark.py
+#		Benchmarks the Export Scripts the way Hype drives them: --get_options, a --replace_url call for
+#		every resource in the document, then --modify_staging_path, each as its own process.
+#
+#		Staging folders are synthetic documents from hype_staging_fixture.py, laid out with each
+#		script's own answers. Every phase is repeated and reported as latency percentiles, with
+#		throughput, peak memory (max rss) of the script process and the package size. Results are
+#		saved as json so runs can be compared across versions (see compare_benchmarks.py).
+#
+#		Usage:
+#			benchmark.py --output results.json [--script Sizmek --script HPUB] [--repeat 5]
+#				[--scene_count 8 --image_count 20 --video_kb 4096 ...]
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import datetime
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import hype_export_tools
+import hype_staging_fixture
+
+benchmark_format_version = 1
+hype_version = "4.1.5"
+
+
+# RUNNING
+
+# runs a script process to completion, returning {"seconds", "exit_code", "output", "max_rss_kb"}
+def run_process(arguments):
+	output_file = tempfile.TemporaryFile()
+	start_time = time.time()
+	process = subprocess.Popen(arguments, stdout=output_file, stderr=subprocess.STDOUT, close_fds=True)
+	pid, status, resource_usage = os.wait4(process.pid, 0)
+	seconds = time.time() - start_time
+	process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+
+	output_file.seek(0)
+	output = output_file.read()
+	output_file.close()
+
+	# ru_maxrss is in kilobytes on Linux but in bytes on macOS
+	max_rss_kb = resource_usage.ru_maxrss / 1024 if sys.platform == "darwin" else resource_usage.ru_maxrss
+	return {"seconds" : seconds, "exit_code" : process.returncode, "output" : output, "max_rss_kb" : max_rss_kb}
+
+def hype_arguments(options, export_uid):
+	return ["--hype_version", hype_version, "--hype_build", options["hype_build"], "--export_uid", export_uid]
+
+def script_failure(phase, run):
+	return RuntimeError("%s exited with code %d:\n%s" % (phase, run["exit_code"], run["output"][-2000:]))
+
+def benchmark_script(script_path, options, repeat, warmup, work_root):
+	name = hype_export_tools.export_script_name(script_path)
+	script_arguments = [sys.executable, script_path]
+	resources = hype_staging_fixture.document_resources(options)
+	url_requests = [(hype_staging_fixture.resources_folder_name(options), hype_staging_fixture.HypeURLType.ResourcesFolder)] + [(resource["name"], resource["url_type"]) for resource in resources]
+
+	get_options_runs = []
+	replace_url_runs = []
+	replace_url_sequences = []
+	modify_runs = []
+	package_sizes = []
+	staging_bytes = 0
+
+	for round_index in range(warmup + repeat):
+		is_warmup = (round_index < warmup)
+		export_uid = "benchmark-%s-%d" % (name.replace(" ", ""), round_index)
+
+		run = run_process(script_arguments + ["--get_options"] + hype_arguments(options, export_uid))
+		if run["exit_code"] != 0:
+			raise script_failure("--get_options", run)
+		get_options_result = hype_export_tools.parse_export_script_output(run["output"]) or {}
+		if is_warmup == False:
+			get_options_runs.append(run)
+
+		answers = {}
+		sequence_start_time = time.time()
+		for url, url_type in url_requests:
+			run = run_process(script_arguments + ["--replace_url", url, "--url_type", str(url_type), "--is_reference", "False", "--should_preload", "True", "--is_preview", "False"] + hype_arguments(options, export_uid))
+			if run["exit_code"] != 0:
+				raise script_failure("--replace_url " + url, run)
+			result = hype_export_tools.parse_export_script_output(run["output"])
+			answers[(url, url_type)] = result["url"] if result != None and result.get("url") != None else url
+			if is_warmup == False:
+				replace_url_runs.append(run)
+		if is_warmup == False:
+			replace_url_sequences.append(time.time() - sequence_start_time)
+
+		# laying out the staging folder is Hype's work, so it isn't timed
+		staging_path = os.path.join(work_root, "staging")
+		export_info_json_path = os.path.join(work_root, "export_info.json")
+		hype_staging_fixture.write_staging_tree(staging_path, export_info_json_path, options, lambda url, url_type: answers[(url, url_type)], get_options_result.get("export_options"), get_options_result.get("document_arguments"), get_options_result.get("extra_actions"))
+		staging_bytes = hype_staging_fixture.folder_size(staging_path)
+
+		file_extension = get_options_result.get("save_options", {}).get("file_extension")
+		destination_path = os.path.join(work_root, "export" + ("." + file_extension if file_extension else ""))
+		run = run_process(script_arguments + hype_export_tools.modify_staging_path_arguments(staging_path, destination_path, export_info_json_path, False, export_uid) + ["--hype_version", hype_version, "--hype_build", options["hype_build"]])
+		if run["exit_code"] != 0:
+			raise script_failure("--modify_staging_path", run)
+		if hype_export_tools.parse_export_script_output(run["output"]) != True:
+			# the script left the move to Hype
+			shutil.rmtree(destination_path, ignore_errors=True)
+			shutil.move(staging_path, destination_path)
+		if is_warmup == False:
+			modify_runs.append(run)
+			package_sizes.append(os.path.getsize(destination_path) if os.path.isfile(destination_path) else hype_staging_fixture.folder_size(destination_path))
+
+		shutil.rmtree(staging_path, ignore_errors=True)
+		if os.path.isdir(destination_path):
+			shutil.rmtree(destination_path, ignore_errors=True)
+		elif os.path.exists(destination_path):
+			os.remove(destination_path)
+
+	modify_seconds = [run["seconds"] for run in modify_runs]
+	replace_url_seconds = [run["seconds"] for run in replace_url_runs]
+	return {
+		"get_options" : {
+			"seconds" : [run["seconds"] for run in get_options_runs],
+			"max_rss_kb" : [run["max_rss_kb"] for run in get_options_runs],
+			"latency" : hype_export_tools.distribution([run["seconds"] for run in get_options_runs]),
+		},
+		"replace_url" : {
+			"calls_per_sequence" : len(url_requests),
+			"seconds" : replace_url_seconds,
+			"latency" : hype_export_tools.distribution(replace_url_seconds),
+			"sequence_seconds" : replace_url_sequences,
+			"sequence_latency" : hype_export_tools.distribution(replace_url_sequences),
+			"calls_per_second" : len(replace_url_seconds) / sum(replace_url_seconds) if sum(replace_url_seconds) > 0 else 0,
+			"max_rss_kb" : [max(run["max_rss_kb"] for run in replace_url_runs)] if len(replace_url_runs) > 0 else [],
+		},
+		"modify_staging_path" : {
+			"seconds" : modify_seconds,
+			"latency" : hype_export_tools.distribution(modify_seconds),
+			"max_rss_kb" : [run["max_rss_kb"] for run in modify_runs],
+			"staging_bytes" : staging_bytes,
+			"package_bytes" : package_sizes,
+			"throughput_bytes_per_second" : staging_bytes / hype_export_tools.median(modify_seconds) if len(modify_seconds) > 0 and hype_export_tools.median(modify_seconds) > 0 else 0,
+		},
+	}
+
+
+# REPORTING
+
+def environment():
+	commit = None
+	try:
+		with open(os.devnull, 'w') as devnull:
+			commit = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=hype_export_tools.repository_folder, stderr=devnull).strip()
+	except (OSError, subprocess.CalledProcessError):
+		pass
+	return {
+		"python" : sys.version.split()[0],
+		"platform" : platform.platform(),
+		"machine" : platform.machine(),
+		"commit" : commit,
+		"date" : datetime.datetime.now().isoformat(),
+	}
+
+def print_table(results):
+	print "%-20s %12s %12s %12s %12s %12s %10s %10s %10s" % ("script", "options p50", "url p50", "url p90", "modify p50", "modify p90", "MB/s", "package KB", "max rss MB")
+	for name, result in sorted(results["scripts"].items()):
+		if "error" in result:
+			print "%-20s FAILED: %s" % (name, result["error"].split("\n")[0])
+			continue
+		modify = result["modify_staging_path"]
+		print "%-20s %10.1fms %10.1fms %10.1fms %10.1fms %10.1fms %10.1f %10.1f %10.1f" % (
+			name,
+			result["get_options"]["latency"]["p50"] * 1000,
+			result["replace_url"]["latency"]["p50"] * 1000,
+			result["replace_url"]["latency"]["p90"] * 1000,
+			modify["latency"]["p50"] * 1000,
+			modify["latency"]["p90"] * 1000,
+			modify["throughput_bytes_per_second"] / (1024.0 * 1024.0),
+			hype_export_tools.median(modify["package_bytes"]) / 1024.0,
+			hype_export_tools.median(modify["max_rss_kb"]) / 1024.0)
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the Export Scripts on synthetic Hype documents.")
+	parser.add_argument('--script', action='append', help="export script name or path (repeatable, default all)")
+	parser.add_argument('--repeat', type=int, default=5, help="measured rounds per script")
+	parser.add_argument('--warmup', type=int, default=1, help="unmeasured rounds per script")
+	parser.add_argument('--output', help="write the results as json to this path")
+	hype_staging_fixture.fixture_option_arguments(parser)
+	args = parser.parse_args()
+
+	options = dict((key, getattr(args, key)) for key in hype_staging_fixture.default_fixture_options)
+	script_paths = [hype_export_tools.find_export_script(script) for script in args.script] if args.script else hype_export_tools.export_script_paths()
+
+	results = {"format" : benchmark_format_version, "environment" : environment(), "fixture" : options, "repeat" : args.repeat, "scripts" : {}}
+	work_root = tempfile.mkdtemp(prefix="hype-benchmark-")
+	try:
+		for script_path in script_paths:
+			name = hype_export_tools.export_script_name(script_path)
+			sys.stdout.write("%s... " % name)
+			sys.stdout.flush()
+			start_time = time.time()
+			try:
+				results["scripts"][name] = benchmark_script(script_path, options, args.repeat, args.warmup, work_root)
+				print "%.1fs" % (time.time() - start_time)
+			except Exception as e:
+				results["scripts"][name] = {"error" : str(e)}
+				print "FAILED"
+	finally:
+		shutil.rmtree(work_root, ignore_errors=True)
+
+	print
+	print_table(results)
+	if args.output != None:
+		hype_export_tools.write_json(args.output, results)
+
+	sys.exit(0 if all("error" not in result for result in results["scripts"].values()) else 1)
+
+
+if __name__ == "__main__":
+	main()
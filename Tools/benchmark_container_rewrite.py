@@ -0,0 +1,137 @@
+#!/usr/bin/python
+
+# 	benchmark_container_rewrite.py
+#		Checks that IABPoliteAd's hype container rewrite scales linearly with the size of index.html
+#		and finds the right element, using pathological documents:
+#			many_divs			thousands of nested and sibling <div>s inside and after the container
+#			huge_inline_script	a multi-megabyte inline script that itself contains container markup
+#			many_ids			many <div id="..."> elements before the container
+#			self_closing_divs	<div/> tags inside the container, which html opens like any other <div>
+#
+#		Each document is grown in size steps; the run time at each size and the scaling exponent
+#		(1.0 is linear) are reported next to the previous DOTALL regex, along with whether each found
+#		the right </div>.
+#
+#		Usage:
+#			benchmark_container_rewrite.py [--steps 6] [--base_kb 64] [--output results.json]
+#		exits with 1 if the rewrite is wrong or scales worse than --maximum_exponent
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import math
+import re
+import sys
+import time
+
+import hype_export_tools
+
+container_open_tag = '<div id="doc_hype_container" class="HYPE_document" style="margin:auto;position:relative;width:300px;height:250px;overflow:hidden;">'
+loader_script_tag = '<script type="text/javascript" charset="utf-8" src="doc.hyperesources/doc_hype_generated_script.js?1"></script>'
+
+# the regex IABPoliteAd used before, for comparison
+previous_container_regex = re.compile(r"\<div\ id=\"(.*_hype_container)\"(.*)</div>", re.MULTILINE|re.IGNORECASE|re.DOTALL)
+
+
+# DOCUMENTS
+
+# returns (html, expected container open tag start, expected close tag start)
+def document(head, before_container, inside_container, after_container):
+	prefix = '<!DOCTYPE html>\n<html>\n<head>\n<title>doc</title>\n' + head + '</head>\n<body>\n' + before_container
+	inside = '\n' + loader_script_tag + '\n' + inside_container
+	html = prefix + container_open_tag + inside + '</div>\n' + after_container + '</body>\n</html>\n'
+	return (html, len(prefix), len(prefix) + len(container_open_tag) + len(inside))
+
+def repeated_to_size(unit, size):
+	return unit * max(1, size // len(unit))
+
+def many_divs_document(size):
+	nested = repeated_to_size('<div class="element"><div class="inner">text</div></div>\n', size // 2)
+	siblings = repeated_to_size('<div class="after">after</div>\n', size // 2)
+	return document("", "", nested, siblings)
+
+def huge_inline_script_document(size):
+	script_body = repeated_to_size('var a="<div id=\\"fake_hype_container\\">";var b="</div>";function f(x){return x<1?a:b}\n', size)
+	return document('<script>' + script_body + '</script>\n', "", "", '<div class="after"></div>\n')
+
+def many_ids_document(size):
+	before = repeated_to_size('<div id="item"><span>item</span></div>\n', size)
+	return document("", before, "", "")
+
+def self_closing_divs_document(size):
+	inside = repeated_to_size('<div class="spacer"/>text</div>\n', size // 2)
+	after = repeated_to_size('<div class="after">after</div>\n', size // 2)
+	return document("", "", inside, after)
+
+documents = [("many_divs", many_divs_document), ("huge_inline_script", huge_inline_script_document), ("many_ids", many_ids_document), ("self_closing_divs", self_closing_divs_document)]
+
+
+# MEASURING
+
+def best_time(function, repeat):
+	best = None
+	for index in range(repeat):
+		start_time = time.time()
+		result = function()
+		duration = time.time() - start_time
+		best = duration if best == None else min(best, duration)
+	return (best, result)
+
+def previous_rewrite(html):
+	match = previous_container_regex.search(html)
+	previous_container_regex.sub("<a href=\"javascript:void(0)\" target=\"_blank\" id=\"\g<1>\"\g<2></a>", html)
+	return (match.start(), match.end() - len("</div>")) if match != None else None
+
+def scaling_exponent(sizes, durations):
+	# slope of log(time) against log(size) between the smallest and largest document
+	if durations[0] <= 0 or durations[-1] <= 0:
+		return None
+	return math.log(durations[-1] / durations[0]) / math.log(float(sizes[-1]) / sizes[0])
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark IABPoliteAd's container rewrite on pathological documents.")
+	parser.add_argument('--steps', type=int, default=6, help="document sizes, doubling from --base_kb")
+	parser.add_argument('--base_kb', type=int, default=64)
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--maximum_exponent', type=float, default=1.3)
+	parser.add_argument('--output', help="write the results as json to this path")
+	args = parser.parse_args()
+
+	script = hype_export_tools.load_export_script(hype_export_tools.find_export_script("IABPoliteAd"))
+
+	results = {}
+	failed = False
+	print "%-20s %10s %12s %12s %8s %8s" % ("document", "size KB", "rewrite", "previous", "correct", "prev ok")
+	for name, make_document in documents:
+		rows = []
+		for step in range(args.steps):
+			size = args.base_kb * 1024 * (2 ** step)
+			html, expected_open, expected_close = make_document(size)
+
+			duration = best_time(lambda: script.rewrite_main_container(html), args.repeat)[0]
+			main_container = script.find_main_container(html)
+			correct = (main_container != None and main_container[1] == expected_open and main_container[3] == expected_close)
+			previous_duration, previous_span = best_time(lambda: previous_rewrite(html), args.repeat)
+			previous_correct = (previous_span == (expected_open, expected_close))
+
+			rows.append({"bytes" : len(html), "seconds" : duration, "correct" : correct, "previous_seconds" : previous_duration, "previous_correct" : previous_correct})
+			print "%-20s %10d %10.2fms %10.2fms %8s %8s" % (name, len(html) / 1024, duration * 1000, previous_duration * 1000, "yes" if correct else "NO", "yes" if previous_correct else "no")
+			failed = failed or (correct == False)
+
+		exponent = scaling_exponent([row["bytes"] for row in rows], [row["seconds"] for row in rows])
+		previous_exponent = scaling_exponent([row["bytes"] for row in rows], [row["previous_seconds"] for row in rows])
+		print "%-20s %.2fms at %d KB (previous regex %.2fms), scaling exponent %.2f (previous regex %.2f)" % (name, rows[-1]["seconds"] * 1000, rows[-1]["bytes"] / 1024, rows[-1]["previous_seconds"] * 1000, exponent or 0, previous_exponent or 0)
+		print
+		results[name] = {"sizes" : rows, "scaling_exponent" : exponent, "previous_scaling_exponent" : previous_exponent}
+		if exponent != None and exponent > args.maximum_exponent:
+			failed = True
+
+	if args.output != None:
+		hype_export_tools.write_json(args.output, results)
+	sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+	main()
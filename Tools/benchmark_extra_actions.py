@@ -0,0 +1,152 @@
+#!/usr/bin/python
+
+# 	benchmark_extra_actions.py
+#		Checks that building the dummy interactions for extra action usages (Sizmek and DoubleClick
+#		Studio) scales linearly with the number of usages in export_info.json, using synthetic
+#		export_info files with thousands of usages:
+#			repeated	a few dozen distinct actions, each used on many timeline keyframes
+#			distinct	every usage has its own arguments
+#
+#		Each file is grown in size steps; the scaling exponent of the run time (1.0 is linear) is
+#		reported next to the previous one-line-per-usage string concatenation, along with how many
+#		lines each emits. The largest file is then exported with --modify_staging_path.
+#
+#		Usage:
+#			benchmark_extra_actions.py [--script Sizmek --script "DoubleClick Studio"] [--steps 6] [--base_usages 1000] [--output results.json]
+#		exits with 1 if the dummy interactions are wrong or scale worse than --maximum_exponent
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmark_container_rewrite
+import hype_export_tools
+import hype_staging_fixture
+
+functions = ["hypeAdExit", "hypeAdCounter", "hypeAdStartTimer", "hypeAdStopTimer"]
+
+
+# EXPORT INFO
+
+def action_usage(index, distinct_count):
+	key = index % distinct_count
+	function_name = functions[key % len(functions)]
+	if function_name == "hypeAdExit" and key % 8 == 0:
+		return {"function" : function_name, "arguments" : ['"exit%d"' % key, '"https://example.com/%d"' % key]}
+	return {"function" : function_name, "arguments" : ['"%s%d"' % (function_name[6:].lower(), key)]}
+
+def write_export_info(path, usage_count, distinct_count):
+	export_info = {
+		"html_filename" : "index.html",
+		"main_container_width" : 300,
+		"main_container_height" : 250,
+		"document_arguments" : {},
+		"extra_actions" : [action_usage(index, distinct_count) for index in range(usage_count)],
+	}
+	hype_export_tools.write_json(path, export_info)
+
+kinds = [("repeated", lambda usage_count: 40), ("distinct", lambda usage_count: usage_count)]
+
+
+# MEASURING
+
+# how the scripts built the dummy interactions before
+def previous_dummy_interactions(script, export_info):
+	dummy_interactions = ""
+	for actionInfo in export_info['extra_actions']:
+		dummy_interaction = script.construct_dummy_interaction(actionInfo["function"], actionInfo["arguments"])
+		if dummy_interaction == None:
+			continue
+		dummy_interactions = dummy_interactions + "\t\t" + dummy_interaction + ";\n"
+	return dummy_interactions
+
+def unique_lines(text):
+	lines = []
+	seen = set()
+	for line in text.splitlines(True):
+		if line not in seen:
+			seen.add(line)
+			lines.append(line)
+	return lines
+
+def export_largest(script_path, export_info_json_path, work_root):
+	options = dict(hype_staging_fixture.default_fixture_options, image_count=1)
+	staging_path = os.path.join(work_root, "staging")
+	shutil.rmtree(staging_path, ignore_errors=True)
+	hype_staging_fixture.write_staging_tree(staging_path, os.path.join(work_root, "fixture_export_info.json"), options, lambda url, url_type: "." if url_type == hype_staging_fixture.HypeURLType.ResourcesFolder else url)
+	destination_path = os.path.join(work_root, "export.zip")
+	start_time = time.time()
+	process = subprocess.Popen([sys.executable, script_path] + hype_export_tools.modify_staging_path_arguments(staging_path, destination_path, export_info_json_path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+	output = process.communicate()[0]
+	duration = time.time() - start_time
+	if process.returncode != 0:
+		raise RuntimeError("--modify_staging_path exited with code %d:\n%s" % (process.returncode, output[-2000:]))
+	return (duration, os.path.getsize(destination_path))
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark building dummy interactions for documents with thousands of extra action usages.")
+	parser.add_argument('--script', action='append', help="export script name or path (repeatable, default Sizmek and DoubleClick Studio)")
+	parser.add_argument('--steps', type=int, default=6, help="export_info sizes, doubling from --base_usages")
+	parser.add_argument('--base_usages', type=int, default=1000)
+	parser.add_argument('--repeat', type=int, default=3)
+	parser.add_argument('--maximum_exponent', type=float, default=1.3)
+	parser.add_argument('--output', help="write the results as json to this path")
+	args = parser.parse_args()
+
+	script_paths = [hype_export_tools.find_export_script(script) for script in (args.script or ["Sizmek", "DoubleClick Studio"])]
+	work_root = tempfile.mkdtemp(prefix="hype-extra-actions-benchmark-")
+	results = {}
+	failed = False
+	try:
+		for script_path in script_paths:
+			name = hype_export_tools.export_script_name(script_path)
+			script = hype_export_tools.load_export_script(script_path)
+			results[name] = {}
+			print "%-20s %-10s %8s %12s %12s %8s %8s %8s" % (name, "", "usages", "index", "previous", "lines", "prev", "correct")
+			for kind, distinct_count_for in kinds:
+				rows = []
+				for step in range(args.steps):
+					usage_count = args.base_usages * (2 ** step)
+					export_info_json_path = os.path.join(work_root, "%s-%d.json" % (kind, usage_count))
+					write_export_info(export_info_json_path, usage_count, distinct_count_for(usage_count))
+					export_info = hype_export_tools.read_export_info(export_info_json_path)
+
+					duration, dummy_interactions = benchmark_container_rewrite.best_time(lambda: script.build_dummy_interactions(export_info), args.repeat)
+					previous_duration, previous = benchmark_container_rewrite.best_time(lambda: previous_dummy_interactions(script, export_info), args.repeat)
+					correct = (dummy_interactions == "".join(unique_lines(previous)))
+					line_count = len(dummy_interactions.splitlines())
+					previous_line_count = len(previous.splitlines())
+
+					rows.append({"usages" : usage_count, "seconds" : duration, "lines" : line_count, "previous_seconds" : previous_duration, "previous_lines" : previous_line_count, "correct" : correct, "export_info_json_path" : export_info_json_path})
+					print "%-20s %-10s %8d %10.2fms %10.2fms %8d %8d %8s" % ("", kind, usage_count, duration * 1000, previous_duration * 1000, line_count, previous_line_count, "yes" if correct else "NO")
+					failed = failed or (correct == False)
+
+				exponent = benchmark_container_rewrite.scaling_exponent([row["usages"] for row in rows], [row["seconds"] for row in rows])
+				previous_exponent = benchmark_container_rewrite.scaling_exponent([row["usages"] for row in rows], [row["previous_seconds"] for row in rows])
+				export_seconds, package_bytes = export_largest(script_path, rows[-1]["export_info_json_path"], work_root)
+				print "%-20s %-10s scaling exponent %.2f (previous %.2f), --modify_staging_path with %d usages %.0fms, %d byte package" % ("", kind, exponent or 0, previous_exponent or 0, rows[-1]["usages"], export_seconds * 1000, package_bytes)
+				for row in rows:
+					del row["export_info_json_path"]
+				results[name][kind] = {"sizes" : rows, "scaling_exponent" : exponent, "previous_scaling_exponent" : previous_exponent, "modify_staging_path_seconds" : export_seconds, "package_bytes" : package_bytes}
+				if exponent != None and exponent > args.maximum_exponent:
+					failed = True
+			print
+	finally:
+		shutil.rmtree(work_root, ignore_errors=True)
+
+	if args.output != None:
+		hype_export_tools.write_json(args.output, results)
+	sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+	main()
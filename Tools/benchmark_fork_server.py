@@ -0,0 +1,150 @@
+#!/usr/bin/python
+
+# 	benchmark_fork_server.py
+#		Measures what the fork server (Shared/hype_export_server.py) saves per call: a synthetic
+#		document with --resources resources is exported the way Hype does it (--get_options, one
+#		--replace_url process per resource, then --modify_staging_path), first with every call
+#		starting a cold python, then with the calls handed to a fork server.
+#
+#		Usage:
+#			benchmark_fork_server.py [--script Sizmek --script HPUB] [--resources 200] [--repeat 3] [--output results.json]
+#		exits with 1 if a script fails or its packages differ between the two runs
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmark
+import hype_export_launcher
+import hype_export_tools
+import hype_staging_fixture
+
+
+def start_fork_server(socket_path):
+	environment = dict(os.environ)
+	environment[hype_export_launcher.socket_path_environment_variable] = socket_path
+	with open(os.devnull, 'w') as devnull:
+		process = subprocess.Popen([sys.executable, os.path.join(hype_export_tools.repository_folder, "Shared", "hype_export_server.py"), "start", "--idle_timeout", "3600"], env=environment, stdout=devnull, close_fds=True)
+
+	deadline = time.time() + 30
+	while time.time() < deadline:
+		connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+		try:
+			connection.connect(socket_path)
+			return process
+		except socket.error:
+			time.sleep(0.05)
+		finally:
+			connection.close()
+	process.kill()
+	raise RuntimeError("the fork server didn't start")
+
+def stop_fork_server(process, socket_path):
+	connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	try:
+		connection.connect(socket_path)
+		hype_export_launcher.send_message(connection, {"command" : "stop"})
+		hype_export_launcher.receive_message(connection)
+	except socket.error:
+		process.kill()
+	finally:
+		connection.close()
+	process.wait()
+
+# benchmark.benchmark_script() with calls going to the fork server at socket_path (or starting cold
+# when nothing listens there)
+def benchmark_with_socket(script_path, options, repeat, warmup, work_root, socket_path):
+	previous_socket_path = os.environ.get(hype_export_launcher.socket_path_environment_variable)
+	os.environ[hype_export_launcher.socket_path_environment_variable] = socket_path
+	try:
+		return benchmark.benchmark_script(script_path, options, repeat, warmup, work_root)
+	finally:
+		if previous_socket_path == None:
+			del os.environ[hype_export_launcher.socket_path_environment_variable]
+		else:
+			os.environ[hype_export_launcher.socket_path_environment_variable] = previous_socket_path
+
+def export_seconds(result):
+	# one whole export as Hype runs it
+	return hype_export_tools.median(result["get_options"]["seconds"]) + hype_export_tools.median(result["replace_url"]["sequence_seconds"]) + hype_export_tools.median(result["modify_staging_path"]["seconds"])
+
+def print_comparison(name, cold, warm):
+	print "%-20s %-20s %12s %12s %12s %12s %8s" % (name, "", "cold p50", "cold p90", "server p50", "server p90", "speedup")
+	for phase, latency_key in [("get_options", "latency"), ("replace_url", "latency"), ("modify_staging_path", "latency"), ("replace_url", "sequence_latency")]:
+		cold_latency = cold[phase][latency_key]
+		warm_latency = warm[phase][latency_key]
+		label = "%d x replace_url" % cold["replace_url"]["calls_per_sequence"] if latency_key == "sequence_latency" else phase
+		print "%-20s %-20s %10.1fms %10.1fms %10.1fms %10.1fms %7.2fx" % ("", label, cold_latency["p50"] * 1000, cold_latency["p90"] * 1000, warm_latency["p50"] * 1000, warm_latency["p90"] * 1000, cold_latency["p50"] / warm_latency["p50"] if warm_latency["p50"] > 0 else 0)
+	print "%-20s %-20s %10.1fms %12s %10.1fms %12s %7.2fx" % ("", "whole export", export_seconds(cold) * 1000, "", export_seconds(warm) * 1000, "", export_seconds(cold) / export_seconds(warm))
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark Export Script calls with and without the fork server.")
+	parser.add_argument('--script', action='append', help="export script name or path (repeatable, default Sizmek)")
+	parser.add_argument('--resources', type=int, default=200, help="--replace_url calls per export (sets --image_count)")
+	parser.add_argument('--repeat', type=int, default=3, help="measured exports per script and mode")
+	parser.add_argument('--warmup', type=int, default=1, help="unmeasured exports per script and mode")
+	parser.add_argument('--output', help="write the results as json to this path")
+	hype_staging_fixture.fixture_option_arguments(parser)
+	parser.set_defaults(image_kb=8)
+	args = parser.parse_args()
+
+	options = dict((key, getattr(args, key)) for key in hype_staging_fixture.default_fixture_options)
+	# one call is for the resources folder, the rest for the runtime, loader, fonts, media and images
+	other_options = dict(options, image_count=0)
+	options["image_count"] = max(0, args.resources - 1 - len(hype_staging_fixture.document_resources(other_options)))
+	script_paths = [hype_export_tools.find_export_script(script) for script in (args.script or ["Sizmek"])]
+
+	work_root = tempfile.mkdtemp(prefix="hype-fork-server-benchmark-")
+	socket_path = os.path.join(work_root, "server.sock")
+	results = {"environment" : benchmark.environment(), "fixture" : options, "repeat" : args.repeat, "scripts" : {}}
+	failed = False
+	try:
+		cold_results = {}
+		for script_path in script_paths:
+			name = hype_export_tools.export_script_name(script_path)
+			sys.stdout.write("%s cold... " % name)
+			sys.stdout.flush()
+			cold_results[name] = benchmark_with_socket(script_path, options, args.repeat, args.warmup, work_root, os.path.join(work_root, "no-server.sock"))
+			print "done"
+
+		server_process = start_fork_server(socket_path)
+		try:
+			for script_path in script_paths:
+				name = hype_export_tools.export_script_name(script_path)
+				sys.stdout.write("%s with fork server... " % name)
+				sys.stdout.flush()
+				warm = benchmark_with_socket(script_path, options, args.repeat, args.warmup, work_root, socket_path)
+				print "done"
+				results["scripts"][name] = {"cold" : cold_results[name], "fork_server" : warm}
+		finally:
+			stop_fork_server(server_process, socket_path)
+	except Exception as e:
+		print "FAILED: %s" % e
+		failed = True
+	finally:
+		shutil.rmtree(work_root, ignore_errors=True)
+
+	print
+	for name, result in sorted(results["scripts"].items()):
+		print_comparison(name, result["cold"], result["fork_server"])
+		if result["cold"]["modify_staging_path"]["package_bytes"] != result["fork_server"]["modify_staging_path"]["package_bytes"]:
+			print "%-20s PACKAGES DIFFER: %s cold, %s with the fork server" % (name, result["cold"]["modify_staging_path"]["package_bytes"], result["fork_server"]["modify_staging_path"]["package_bytes"])
+			failed = True
+		print
+
+	if args.output != None:
+		hype_export_tools.write_json(args.output, results)
+	sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+
+# 	campaign_export.py
+#		Packages several sizes of the same creative (ex. 300x250, 728x90, 160x600) through one
+#		Export Script, reporting the assets duplicated between sizes by content hash.
+#
+#		Each size runs through the script's own --modify_staging_path code, so the html
+#		insertions and zip() behavior are the same as an export from Hype. The usual per-size
+#		packages are written along with campaign_report.json listing the duplicated assets.
+#		The assets stay in every package: each ad network's packages must be self-contained, and
+#		a Hype document loads all of its resources from its one resources folder.
+#
+#		Usage:
+#			campaign_export.py --script Sizmek --output_folder ./campaign \
+#				--document ./staging-300x250 ./300x250-export_info.json \
+#				--document ./staging-728x90 ./728x90-export_info.json
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import hype_export_tools
+
+report_name = "campaign_report.json"
+
+
+# runs one staged document through the script, stopping right before it would zip
+# returns the processed staging folder
+def stage_document(script_path, staging_path, export_info_json_path, work_folder, package_path):
+	processed_path = os.path.join(work_folder, "staging")
+	shutil.copytree(staging_path, processed_path)
+
+	module = hype_export_tools.load_export_script(script_path)
+	zipped_folders = []
+	module.zip = lambda src, dst: zipped_folders.append(src)
+
+	arguments = hype_export_tools.modify_staging_path_arguments(processed_path, package_path, export_info_json_path, export_uid="campaign")
+	exit_code, result, output = hype_export_tools.run_export_script_main(module, arguments)
+	if exit_code != 0 or len(zipped_folders) == 0:
+		raise RuntimeError("%s did not package %s:\n%s" % (hype_export_tools.export_script_name(script_path), staging_path, output))
+
+	return zipped_folders[0]
+
+def size_name(export_info, used_names):
+	name = "%sx%s" % (export_info["main_container_width"], export_info["main_container_height"])
+	base_name = name
+	count = 2
+	while name in used_names:
+		name = "%s-%d" % (base_name, count)
+		count += 1
+	return name
+
+# { sha1 : [(size name, archive name), ...] } of the assets in more than one size
+def find_duplicated_assets(sizes, html_filenames):
+	usages = {}
+	for size in sizes:
+		for arcname, (digest, file_size) in sorted(size["index"].items()):
+			if arcname in html_filenames:
+				continue
+			usages.setdefault(digest, []).append((size["name"], arcname))
+	return dict((digest, digest_usages) for digest, digest_usages in usages.items() if len(set(size_name for size_name, arcname in digest_usages)) > 1)
+
+def main():
+	parser = argparse.ArgumentParser(description="Export several sizes of a creative through one Export Script as self-contained packages, reporting the assets duplicated between them.")
+	parser.add_argument('--script', required=True, help="export script name (ex. Sizmek) or path")
+	parser.add_argument('--document', nargs=2, action='append', required=True, metavar=("STAGING_PATH", "EXPORT_INFO_JSON_PATH"))
+	parser.add_argument('--output_folder', required=True)
+	args = parser.parse_args()
+
+	script_path = hype_export_tools.find_export_script(args.script)
+	if os.path.exists(args.output_folder) == False:
+		os.makedirs(args.output_folder)
+
+	work_root = tempfile.mkdtemp(prefix="hype-campaign-")
+	try:
+		sizes = []
+		html_filenames = set()
+		for staging_path, export_info_json_path in args.document:
+			export_info = hype_export_tools.read_export_info(export_info_json_path)
+			name = size_name(export_info, [size["name"] for size in sizes])
+			work_folder = os.path.join(work_root, name)
+			os.makedirs(work_folder)
+			package_path = os.path.join(os.path.abspath(args.output_folder), name + ".zip")
+			processed_path = stage_document(script_path, staging_path, export_info_json_path, work_folder, package_path)
+			html_filenames.add(export_info["html_filename"])
+			sizes.append({"name" : name, "path" : processed_path, "package_path" : package_path, "index" : hype_export_tools.staging_index(processed_path)})
+
+		duplicated_assets = find_duplicated_assets(sizes, html_filenames)
+
+		# package with the script's own zip()
+		network_zip = hype_export_tools.load_export_script(script_path).zip
+
+		for size in sizes:
+			if os.path.exists(size["package_path"]):
+				os.remove(size["package_path"])
+			network_zip(size["path"], size["package_path"])
+
+		duplicated_bytes = 0
+		report_assets = []
+		for digest, usages in sorted(duplicated_assets.items()):
+			size_name_used, arcname = usages[0]
+			file_size = [size for size in sizes if size["name"] == size_name_used][0]["index"][arcname][1]
+			duplicated_bytes += file_size * (len(usages) - 1)
+			report_assets.append({"sha1" : digest, "usages" : [{"size" : name, "path" : path} for name, path in usages]})
+
+		report = {
+			"script" : hype_export_tools.export_script_name(script_path),
+			"sizes" : [{"name" : size["name"], "package" : os.path.basename(size["package_path"]), "package_bytes" : os.path.getsize(size["package_path"])} for size in sizes],
+			"duplicated_assets" : report_assets,
+			"duplicated_bytes" : duplicated_bytes,
+		}
+		hype_export_tools.write_json(os.path.join(args.output_folder, report_name), report)
+
+		print "%d sizes, %d duplicated assets, %d duplicated bytes" % (len(sizes), len(duplicated_assets), duplicated_bytes)
+	finally:
+		shutil.rmtree(work_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+
+# 	check_click_tag_runtime.py
+#		Checks the click tag runtime the query-string networks inject (hype_export_shared.click_tag_runtime):
+#		it must stay within click_tag_runtime_byte_budget bytes, since every impression downloads it, and
+#		when node is installed it is run on sample urls (case-insensitive names, encoded and unencoded
+#		values, empty and malformed parameters, names that collide with Object properties, fragments).
+#
+#		Usage:
+#			check_click_tag_runtime.py [--node /path/to/node]
+#		exits with 1 if the runtime is over budget or a sample gives the wrong result
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import distutils.spawn
+import json
+import subprocess
+import sys
+
+import hype_export_tools
+import hype_export_shared
+
+# (location.search, location.hash, [(parameter name, fallback, expected value)], expected hypeAdURL.hash)
+samples = [
+	("?clickTag=https%3A%2F%2Fexample.com%2F%3Fa%3D1%26b%3D2", "", [("clickTag", "", "https://example.com/?a=1&b=2"), ("clickTAG", "", "https://example.com/?a=1&b=2"), ("CLICKTAG", "", "https://example.com/?a=1&b=2")], ""),
+	("?clickTAG=https://example.com/?a=1&target=_top", "", [("clickTag", "", "https://example.com/?a=1"), ("target", "_blank", "_top")], ""),
+	("?CLICKTAG=first&clicktag=second", "", [("clickTag", "", "second")], ""),
+	("", "", [("clickTag", "javascript:void(0)", "javascript:void(0)"), ("target", "_blank", "_blank")], ""),
+	("?clickTag=&target", "", [("clickTag", "fallback", "fallback"), ("target", "_blank", "_blank")], ""),
+	("?clickTag=%E0%A4%A", "", [("clickTag", "", "%E0%A4%A")], ""),
+	("?hasOwnProperty=1&__proto__=2&constructor=3&clickTag=x", "", [("clickTag", "", "x"), ("__proto__", "", "2"), ("toString", "none", "none"), ("constructor", "", "3")], ""),
+	("", "#https%3A%2F%2Ftrack.example.com%2Fclick%3Furl%3D", [], "https://track.example.com/click?url="),
+	("?clickTag=a%20b+c", "#", [("clickTag", "", "a b+c")], ""),
+]
+
+# runs the runtime once per sample with a stand-in location, printing the results as json
+node_harness = """
+var runtime = %s;
+var samples = %s;
+var results = samples.map(function (sample) {
+	var hypeAdURL = new Function("location", runtime + "; return hypeAdURL;")({search : sample[0], hash : sample[1]});
+	return {params : sample[2].map(function (lookup) { return hypeAdURL.param(lookup[0], lookup[1]); }), hash : hypeAdURL.hash};
+});
+console.log(JSON.stringify(results));
+"""
+
+def run_samples(node_path):
+	harness = node_harness % (json.dumps(hype_export_shared.click_tag_runtime), json.dumps(samples))
+	process = subprocess.Popen([node_path, "-e", harness], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+	output, error_output = process.communicate()
+	if process.returncode != 0:
+		raise RuntimeError("node exited with code %d:\n%s" % (process.returncode, error_output))
+	return json.loads(output)
+
+def main():
+	parser = argparse.ArgumentParser(description="Check the size and behavior of the shared click tag runtime.")
+	parser.add_argument('--node', help="node executable (default from PATH; the samples are skipped without one)")
+	args = parser.parse_args()
+
+	failed = False
+	runtime_bytes = len(hype_export_shared.click_tag_runtime.encode("utf-8"))
+	print "size: %d bytes (budget %d)" % (runtime_bytes, hype_export_shared.click_tag_runtime_byte_budget)
+	if runtime_bytes > hype_export_shared.click_tag_runtime_byte_budget:
+		print "OVER BUDGET by %d bytes" % (runtime_bytes - hype_export_shared.click_tag_runtime_byte_budget)
+		failed = True
+
+	node_path = args.node or distutils.spawn.find_executable("node") or distutils.spawn.find_executable("nodejs")
+	if node_path == None:
+		print "samples: skipped, node not found"
+		sys.exit(1 if failed else 0)
+
+	results = run_samples(node_path)
+	failure_count = 0
+	for (search, fragment, lookups, expected_hash), result in zip(samples, results):
+		for (name, fallback, expected), value in zip(lookups, result["params"]):
+			if value != expected:
+				print "FAILED: %s%s param(%r, %r) is %r, expected %r" % (search, fragment, name, fallback, value, expected)
+				failure_count += 1
+		if result["hash"] != expected_hash:
+			print "FAILED: %s%s hash is %r, expected %r" % (search, fragment, result["hash"], expected_hash)
+			failure_count += 1
+	print "samples: %d urls, %d failures" % (len(samples), failure_count)
+	sys.exit(1 if failed or failure_count > 0 else 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,186 @@
+#!/usr/bin/python
+
+# 	check_scene_pages.py
+#		Checks HPUB's Page Per Scene pages. A synthetic document with an image and a video or audio
+#		in every scene is exported, and each page in book.json is run in node against a stand-in for
+#		the Hype runtime that fires HypeDocumentLoad and HypeSceneLoad the way Hype documents them
+#		(the initial scene is shown after HypeDocumentLoad unless a listener returns false). Each
+#		page must show its own scene without showing the initial scene first, go to the page of any
+#		other scene it is moved to, and preload only the resources its scene names plus those no
+#		scene names. Its generated script must differ from the document's only in preload flags.
+#
+#		This runs the pages' own javascript, but not in a browser and not with the real runtime.
+#
+#		Usage:
+#			check_scene_pages.py [--scene_count 4] [--node /path/to/node]
+#		exits with 1 if a page gives the wrong result
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import distutils.spawn
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+import hype_export_tools
+import hype_export_shared
+import hype_staging_fixture
+
+# runs every page with a stand-in Hype runtime, printing what each showed, where moving to each
+# scene took it, and which resources it preloads
+node_harness = """
+var pages = %s;
+var results = pages.map(function (page) {
+	var window = {location : {href : page.name}};
+	var document = {getElementsByTagName : function () { return [{appendChild : function () {}}]; }, createElement : function () { return {}; }};
+	var hype = null;
+	window["HYPE_" + page.build] = function () {
+		hype = {resources : arguments[2], scenes : arguments[6]};
+	};
+	new Function("window", "document", page.scripts.join(";\\n") + ";\\n" + page.generated_script)(window, document);
+
+	var current = null;
+	var shown = [];
+	var hypeDocument = {
+		kSceneTransitionInstant : 1,
+		sceneNames : function () { return hype.scenes.map(function (scene) { return scene.n; }); },
+		currentSceneName : function () { return current; },
+		showSceneNamed : function (name) {
+			if (this.sceneNames().indexOf(name) == -1)
+				return;
+			current = name;
+			shown.push(name);
+			dispatch("HypeSceneLoad");
+		}
+	};
+	function dispatch(type) {
+		var result = true;
+		(window.HYPE_eventListeners || []).forEach(function (listener) {
+			if (listener.type == type && listener.callback(hypeDocument, {}, {type : type}) === false)
+				result = false;
+		});
+		return result;
+	}
+
+	if (dispatch("HypeDocumentLoad"))
+		hypeDocument.showSceneNamed(hype.scenes[0].n);
+	var loaded = {shown : shown.slice(), location : window.location.href};
+
+	var scene = current;
+	var moves = {};
+	hype.scenes.forEach(function (other) {
+		window.location.href = page.name;
+		current = scene;
+		hypeDocument.showSceneNamed(other.n);
+		moves[other.n] = window.location.href;
+	});
+
+	var preloaded = Object.keys(hype.resources).filter(function (key) { return hype.resources[key].p == 1; }).map(function (key) { return hype.resources[key].n; });
+	return {loaded : loaded, moves : moves, preloaded : preloaded};
+});
+console.log(JSON.stringify(results));
+"""
+
+def run_pages(node_path, pages):
+	process = subprocess.Popen([node_path, "-e", node_harness % json.dumps(pages)], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+	output, error_output = process.communicate()
+	if process.returncode != 0:
+		raise RuntimeError("node exited with code %d:\n%s" % (process.returncode, error_output))
+	return json.loads(output)
+
+# the generated script a page loads, relative to the package
+def page_generated_script_path(html):
+	match = re.search(r'<script\b[^>]*\bsrc="([^"?#]*_hype_generated_script\.js)', html)
+	return match.group(1) if match != None else None
+
+# [(name, preloaded)] of a generated script's resource table, and [set of resource names] its scenes' layouts name
+def document_resources(contents):
+	resources = [(name, preloaded) for name, preloaded, match in hype_export_shared.generated_script_resources(contents)]
+	scene_layout_spans = hype_export_shared.generated_script_scene_layout_spans(contents)
+	scene_names = [set(name for name, preloaded in resources if hype_export_shared.is_resource_named_in(name, u"".join(contents[start:end] for start, end in scene_layout_spans[index]))) for index in sorted(scene_layout_spans)]
+	return (resources, scene_names)
+
+def main():
+	parser = argparse.ArgumentParser(description="Check HPUB's Page Per Scene pages with a stand-in Hype runtime.")
+	parser.add_argument('--scene_count', type=int, default=4)
+	parser.add_argument('--node', help="node executable (default from PATH)")
+	args = parser.parse_args()
+
+	node_path = args.node or distutils.spawn.find_executable("node") or distutils.spawn.find_executable("nodejs")
+	if node_path == None:
+		print >> sys.stderr, "node not found"
+		sys.exit(1)
+
+	work_root = tempfile.mkdtemp(prefix="hype-scene-pages-")
+	try:
+		script_path = hype_export_tools.find_export_script("HPUB")
+		staging_path = os.path.join(work_root, "staging")
+		export_info_json_path = os.path.join(work_root, "export_info.json")
+		get_options_result = hype_staging_fixture.script_options(script_path)
+		options = dict(hype_staging_fixture.default_fixture_options, scene_count=args.scene_count, scene_images=1, scene_media=1)
+		export_info = hype_staging_fixture.write_staging_tree(staging_path, export_info_json_path, options, hype_staging_fixture.script_resolve_url(script_path), get_options_result.get("export_options"), get_options_result.get("document_arguments"), get_options_result.get("extra_actions"))
+		export_info["document_arguments"]["Single Page"] = "false"
+		export_info["document_arguments"]["Page Per Scene"] = "true"
+		hype_export_tools.write_json(export_info_json_path, export_info)
+
+		with open(os.path.join(staging_path, export_info["html_filename"]), 'rb') as html_file:
+			document_generated_script_path = os.path.join(staging_path, page_generated_script_path(html_file.read()))
+		with open(document_generated_script_path, 'rb') as generated_script_file:
+			document_contents = generated_script_file.read().decode("utf-8")
+		resources, scene_resource_names = document_resources(document_contents)
+
+		destination_path = os.path.join(work_root, "book.hpub")
+		process = subprocess.Popen([sys.executable, script_path] + hype_export_tools.modify_staging_path_arguments(staging_path, destination_path, export_info_json_path), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+		output = process.communicate()[0]
+		if process.returncode != 0 or hype_export_tools.parse_export_script_output(output) != True:
+			raise RuntimeError("--modify_staging_path failed:\n%s" % output[-2000:])
+		package_path = os.path.join(work_root, "package")
+		zipfile.ZipFile(destination_path).extractall(package_path)
+
+		with open(os.path.join(package_path, "book.json"), 'rb') as book_file:
+			page_names = json.loads(book_file.read())["contents"]
+		pages = []
+		for page_name in page_names:
+			with open(os.path.join(package_path, page_name), 'rb') as page_file:
+				html = page_file.read().decode("utf-8")
+			generated_script_path = page_generated_script_path(html)
+			with open(os.path.join(package_path, generated_script_path), 'rb') as generated_script_file:
+				generated_script = generated_script_file.read().decode("utf-8")
+			scripts = [match.group(1) for match in re.finditer(r'<script>(.*?)</script>', html, re.DOTALL)]
+			pages.append({"name" : page_name, "build" : hype_export_shared.generated_script_regex.search(generated_script).group(1), "scripts" : scripts, "generated_script" : generated_script})
+		results = run_pages(node_path, pages)
+		sizes = hype_export_shared.staged_file_sizes(package_path)
+	finally:
+		shutil.rmtree(work_root, ignore_errors=True)
+	scene_names = [scene["name"] for scene in hype_export_shared.generated_script_scenes_from_contents(document_contents)]
+
+	failures = []
+	def check(description, condition):
+		print "%s: %s" % ("ok" if condition else "FAILED", description)
+		if condition == False:
+			failures.append(description)
+
+	check("book.json lists a page per scene", len(page_names) == len(scene_names) == args.scene_count)
+	document_preloaded = [name for name, preloaded in resources if preloaded]
+	unnamed = set(name for name, preloaded in resources) - set.union(*scene_resource_names)
+	for index, (page, result) in enumerate(zip(pages, results)):
+		check("%s shows %s first, without showing the initial scene" % (page["name"], scene_names[index]), result["loaded"]["shown"] == [scene_names[index]] and result["loaded"]["location"] == page["name"])
+		check("%s goes to the page of every other scene" % page["name"], result["moves"] == dict(zip(scene_names, page_names)))
+		expected = [name for name in document_preloaded if name in scene_resource_names[index] or name in unnamed]
+		check("%s preloads %d of the document's %d preloaded resources (%d of %d KB)" % (page["name"], len(result["preloaded"]), len(document_preloaded), sum(sizes.get(name, 0) for name in result["preloaded"]) / 1024, sum(sizes.get(name, 0) for name in document_preloaded) / 1024), sorted(result["preloaded"]) == sorted(expected))
+		check("%s's generated script differs from the document's only in preload flags" % page["name"], re.sub(r'\bp:\d', u"p:", page["generated_script"]) == re.sub(r'\bp:\d', u"p:", document_contents))
+
+	print "%d checks failed" % len(failures)
+	sys.exit(1 if len(failures) > 0 else 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,142 @@
+#!/usr/bin/python
+
+# 	check_update_checks.py
+#		Checks the shared --check_for_updates code (UPDATES in hype_export_shared.py) against a local
+#		http server standing in for static.tumult.com: the first check fetches the version file,
+#		later checks within a day are answered from the cache without a request, expired checks send
+#		a conditional GET, a changed version is picked up, concurrent checks share one fetch, and an
+#		offline or hanging server falls back to the cached answer within the timeout.
+#
+#		Usage:
+#			check_update_checks.py
+#		exits with 1 if any check gives the wrong result
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import BaseHTTPServer
+import SocketServer
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import hype_export_tools
+import hype_export_shared
+
+download_url = "https://tumult.com/hype/export-scripts/Sample/"
+
+class VersionServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+	daemon_threads = True
+
+	def __init__(self):
+		BaseHTTPServer.HTTPServer.__init__(self, ("127.0.0.1", 0), VersionRequestHandler)
+		# { path : latest version }
+		self.versions = {}
+		self.requests = []
+		self.hang = False
+
+	def url(self, path):
+		return "http://127.0.0.1:%d%s" % (self.server_address[1], path)
+
+class VersionRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+	def do_GET(self):
+		server = self.server
+		server.requests.append((self.path, self.headers.getheader("If-None-Match")))
+		if server.hang:
+			time.sleep(hype_export_shared.update_check_timeout_in_seconds * 3)
+			return
+		if self.path not in server.versions:
+			self.send_response(404)
+			self.end_headers()
+			return
+		body = "%d\n" % server.versions[self.path]
+		etag = '"%d"' % server.versions[self.path]
+		if self.headers.getheader("If-None-Match") == etag:
+			self.send_response(304)
+			self.end_headers()
+			return
+		self.send_response(200)
+		self.send_header("ETag", etag)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+def main():
+	cache_folder = tempfile.mkdtemp(prefix="hype-update-checks-")
+	hype_export_shared.cache_folder = cache_folder
+	hype_export_shared.update_check_timeout_in_seconds = 1
+	server = VersionServer()
+	server_thread = threading.Thread(target=server.serve_forever)
+	server_thread.daemon = True
+	server_thread.start()
+
+	failures = []
+	def check(description, condition):
+		print "%s: %s" % ("ok" if condition else "FAILED", description)
+		if condition == False:
+			failures.append(description)
+
+	def check_for_updates(path, current_version, maximum_age):
+		return hype_export_shared.check_for_updates(server.url(path), current_version, download_url, maximum_age)
+
+	day = 60 * 60 * 24
+	try:
+		server.versions = {"/Sample/latest_script_version.txt" : 4, "/Other/latest_script_version.txt" : 2}
+
+		result = check_for_updates("/Sample/latest_script_version.txt", 3, day)
+		check("first check fetches the version and reports the update", result == {"url" : download_url, "from_version" : "3", "to_version" : "4"} and len(server.requests) == 1)
+
+		result = check_for_updates("/Sample/latest_script_version.txt", 3, day)
+		check("a second check within a day is answered without a request", result != None and result["to_version"] == "4" and len(server.requests) == 1)
+
+		check("no update when the script is current", check_for_updates("/Sample/latest_script_version.txt", 4, day) == None)
+
+		check_for_updates("/Other/latest_script_version.txt", 1, day)
+		check("each script's version file is cached on its own", len(server.requests) == 2 and server.requests[-1][0] == "/Other/latest_script_version.txt")
+
+		result = check_for_updates("/Sample/latest_script_version.txt", 3, 0)
+		check("an expired check sends a conditional GET and keeps the answer on 304", server.requests[-1] == ("/Sample/latest_script_version.txt", '"4"') and result != None and result["to_version"] == "4")
+
+		server.versions["/Sample/latest_script_version.txt"] = 5
+		result = check_for_updates("/Sample/latest_script_version.txt", 3, 0)
+		check("a changed version is picked up", result != None and result["to_version"] == "5")
+
+		# the entry is a second old once the checks start, and the first of them refreshes it
+		time.sleep(1.1)
+		request_count = len(server.requests)
+		results = []
+		threads = [threading.Thread(target=lambda: results.append(check_for_updates("/Sample/latest_script_version.txt", 3, 1))) for index in range(8)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		check("concurrent checks share one fetch", len(server.requests) - request_count == 1 and all(result != None and result["to_version"] == "5" for result in results))
+
+		server.hang = True
+		start_time = time.time()
+		result = check_for_updates("/Sample/latest_script_version.txt", 3, 0)
+		duration = time.time() - start_time
+		check("a hanging server falls back to the cached answer in %.2fs" % duration, duration < hype_export_shared.update_check_timeout_in_seconds + 0.5 and result != None and result["to_version"] == "5")
+		server.hang = False
+
+		server.shutdown()
+		server.server_close()
+		result = check_for_updates("/Sample/latest_script_version.txt", 3, 0)
+		check("an offline check falls back to the cached answer", result != None and result["to_version"] == "5")
+
+		check("an unknown script with no cached answer reports no update", check_for_updates("/Missing/latest_script_version.txt", 1, 0) == None)
+	finally:
+		shutil.rmtree(cache_folder, ignore_errors=True)
+
+	print "%d checks failed" % len(failures)
+	sys.exit(1 if len(failures) > 0 else 0)
+
+
+if __name__ == "__main__":
+	main()
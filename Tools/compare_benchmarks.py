@@ -0,0 +1,143 @@
+#!/usr/bin/python
+
+# 	compare_benchmarks.py
+#		Compares two benchmark.py result files and fails on performance regressions, for use as a
+#		gate when changing shared code such as zip() or perform_html_additions().
+#
+#		Wall time, peak memory and package size are compared per script using the medians of the
+#		repeated runs. A metric regresses only when the median grows by more than its tolerance AND
+#		by more than a few median absolute deviations (MAD) of run-to-run noise, so a single slow
+#		run doesn't fail the gate.
+#
+#		Usage:
+#			compare_benchmarks.py baseline.json current.json [--tolerance time=0.15] [--noise_factor 3]
+#		exits with 1 if any metric regressed
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import json
+import sys
+
+import hype_export_tools
+
+# (metric name, phase, samples key, kind)
+compared_metrics = [
+	("get_options time", "get_options", "seconds", "time"),
+	("replace_url time", "replace_url", "seconds", "time"),
+	("modify time", "modify_staging_path", "seconds", "time"),
+	("modify memory", "modify_staging_path", "max_rss_kb", "memory"),
+	("package size", "modify_staging_path", "package_bytes", "size"),
+]
+
+# allowed relative growth of the median, by kind
+default_tolerances = {"time" : 0.10, "memory" : 0.10, "size" : 0.01}
+
+# growth below these is never a regression (timer resolution, allocator noise), by kind
+minimum_differences = {"time" : 0.002, "memory" : 512, "size" : 0}
+
+# MAD of normally distributed noise is about 0.67 standard deviations
+mad_to_standard_deviation = 1.4826
+
+unit_formats = {"time" : lambda value: "%.1fms" % (value * 1000), "memory" : lambda value: "%.1fMB" % (value / 1024.0), "size" : lambda value: "%.1fKB" % (value / 1024.0)}
+
+
+def read_results(results_path):
+	with open(results_path, 'r') as results_file:
+		return json.loads(results_file.read())
+
+# returns (status, change) where status is "ok", "improved", "noise", "regression" or "missing"
+def compare_samples(baseline_samples, current_samples, kind, tolerance, noise_factor):
+	if len(baseline_samples) == 0:
+		return ("ok", None)
+	if len(current_samples) == 0:
+		return ("missing", None)
+
+	baseline_median = hype_export_tools.median(baseline_samples)
+	current_median = hype_export_tools.median(current_samples)
+	difference = current_median - baseline_median
+	change = (difference / float(baseline_median)) if baseline_median != 0 else 0.0
+
+	noise = noise_factor * mad_to_standard_deviation * max(hype_export_tools.median_absolute_deviation(baseline_samples), hype_export_tools.median_absolute_deviation(current_samples))
+	if abs(difference) <= max(noise, minimum_differences[kind]):
+		return ("ok" if abs(change) <= tolerance else "noise", change)
+	if change > tolerance:
+		return ("regression", change)
+	if change < -tolerance:
+		return ("improved", change)
+	return ("ok", change)
+
+def compare_results(baseline, current, tolerances, noise_factor):
+	rows = []
+	for script_name in sorted(baseline.get("scripts", {})):
+		baseline_script = baseline["scripts"][script_name]
+		current_script = current.get("scripts", {}).get(script_name)
+		if "error" in baseline_script:
+			continue
+		if current_script == None or "error" in current_script:
+			rows.append({"script" : script_name, "metric" : "benchmark", "status" : "missing", "detail" : (current_script or {}).get("error", "not in current results").split("\n")[0]})
+			continue
+
+		for metric_name, phase, samples_key, kind in compared_metrics:
+			baseline_samples = baseline_script.get(phase, {}).get(samples_key, [])
+			current_samples = current_script.get(phase, {}).get(samples_key, [])
+			status, change = compare_samples(baseline_samples, current_samples, kind, tolerances[kind], noise_factor)
+			row = {"script" : script_name, "metric" : metric_name, "status" : status, "change" : change, "kind" : kind}
+			if len(baseline_samples) > 0:
+				row["baseline"] = (hype_export_tools.median(baseline_samples), hype_export_tools.median_absolute_deviation(baseline_samples))
+			if len(current_samples) > 0:
+				row["current"] = (hype_export_tools.median(current_samples), hype_export_tools.median_absolute_deviation(current_samples))
+			rows.append(row)
+	return rows
+
+def print_rows(rows, show_all):
+	print "%-20s %-18s %22s %22s %9s  %s" % ("script", "metric", "baseline (median+-MAD)", "current (median+-MAD)", "change", "status")
+	for row in rows:
+		if show_all == False and row["status"] == "ok":
+			continue
+		if "kind" not in row:
+			print "%-20s %-18s %22s %22s %9s  %s (%s)" % (row["script"], row["metric"], "", "", "", row["status"].upper(), row["detail"])
+			continue
+		unit_format = unit_formats[row["kind"]]
+		def formatted(value):
+			return "%s+-%s" % (unit_format(value[0]), unit_format(value[1])) if value != None else "-"
+		change = "%+.1f%%" % (row["change"] * 100) if row["change"] != None else "-"
+		print "%-20s %-18s %22s %22s %9s  %s" % (row["script"], row["metric"], formatted(row.get("baseline")), formatted(row.get("current")), change, row["status"].upper() if row["status"] in ("regression", "missing") else row["status"])
+
+def main():
+	parser = argparse.ArgumentParser(description="Compare two benchmark.py result files and fail on regressions.")
+	parser.add_argument('baseline_path')
+	parser.add_argument('current_path')
+	parser.add_argument('--tolerance', action='append', default=[], help="allowed relative growth per kind, ex. time=0.15 (kinds: time, memory, size)")
+	parser.add_argument('--noise_factor', type=float, default=3.0, help="differences within this many (scaled) MADs are treated as noise")
+	parser.add_argument('--all', action='store_true', help="also list metrics that are within tolerance")
+	args = parser.parse_args()
+
+	tolerances = dict(default_tolerances)
+	for tolerance in args.tolerance:
+		kind, value = tolerance.split("=", 1)
+		if kind not in tolerances:
+			parser.error("unknown kind '%s' in --tolerance" % kind)
+		tolerances[kind] = float(value)
+
+	baseline = read_results(args.baseline_path)
+	current = read_results(args.current_path)
+	for key in ["platform", "python"]:
+		if baseline.get("environment", {}).get(key) != current.get("environment", {}).get(key):
+			print "note: %s differs (%s vs %s)" % (key, baseline.get("environment", {}).get(key), current.get("environment", {}).get(key))
+	if baseline.get("fixture") != current.get("fixture"):
+		print "note: the benchmarks used different fixture options, so package sizes and times may not be comparable"
+
+	rows = compare_results(baseline, current, tolerances, args.noise_factor)
+	print_rows(rows, args.all)
+
+	regressions = [row for row in rows if row["status"] in ("regression", "missing")]
+	print
+	print "%d regression%s in %d compared metrics" % (len(regressions), "" if len(regressions) == 1 else "s", len(rows))
+	sys.exit(1 if len(regressions) > 0 else 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python
+
+# 	estimate_load_time.py
+#		Estimates how long exported ad packages take to show their first frame and to finish loading
+#		over slow connections, without a browser (see LOAD ESTIMATES in hype_export_shared.py): the
+#		requests the html and generated script make are simulated over each bandwidth/rtt profile.
+#		Ad network sdks aren't in the package, so their sizes are assumed and marked with *.
+#
+#		Usage:
+#			estimate_load_time.py export.zip [more packages or folders] [--profile slow-4g --profile "rtt_ms=300,kbps=1000"] [--waterfall] [--target_ms 3000] [--output estimates.json]
+#		exits with 1 if a package's first frame is estimated later than --target_ms
+#
+#		Exports can also be estimated as they are written: set HYPE_EXPORT_LOAD_PROFILE to a profile
+#		(and HYPE_EXPORT_LOAD_TARGET_MS to fail exports that miss it) in the environment Hype runs in.
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import sys
+
+import hype_export_tools
+import hype_export_shared
+
+def print_waterfall(estimate):
+	for request in estimate["requests"]:
+		print "    %8.0fms %8.0fms %9d  %-12s %s%s" % (request["start_ms"], request["end_ms"], request["bytes"], request["kind"], request["url"], " *" if request["assumed"] else "")
+	for note in estimate["notes"]:
+		print "    note: %s" % note
+
+def main():
+	parser = argparse.ArgumentParser(description="Estimate the load time of exported ad packages over slow connections.")
+	parser.add_argument('packages', nargs='+', help="exported zip files or folders")
+	parser.add_argument('--profile', action='append', help="profile name or custom values like rtt_ms=300,kbps=1000 (repeatable, default all of %s)" % ", ".join(sorted(hype_export_shared.load_profiles)))
+	parser.add_argument('--html', help="html file of the ad in the package (default index.html or the shallowest html file)")
+	parser.add_argument('--waterfall', action='store_true', help="list every request with its start and end")
+	parser.add_argument('--target_ms', type=float, help="fail if a first frame is estimated later than this")
+	parser.add_argument('--output', help="write the estimates as json to this path")
+	args = parser.parse_args()
+
+	profile_names = args.profile or sorted(hype_export_shared.load_profiles, key=lambda name: -hype_export_shared.load_profiles[name]["rtt_ms"])
+	results = {}
+	failed = False
+	for package_path in args.packages:
+		results[package_path] = {}
+		print package_path
+		for profile_name in profile_names:
+			estimate = hype_export_shared.estimate_load_time(package_path, args.html, profile_name)
+			estimate["target_ms"] = args.target_ms
+			results[package_path][profile_name] = estimate
+			missed = (args.target_ms != None and estimate["first_frame_ms"] > args.target_ms)
+			print "  %-24s first frame %8.0fms  load event %8.0fms  total %8.0fms  %3d requests %8d bytes%s" % (profile_name, estimate["first_frame_ms"], estimate["load_event_ms"] or 0, estimate["total_ms"], estimate["request_count"], estimate["transfer_bytes"], "  OVER TARGET" if missed else "")
+			if args.waterfall:
+				print_waterfall(estimate)
+			failed = failed or missed
+		if len(results[package_path]) > 0:
+			estimate = results[package_path].values()[0]
+			print "  polite delay %dms, waits for sdk: %s, assumed sizes (*): %s" % (estimate["polite_delay_ms"], "yes" if estimate["waits_for_sdk"] else "no", ", ".join(estimate["assumed"]) or "none")
+
+	if args.output != None:
+		hype_export_tools.write_json(args.output, results)
+	sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+	main()
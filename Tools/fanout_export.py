@@ -0,0 +1,194 @@
+#!/usr/bin/python
+
+# 	fanout_export.py
+#		Produces the packages for several ad networks from one staged Hype export in a single run,
+#		instead of exporting the same document from Hype once per network.
+#
+#		The staging folder is indexed (hashed) once, and each unchanged file is deflated once;
+#		those compressed members are written straight into every network's package. Each network
+#		still runs its own --modify_staging_path code on a private working copy, so the html
+#		insertions, manifests and extra files are exactly what that script produces. Text files
+#		the scripts may rewrite are copied into the working copy; everything else is hardlinked.
+#
+#		Usage:
+#			fanout_export.py --staging_path ./staging --export_info_json_path ./export_info.json \
+#				--output_folder ./packages --script Sizmek --script "DoubleClick DCM" --script Adform \
+#				--script AppNexus --script TheTradeDesk [--compare_sequential]
+#
+#		Without --script, every script that produces a zip package is used.
+#		--compare_sequential also times a separate single-network export per script and
+#		reports the time saved.
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import hype_export_tools
+import hype_export_shared
+
+# files the Export Scripts may rewrite in place; these are copied rather than hardlinked
+rewritable_file_extensions = (".html", ".htm", ".js", ".json", ".css", ".txt", ".xml")
+
+
+class CompressedMemberCache:
+	def __init__(self):
+		self.digests_by_inode = {}
+		self.members_by_digest = {}
+		self.compressed_bytes = 0
+		self.reused_bytes = 0
+
+	def member(self, file_path):
+		# hardlinked staging files are recognised by inode and never re-read
+		file_stat = os.stat(file_path)
+		inode = (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime)
+		digest = self.digests_by_inode.get(inode)
+		if digest == None:
+			digest = hype_export_tools.hash_file(file_path)
+			self.digests_by_inode[inode] = digest
+
+		member = self.members_by_digest.get(digest)
+		if member == None:
+			member = hype_export_shared.compress_file(file_path)
+			self.members_by_digest[digest] = member
+			self.compressed_bytes += member[2]
+		else:
+			self.reused_bytes += member[2]
+		return member
+
+	def index_staging_folder(self, staging_path):
+		for dirname, subdirs, files in os.walk(staging_path):
+			for filename in files:
+				file_path = os.path.join(dirname, filename)
+				file_stat = os.stat(file_path)
+				inode = (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime)
+				self.digests_by_inode[inode] = hype_export_tools.hash_file(file_path)
+
+	# drop-in replacement for the scripts' zip(src, dst), using the shared compressed members; written
+	# atomically like the scripts' own packages
+	def zip(self, src, dst):
+		hype_export_shared.write_zip(src, dst, self.member)
+
+
+def make_working_copy(staging_path, working_path):
+	for dirname, subdirs, files in os.walk(staging_path):
+		relative_dirname = os.path.relpath(dirname, staging_path)
+		target_dirname = os.path.normpath(os.path.join(working_path, relative_dirname))
+		if os.path.exists(target_dirname) == False:
+			os.makedirs(target_dirname)
+		for filename in files:
+			source_path = os.path.join(dirname, filename)
+			target_path = os.path.join(target_dirname, filename)
+			if filename.lower().endswith(rewritable_file_extensions):
+				shutil.copy2(source_path, target_path)
+				continue
+			try:
+				os.link(source_path, target_path)
+			except OSError:
+				shutil.copy2(source_path, target_path)
+
+def package_extension(script_path):
+	module = hype_export_tools.load_export_script(script_path)
+	exit_code, result, output = hype_export_tools.run_export_script_main(module, ["--get_options"])
+	if result == None:
+		return None
+	return result.get("save_options", {}).get("file_extension")
+
+def fanout(script_paths, staging_path, export_info_json_path, output_folder, work_root):
+	cache = CompressedMemberCache()
+	cache.index_staging_folder(staging_path)
+
+	packages = []
+	for script_path in script_paths:
+		name = hype_export_tools.export_script_name(script_path)
+		extension = package_extension(script_path)
+		destination_path = os.path.join(output_folder, name + "." + extension)
+		working_path = os.path.join(work_root, name)
+		make_working_copy(staging_path, working_path)
+
+		start_time = time.time()
+		module = hype_export_tools.load_export_script(script_path)
+		module.zip = cache.zip
+		arguments = hype_export_tools.modify_staging_path_arguments(working_path, destination_path, export_info_json_path, export_uid="fanout")
+		exit_code, result, output = hype_export_tools.run_export_script_main(module, arguments)
+		if exit_code != 0 or result != True:
+			raise RuntimeError("%s failed:\n%s" % (name, output))
+		packages.append({"script" : name, "package" : destination_path, "bytes" : os.path.getsize(destination_path), "duration" : time.time() - start_time})
+		shutil.rmtree(working_path, ignore_errors=True)
+
+	return (packages, cache)
+
+# the baseline: one full export per network, as Hype would run them
+def sequential_exports(script_paths, staging_path, export_info_json_path, work_root):
+	durations = {}
+	for script_path in script_paths:
+		name = hype_export_tools.export_script_name(script_path)
+		working_path = os.path.join(work_root, "sequential-" + name)
+		shutil.copytree(staging_path, working_path)
+		destination_path = os.path.join(work_root, "sequential-" + name + ".package")
+
+		start_time = time.time()
+		arguments = [sys.executable, script_path] + hype_export_tools.modify_staging_path_arguments(working_path, destination_path, export_info_json_path, export_uid="sequential")
+		with open(os.devnull, 'w') as devnull:
+			subprocess.check_call(arguments, stdout=devnull)
+		durations[name] = time.time() - start_time
+
+		shutil.rmtree(working_path, ignore_errors=True)
+		if os.path.exists(destination_path):
+			os.remove(destination_path)
+	return durations
+
+def main():
+	parser = argparse.ArgumentParser(description="Export one staged Hype document for several networks at once.")
+	parser.add_argument('--staging_path', required=True)
+	parser.add_argument('--export_info_json_path', required=True)
+	parser.add_argument('--output_folder', required=True)
+	parser.add_argument('--script', action='append', help="export script name or path (repeatable)")
+	parser.add_argument('--compare_sequential', action='store_true')
+	parser.add_argument('--report_path', help="write timings as json to this path")
+	args = parser.parse_args()
+
+	if args.script:
+		script_paths = [hype_export_tools.find_export_script(script) for script in args.script]
+	else:
+		script_paths = [script_path for script_path in hype_export_tools.export_script_paths() if package_extension(script_path) == "zip"]
+
+	output_folder = os.path.abspath(args.output_folder)
+	if os.path.exists(output_folder) == False:
+		os.makedirs(output_folder)
+
+	work_root = tempfile.mkdtemp(prefix="hype-fanout-")
+	try:
+		start_time = time.time()
+		packages, cache = fanout(script_paths, os.path.abspath(args.staging_path), os.path.abspath(args.export_info_json_path), output_folder, work_root)
+		fanout_duration = time.time() - start_time
+
+		for package in packages:
+			print "%-20s %10d bytes  %.3fs" % (package["script"], package["bytes"], package["duration"])
+		print "fan-out: %d packages in %.3fs, deflated %d bytes and reused %d bytes of compressed members" % (len(packages), fanout_duration, cache.compressed_bytes, cache.reused_bytes)
+
+		report = {"fanout_duration" : fanout_duration, "packages" : packages, "compressed_bytes" : cache.compressed_bytes, "reused_bytes" : cache.reused_bytes}
+
+		if args.compare_sequential:
+			durations = sequential_exports(script_paths, os.path.abspath(args.staging_path), os.path.abspath(args.export_info_json_path), work_root)
+			sequential_duration = sum(durations.values())
+			print "sequential: %.3fs, fan-out saved %.3fs (%.0f%%)" % (sequential_duration, sequential_duration - fanout_duration, 100.0 * (sequential_duration - fanout_duration) / sequential_duration if sequential_duration > 0 else 0)
+			report["sequential_durations"] = durations
+			report["sequential_duration"] = sequential_duration
+			report["saved_duration"] = sequential_duration - fanout_duration
+
+		if args.report_path != None:
+			hype_export_tools.write_json(args.report_path, report)
+	finally:
+		shutil.rmtree(work_root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,164 @@
+#!/usr/bin/python
+
+# 	hype_export_tools.py
+#		Helpers used by the command-line tools in this folder to load the Export Scripts
+#		and run them outside of Hype (batch exports, benchmarks, campaign packaging, etc.)
+#
+#		The tools run on the same Python 2.7 interpreter Hype uses for Export Scripts.
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import codecs
+import glob
+import hashlib
+import imp
+import json
+import os
+import sys
+
+result_delimiter = "===================="
+
+tools_folder = os.path.dirname(os.path.abspath(__file__))
+repository_folder = os.path.dirname(tools_folder)
+
+# the tools use the same shared helpers as the scripts
+sys.path.append(os.path.join(repository_folder, "Shared"))
+
+
+# EXPORT SCRIPT DISCOVERY
+
+# all *.hype-export.py scripts in the repository, sorted by name
+def export_script_paths():
+	return sorted(glob.glob(os.path.join(repository_folder, "*", "*.hype-export.py")))
+
+# short name of a script, ex. "DoubleClick DCM" for ".../DoubleClick DCM.hype-export.py"
+def export_script_name(script_path):
+	return os.path.basename(script_path)[:-len(".hype-export.py")]
+
+# accepts a path, a script name ("DoubleClick DCM") or its folder name ("DoubleClickDCM")
+def find_export_script(name_or_path):
+	if os.path.isfile(name_or_path):
+		return os.path.abspath(name_or_path)
+	for script_path in export_script_paths():
+		folder_name = os.path.basename(os.path.dirname(script_path))
+		if name_or_path.lower() in (export_script_name(script_path).lower(), folder_name.lower()):
+			return script_path
+	raise ValueError("No export script named '%s'" % name_or_path)
+
+
+# RUNNING EXPORT SCRIPTS IN-PROCESS
+
+# scripts keep their html insertions in module globals and modify them while exporting,
+# so every run needs a freshly loaded module
+_load_count = [0]
+def load_export_script(script_path):
+	_load_count[0] += 1
+	module_name = "hype_export_script_%d" % _load_count[0]
+	return imp.load_source(module_name, script_path)
+
+# calls the script's real main() with the given arguments, returning (exit_code, result, output)
+# result is the parsed json after the delimiter, or None if the script didn't return anything
+def run_export_script_main(module, arguments):
+	import StringIO
+
+	saved_argv = sys.argv
+	saved_stdout = sys.stdout
+	sys.argv = [module.__file__] + list(arguments)
+	sys.stdout = StringIO.StringIO()
+	exit_code = 0
+	try:
+		try:
+			module.main()
+		except SystemExit as e:
+			exit_code = e.code if isinstance(e.code, int) else (0 if e.code == None else 1)
+		output = sys.stdout.getvalue()
+	finally:
+		sys.argv = saved_argv
+		sys.stdout = saved_stdout
+
+	return (exit_code, parse_export_script_output(output), output)
+
+# Hype only reads the json that follows the last delimiter
+def parse_export_script_output(output):
+	if result_delimiter not in output:
+		return None
+	try:
+		return json.loads(output.rsplit(result_delimiter, 1)[1])["result"]
+	except (ValueError, KeyError):
+		return None
+
+def modify_staging_path_arguments(staging_path, destination_path, export_info_json_path, is_preview=False, export_uid=None):
+	arguments = ["--modify_staging_path", staging_path, "--destination_path", destination_path, "--export_info_json_path", export_info_json_path, "--is_preview", str(bool(is_preview))]
+	if export_uid != None:
+		arguments = arguments + ["--export_uid", export_uid]
+	return arguments
+
+
+# STAGING FOLDERS
+
+def read_export_info(export_info_json_path):
+	with codecs.open(export_info_json_path, 'r', encoding='utf-8') as export_info_file:
+		return json.loads(export_info_file.read())
+
+def hash_file(file_path):
+	digest = hashlib.sha1()
+	with open(file_path, 'rb') as target_file:
+		while True:
+			chunk = target_file.read(1024 * 1024)
+			if not chunk:
+				break
+			digest.update(chunk)
+	return digest.hexdigest()
+
+# { archive name : (sha1, size) } for every file in the folder, using the same archive names as zip()
+def staging_index(folder_path):
+	index = {}
+	abs_folder_path = os.path.abspath(folder_path)
+	for dirname, subdirs, files in os.walk(folder_path):
+		for filename in files:
+			absname = os.path.abspath(os.path.join(dirname, filename))
+			arcname = absname[len(abs_folder_path) + 1:]
+			index[arcname] = (hash_file(absname), os.path.getsize(absname))
+	return index
+
+def write_json(path, value):
+	with open(path, 'w') as target_file:
+		target_file.write(json.dumps(value, indent=4, sort_keys=True))
+
+
+# STATISTICS
+
+# value at fraction (0...1) of the samples, interpolating between neighbours
+def percentile(samples, fraction):
+	ordered = sorted(samples)
+	if len(ordered) == 0:
+		return None
+	position = fraction * (len(ordered) - 1)
+	lower = int(position)
+	upper = min(lower + 1, len(ordered) - 1)
+	return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def median(samples):
+	return percentile(samples, 0.5)
+
+# median absolute deviation; a spread measure that a single slow outlier doesn't inflate
+def median_absolute_deviation(samples):
+	if len(samples) == 0:
+		return None
+	center = median(samples)
+	return median([abs(sample - center) for sample in samples])
+
+def distribution(samples):
+	if len(samples) == 0:
+		return {"count" : 0}
+	return {
+		"count" : len(samples),
+		"min" : min(samples),
+		"p50" : percentile(samples, 0.5),
+		"p90" : percentile(samples, 0.9),
+		"p99" : percentile(samples, 0.99),
+		"max" : max(samples),
+		"mad" : median_absolute_deviation(samples),
+	}
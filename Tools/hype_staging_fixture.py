@@ -0,0 +1,341 @@
+#!/usr/bin/python
+
+# 	hype_staging_fixture.py
+#		Generates synthetic Hype staging folders and export_info.json files, so the Export Scripts
+#		can be run (and benchmarked) without a Mac running Hype.
+#
+#		The staging folder is laid out the way Hype lays it out for a given script: resource urls
+#		come from the script's own --replace_url answers, and its export_options decide whether
+#		the Hype runtime and document loader are inlined into the html file. The document has
+#		N scenes in its *_hype_generated_script.js, the HYPE-*.js runtime, and images, fonts,
+#		videos and audio of configurable sizes (with incompressible contents, like real media).
+#
+#		Usage:
+#			hype_staging_fixture.py ./fixture --script Sizmek --scene_count 8 --image_count 20 --video_kb 4096
+#		writes ./fixture/staging and ./fixture/export_info.json
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+
+import hype_export_tools
+
+class HypeURLType:
+	Unknown = 0
+	HypeJS = 1
+	Resource = 2
+	Link = 3
+	ResourcesFolder = 4
+
+default_fixture_options = {
+	"document_name" : "Benchmark",
+	"width" : 300,
+	"height" : 250,
+	"scene_count" : 4,
+	"elements_per_scene" : 20,
+	"runtime_kb" : 120,
+	"image_count" : 12,
+	"image_kb" : 40,
+	"font_count" : 2,
+	"font_kb" : 60,
+	"video_count" : 1,
+	"video_kb" : 2048,
+	"audio_count" : 1,
+	"audio_kb" : 512,
+	"scene_images" : 0,
+	"scene_media" : 0,
+	"video_posters" : 0,
+	"hype_build" : "741",
+	"seed" : 1,
+}
+
+# values given to each script's document arguments, by argument name
+document_argument_values = {
+	"clickTag" : "https://tumult.com/hype/",
+	"Single Page" : "false",
+	"URL" : "https://tumult.com/hype/",
+}
+
+
+# RESOURCES
+
+# [{"name", "url_type", "kind", "bytes"}] for every file in the document, in the order Hype asks about them
+def document_resources(options):
+	resources = []
+	def add(name, url_type, kind, kilobytes):
+		resources.append({"name" : name, "url_type" : url_type, "kind" : kind, "bytes" : int(kilobytes * 1024)})
+
+	add("HYPE-%s.full.min.js" % options["hype_build"], HypeURLType.HypeJS, "runtime", options["runtime_kb"])
+	add("HYPE-%s.thin.min.js" % options["hype_build"], HypeURLType.HypeJS, "runtime", options["runtime_kb"] * 0.7)
+	add(options["document_name"].lower() + "_hype_generated_script.js", HypeURLType.HypeJS, "loader", 0)
+	for index in range(options["image_count"]):
+		add("image-%02d.%s" % (index + 1, ["png", "jpg"][index % 2]), HypeURLType.Resource, "image", options["image_kb"])
+	for index in range(options["font_count"]):
+		add("font-%d.woff" % (index + 1), HypeURLType.Resource, "font", options["font_kb"])
+	for index in range(options["video_count"]):
+		add("video-%d.mp4" % (index + 1), HypeURLType.Resource, "video", options["video_kb"])
+		if options["video_posters"]:
+			add("video-%d.jpg" % (index + 1), HypeURLType.Resource, "poster", options["image_kb"])
+	for index in range(options["audio_count"]):
+		add("audio-%d.mp3" % (index + 1), HypeURLType.Resource, "audio", options["audio_kb"])
+	return resources
+
+def resources_folder_name(options):
+	return options["document_name"] + ".hyperesources"
+
+# deterministic incompressible bytes; much faster than the random module for megabytes of media
+def noise_bytes(byte_count, seed):
+	chunks = []
+	block = hashlib.sha512(str(seed)).digest()
+	for index in range(byte_count // len(block) + 1):
+		block = hashlib.sha512(block).digest()
+		chunks.append(block)
+	return "".join(chunks)[:byte_count]
+
+file_headers = {
+	".png" : "\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR",
+	".jpg" : "\xff\xd8\xff\xe0\x00\x10JFIF\x00",
+	".woff" : "wOFF\x00\x01\x00\x00",
+	".mp4" : "\x00\x00\x00\x18ftypmp42",
+	".mp3" : "ID3\x03\x00\x00\x00\x00\x00\x00",
+}
+
+def media_contents(resource, seed):
+	header = file_headers.get(os.path.splitext(resource["name"])[1], "")
+	return header + noise_bytes(max(0, resource["bytes"] - len(header)), "%s-%s" % (seed, resource["name"]))
+
+# minified-looking javascript that compresses about as well as the real runtime, including the
+# console usage some networks strip
+def runtime_contents(byte_count, seed):
+	generator = random.Random(seed)
+	identifiers = ["a", "b", "c", "d", "e", "f", "g", "h", "k", "l", "m", "n", "p", "q", "r", "t", "u", "v", "w", "x", "y", "z"]
+	words = ["length", "style", "parentNode", "appendChild", "setAttribute", "getElementById", "offsetWidth", "transform", "opacity", "duration", "timeline", "scene", "requestAnimationFrame", "addEventListener", "HYPE_eventListeners", "documentId", "resources"]
+	statements = []
+	size = 0
+	while size < byte_count:
+		variable = generator.choice(identifiers)
+		roll = generator.random()
+		if roll < 0.02:
+			statement = 'window.console&&window.console.log("HYPE: %s "+%s)' % (generator.choice(words), variable)
+		elif roll < 0.3:
+			statement = "function %s%d(%s,%s){return %s.%s+%d}" % (generator.choice(identifiers), generator.randint(0, 999), variable, generator.choice(identifiers), variable, generator.choice(words), generator.randint(0, 99999))
+		elif roll < 0.6:
+			statement = "%s.%s=%s[%d]||%s" % (variable, generator.choice(words), generator.choice(identifiers), generator.randint(0, 9999), generator.choice(identifiers))
+		else:
+			statement = 'if(%s.%s!=null)%s.%s("%s",%d)' % (variable, generator.choice(words), generator.choice(identifiers), generator.choice(words), generator.choice(words), generator.randint(0, 999999))
+		statements.append(statement)
+		size += len(statement) + 1
+	return ";".join(statements)[:byte_count] + ";"
+
+# a *_hype_generated_script.js in the format Hype writes, with one entry per scene and resource
+def generated_script_contents(options, resources, resources_folder_url):
+	generator = random.Random(options["seed"])
+	resource_entries = []
+	for index, resource in enumerate(resource for resource in resources if resource["kind"] not in ("runtime", "loader")):
+		resource_entries.append('"%d":{p:1,n:"%s",g:"%d",t:"%s"}' % (index, resource["name"], 100 + index, {"image" : "@1x", "poster" : "@1x", "font" : "font/woff", "video" : "video/mp4", "audio" : "audio/mpeg"}[resource["kind"]]))
+
+	scenes = []
+	layouts = []
+	element_id = 200
+	for scene_index in range(options["scene_count"]):
+		elements = []
+		for element_index in range(options["elements_per_scene"]):
+			element_id += 1
+			elements.append('"%d":{b:%d,z:%d,K:"None",c:%d,d:%d,k:"div",a:%d,j:"absolute",x:"visible",tX:0.5,tY:0.5,O:%f}' % (element_id, generator.randint(0, options["height"]), element_index + 1, generator.randint(10, options["width"]), generator.randint(10, options["height"]), generator.randint(0, options["width"]), generator.random()))
+		if options["scene_images"]:
+			# with scene_images, image N is shown by an element of scene N modulo the scene count
+			for image_index, image_name in enumerate(resource["name"] for resource in resources if resource["kind"] == "image"):
+				if image_index % options["scene_count"] == scene_index:
+					element_id += 1
+					elements.append('"%d":{z:%d,k:"div",j:"absolute",cL:"%s",c:100,d:100,a:0,b:0}' % (element_id, len(elements) + 1, image_name))
+		if options["scene_media"]:
+			# with scene_media, video or audio N is a tag in the inner html of an element of scene N modulo the scene count
+			for media_index, media in enumerate(resource for resource in resources if resource["kind"] in ("video", "audio")):
+				if media_index % options["scene_count"] == scene_index:
+					element_id += 1
+					elements.append('"%d":{z:%d,k:"div",j:"absolute",w:"<%s src=\\"${resourcesFolderName}/%s\\" controls></%s>",c:300,d:150,a:0,b:0}' % (element_id, len(elements) + 1, media["kind"], media["name"], media["kind"]))
+		layout_id = 1000 + scene_index
+		layouts.append('"%d":{o:"%d",p:"600px",a:100,Y:%d,Z:%d,b:100,cA:false,c:"#FFF",L:[],bY:1,d:%d,U:{},T:{kTimelineDefaultIdentifier:{q:false,z:%d,i:"kTimelineDefaultIdentifier",n:"Main Timeline",a:[],f:30,b:[]}},bZ:180,O:[%s],n:"Untitled Layout","_":%d,v:{%s}}' % (layout_id, 2000 + scene_index, options["width"], options["height"], options["width"], generator.randint(1, 10), ",".join('"%d"' % (element_id - offset) for offset in range(options["elements_per_scene"])), scene_index, ",".join(elements)))
+		scenes.append('{n:"Scene %d",o:"%d",X:[%d]}' % (scene_index + 1, 2000 + scene_index, scene_index))
+
+	document_name = options["document_name"]
+	return '//\tHYPE.documents["%s"]\n\n(function(){(function m(){function k(a,b,c,d){var e=!1;null==window[a]&&(null==window[b]?(window[b]=[],window[b].push(m),a=document.getElementsByTagName("head")[0],b=document.createElement("script"),e=l=function(){var a=this.readyState;null!=a&&"loaded"!=a&&"complete"!=a||n(c,d)},-1==c.indexOf(".")?b.src=c:b.src=d,b.onload=e,b.onreadystatechange=e,a.appendChild(b)):window[b].push(m));return e}var c="%s_hype_container",d="%s";new window["HYPE_%s"](d,c,{%s},"%s",[],{},[%s],{%s},{},null,false,true,-1,true,true,false,true,true)})();})();\n' % (document_name, document_name.lower(), resources_folder_url, options["hype_build"], ",".join(resource_entries), resources_folder_url, ",".join(scenes), ",".join(layouts))
+
+def index_html_contents(options, head_scripts, body_scripts):
+	return """<!DOCTYPE html>
+<html>
+	<head>
+		<meta http-equiv="X-UA-Compatible" content="chrome=1,IE=edge" />
+		<meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
+		<title>%(title)s</title>
+		<style>
+			html {
+				height:100%%;
+			}
+			body {
+				margin:0;
+				height:100%%;
+			}
+		</style>
+		<!-- copy these lines to your document head: -->
+
+		<meta name="viewport" content="user-scalable=yes, width=%(width)d" />
+
+		<!-- end copy -->
+%(head_scripts)s
+	</head>
+	<body>
+		<!-- copy these lines to your document: -->
+
+		<div id="%(container_id)s" class="HYPE_document" style="margin:auto;position:relative;width:%(width)dpx;height:%(height)dpx;overflow:hidden;">
+%(body_scripts)s
+		</div>
+
+		<!-- end copy -->
+	</body>
+</html>
+""" % {"title" : options["document_name"], "width" : options["width"], "height" : options["height"], "container_id" : options["document_name"].lower() + "_hype_container", "head_scripts" : head_scripts, "body_scripts" : body_scripts}
+
+
+# STAGING FOLDERS
+
+def default_resolve_url(options):
+	def resolve_url(name, url_type):
+		if url_type == HypeURLType.ResourcesFolder:
+			return resources_folder_name(options)
+		return name
+	return resolve_url
+
+# Writes a staging folder and export_info.json the way Hype would for a script.
+#	resolve_url(name, url_type) returns the url the script gave for a resource (its --replace_url answer);
+#	export_options, document_arguments and extra_actions come from the script's --get_options result.
+# returns the export_info dictionary
+def write_staging_tree(staging_path, export_info_json_path, options, resolve_url=None, export_options=None, document_arguments=None, extra_actions=None):
+	options = dict(default_fixture_options, **(options or {}))
+	resolve_url = resolve_url or default_resolve_url(options)
+	export_options = export_options or {}
+	resources = document_resources(options)
+
+	if os.path.exists(staging_path):
+		shutil.rmtree(staging_path)
+	os.makedirs(staging_path)
+
+	resources_folder_url = resolve_url(resources_folder_name(options), HypeURLType.ResourcesFolder)
+	def resource_path(resource):
+		url = resolve_url(resource["name"], resource["url_type"])
+		if "://" in url or url.startswith("//"):
+			# referenced from a server, not part of the export
+			return None
+		return os.path.normpath(os.path.join(resources_folder_url, url))
+
+	def write_file(relative_path, contents):
+		file_path = os.path.join(staging_path, relative_path)
+		if os.path.exists(os.path.dirname(file_path)) == False:
+			os.makedirs(os.path.dirname(file_path))
+		with open(file_path, 'wb') as target_file:
+			target_file.write(contents)
+
+	runtime = [resource for resource in resources if resource["kind"] == "runtime"]
+	loader = [resource for resource in resources if resource["kind"] == "loader"][0]
+	loader_contents = generated_script_contents(options, resources, resources_folder_url)
+
+	head_scripts = ""
+	if export_options.get("exportShouldInlineHypeJS", False):
+		head_scripts += '\t\t<script type="text/javascript" charset="utf-8">%s</script>\n' % runtime_contents(runtime[0]["bytes"], options["seed"])
+	else:
+		for resource in runtime:
+			if resource_path(resource) != None:
+				write_file(resource_path(resource), runtime_contents(resource["bytes"], "%s-%s" % (options["seed"], resource["name"])))
+
+	if export_options.get("exportShouldInlineDocumentLoader", False):
+		body_scripts = '\t\t\t<script type="text/javascript" charset="utf-8">%s</script>' % loader_contents
+	else:
+		loader_url = resolve_url(loader["name"], loader["url_type"])
+		body_scripts = '\t\t\t<script type="text/javascript" charset="utf-8" src="%s?%d"></script>' % (os.path.normpath(os.path.join(resources_folder_url, loader_url)), options["seed"])
+		write_file(resource_path(loader), loader_contents)
+
+	html_filename = "index.html"
+	write_file(html_filename, index_html_contents(options, head_scripts, body_scripts))
+
+	for resource in resources:
+		if resource["kind"] in ("runtime", "loader") or resource_path(resource) == None:
+			continue
+		write_file(resource_path(resource), media_contents(resource, options["seed"]))
+
+	image_names = [resource["name"] for resource in resources if resource["kind"] == "image"]
+	export_info = {
+		"html_filename" : html_filename,
+		"main_container_width" : options["width"],
+		"main_container_height" : options["height"],
+		"document_arguments" : dict((key, document_argument_values.get(key, image_names[0] if key == "Cover Image" and len(image_names) > 0 else "Benchmark " + key)) for key in (document_arguments or [])),
+		"extra_actions" : [{"function" : action["function"], "arguments" : ['"%s"' % argument.get("label", "") if argument.get("type") == "String" else "0" for argument in action.get("arguments", [])]} for action in (extra_actions or [])],
+	}
+	with open(export_info_json_path, 'w') as export_info_file:
+		export_info_file.write(json.dumps(export_info, indent=4))
+	return export_info
+
+def folder_size(folder_path):
+	total = 0
+	for dirname, subdirs, files in os.walk(folder_path):
+		for filename in files:
+			total += os.path.getsize(os.path.join(dirname, filename))
+	return total
+
+
+# ASKING A SCRIPT
+
+# --get_options result of a script, run in-process
+def script_options(script_path):
+	module = hype_export_tools.load_export_script(script_path)
+	exit_code, result, output = hype_export_tools.run_export_script_main(module, ["--get_options"])
+	return result or {}
+
+# resolve_url for write_staging_tree asking the script's --replace_url in-process
+def script_resolve_url(script_path):
+	module = hype_export_tools.load_export_script(script_path)
+	answers = {}
+	def resolve_url(name, url_type):
+		if (name, url_type) not in answers:
+			arguments = ["--replace_url", name, "--url_type", str(url_type), "--is_reference", "False", "--is_preview", "False"]
+			exit_code, result, output = hype_export_tools.run_export_script_main(module, arguments)
+			# scripts that don't change a url leave it to Hype
+			answers[(name, url_type)] = result["url"] if result != None and result.get("url") != None else name
+		return answers[(name, url_type)]
+	return resolve_url
+
+def fixture_option_arguments(parser):
+	for key, value in sorted(default_fixture_options.items()):
+		parser.add_argument('--' + key, type=type(value), default=value)
+
+def main():
+	parser = argparse.ArgumentParser(description="Write a synthetic Hype staging folder and export_info.json.")
+	parser.add_argument('output_folder')
+	parser.add_argument('--script', help="lay the folder out as Hype would for this export script")
+	fixture_option_arguments(parser)
+	args = parser.parse_args()
+
+	options = dict((key, getattr(args, key)) for key in default_fixture_options)
+	staging_path = os.path.join(args.output_folder, "staging")
+	export_info_json_path = os.path.join(args.output_folder, "export_info.json")
+	if os.path.exists(args.output_folder) == False:
+		os.makedirs(args.output_folder)
+
+	if args.script != None:
+		script_path = hype_export_tools.find_export_script(args.script)
+		get_options_result = script_options(script_path)
+		write_staging_tree(staging_path, export_info_json_path, options, script_resolve_url(script_path), get_options_result.get("export_options"), get_options_result.get("document_arguments"), get_options_result.get("extra_actions"))
+	else:
+		write_staging_tree(staging_path, export_info_json_path, options)
+
+	print "wrote %s (%d bytes) and %s" % (staging_path, folder_size(staging_path), export_info_json_path)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,110 @@
+#!/usr/bin/python
+
+# 	merge_traces.py
+#		Stitches the per-process trace files the Export Scripts write (with HYPE_EXPORT_TRACE_FOLDER set)
+#		into one Chrome trace, so a whole export session can be opened in chrome://tracing or Perfetto.
+#
+#		Each script invocation writes <trace folder>/<export_uid>/<time>-<pid>.json; pass that
+#		export_uid folder (or any number of folders and files) to merge them. Times are shifted so the
+#		session starts at zero, and a summary of where the session's time went is printed.
+#
+#		Usage:
+#			HYPE_EXPORT_TRACE_FOLDER=~/hype-traces <export from Hype>
+#			merge_traces.py ~/hype-traces/<export_uid> --output session.trace.json
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import glob
+import json
+import os
+import sys
+
+
+def trace_file_paths(paths):
+	trace_file_paths = []
+	for path in paths:
+		if os.path.isdir(path):
+			trace_file_paths += sorted(glob.glob(os.path.join(path, "*.json")))
+		else:
+			trace_file_paths.append(path)
+	return trace_file_paths
+
+def read_trace_events(trace_file_path):
+	with open(trace_file_path, 'r') as trace_file:
+		contents = trace_file.read()
+	try:
+		trace = json.loads(contents)
+	except ValueError:
+		# the json array format allows the closing bracket to be missing
+		trace = json.loads(contents.rstrip().rstrip(",") + "]")
+	if isinstance(trace, dict):
+		return trace.get("traceEvents", [])
+	return trace
+
+def merge_trace_events(trace_file_paths):
+	events = []
+	for trace_file_path in trace_file_paths:
+		try:
+			events += read_trace_events(trace_file_path)
+		except (IOError, ValueError) as e:
+			print >> sys.stderr, "skipping %s: %s" % (trace_file_path, e)
+
+	timed_events = [event for event in events if "ts" in event]
+	if len(timed_events) > 0:
+		session_start = min(event["ts"] for event in timed_events)
+		for event in timed_events:
+			event["ts"] -= session_start
+
+	# metadata first, then in time order, so processes are listed in the order they were spawned
+	events.sort(key=lambda event: (event.get("ph") != "M", event.get("ts", 0), -event.get("dur", 0)))
+	return events
+
+def summarize(events):
+	processes = {}
+	for event in events:
+		if event.get("ph") == "M" and event.get("name") == "process_name":
+			processes.setdefault(event["pid"], {})["name"] = event["args"]["name"]
+		elif event.get("ph") == "X" and event.get("cat") == "invocation":
+			process = processes.setdefault(event["pid"], {})
+			process[event["name"]] = process.get(event["name"], 0) + event["dur"]
+			process["start"] = min(process.get("start", event["ts"]), event["ts"])
+			process["end"] = max(process.get("end", 0), event["ts"] + event["dur"])
+
+	summary = {"processes" : len(processes), "modes" : {}, "slices" : {}}
+	for process in processes.values():
+		# process names are "<script> --<mode> ..."
+		mode = process.get("name", "").split(" ")[1].lstrip("-") if " " in process.get("name", "") else "unknown"
+		summary["modes"][mode] = summary["modes"].get(mode, 0) + 1
+		for slice_name in ["startup", "import", "parse_args", "work", "exit"]:
+			summary["slices"][slice_name] = summary["slices"].get(slice_name, 0) + process.get(slice_name, 0) / 1000000.0
+	if len(processes) > 0:
+		summary["session_duration"] = (max(process.get("end", 0) for process in processes.values()) - min(process.get("start", 0) for process in processes.values())) / 1000000.0
+	return summary
+
+def main():
+	parser = argparse.ArgumentParser(description="Merge Export Script trace files into one Chrome trace.")
+	parser.add_argument('paths', nargs='+', help="export_uid trace folders or trace files")
+	parser.add_argument('--output', required=True, help="path of the merged trace")
+	args = parser.parse_args()
+
+	paths = trace_file_paths([os.path.expanduser(path) for path in args.paths])
+	if len(paths) == 0:
+		print >> sys.stderr, "no trace files found"
+		sys.exit(1)
+
+	events = merge_trace_events(paths)
+	with open(args.output, 'w') as output_file:
+		output_file.write(json.dumps({"traceEvents" : events, "displayTimeUnit" : "ms"}))
+
+	summary = summarize(events)
+	print "%d processes (%s)" % (summary["processes"], ", ".join("%d %s" % (count, mode) for mode, count in sorted(summary["modes"].items())))
+	if "session_duration" in summary:
+		print "session %.3fs; summed over processes: %s" % (summary["session_duration"], ", ".join("%s %.3fs" % (slice_name, summary["slices"][slice_name]) for slice_name in ["startup", "import", "parse_args", "work", "exit"]))
+	print "wrote %s" % args.output
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,325 @@
+#!/usr/bin/python
+
+# 	preview_server.py
+#		Serves a preview destination folder over http with stand-ins for the ad network sdks, so the
+#		load behavior of Sizmek, DoubleClick Studio, Adform and Adfox exports can be profiled offline.
+#
+#		Html and javascript files are served with the sdk urls (Enabler.js, EBLoader.js,
+#		Adform.DHTML.js, adfox_HTML5.js) pointed at local stand-ins. The stand-ins emulate what the
+#		injected templates wait on and call: Enabler's StudioEvent.INIT and VISIBLE, Sizmek's
+#		EB_INITIALIZED, Adform's dhtml.getVar() (from the page's query string), and they log exits,
+#		counters and timers to the console. By default each stand-in is padded to the size the load
+#		estimator assumes for its sdk and initializes after the sdk's round trips, so a throttled
+#		preview behaves like the real sdk would.
+#
+#		With --profile (see hype_export_shared.load_profiles) or --rtt_ms/--kbps, every response
+#		waits one round trip before its first byte and all responses share the bandwidth. Each
+#		request is logged with its start, first byte and end relative to the page's html request,
+#		along with the first scene and load times the page reports back.
+#
+#		Usage:
+#			preview_server.py /path/to/preview [--port 8000] [--profile slow-4g] [--sdk_init_ms 300 --sdk_visible_ms 500] [--log waterfall.jsonl]
+#		then open http://localhost:8000/ (query parameters like ?clickTAG=... are passed to the page)
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import BaseHTTPServer
+import json
+import mimetypes
+import os
+import re
+import SocketServer
+import sys
+import threading
+import time
+import urlparse
+
+import hype_export_tools
+import hype_export_shared
+
+stand_in_path = "/__hype_preview__/sdk/"
+timing_path = "/__hype_preview__/timing"
+
+# reports when the first scene is shown and when the page has loaded, relative to navigation start
+timing_beacon = """<script>(function(){function r(e){var x=new XMLHttpRequest();x.open("POST","%s",true);x.send(JSON.stringify({event:e,ms:window.performance?performance.now():null}))}if(("HYPE_eventListeners" in window)===false){window.HYPE_eventListeners=Array()}var s=false;window.HYPE_eventListeners.push({type:"HypeSceneLoad",callback:function(){if(s===false){s=true;r("first_scene")}return true}});window.addEventListener("load",function(){r("load")})})();</script>""" % timing_path
+
+
+# STAND-INS
+
+enabler_stand_in = """(function () {
+	var config = ${config};
+	var listeners = {};
+	var initialized = false;
+	var visible = false;
+	function log() { console.log.apply(console, ["[Enabler stand-in]"].concat(Array.prototype.slice.call(arguments))); }
+	function dispatch(type) { (listeners[type] || []).slice().forEach(function (callback) { callback({type : type}); }); }
+	function exit(id, url) { log("exit", id, url); if (url) { window.open(url, "_blank"); } }
+	var StudioEvent = {INIT : "init", VISIBLE : "visible", EXIT : "exit", INTERACTION : "interaction"};
+	window.Enabler = {
+		isInitialized : function () { return initialized; },
+		isVisible : function () { return visible; },
+		addEventListener : function (type, callback) { (listeners[type] = listeners[type] || []).push(callback); },
+		removeEventListener : function (type, callback) { listeners[type] = (listeners[type] || []).filter(function (other) { return other !== callback; }); },
+		getUrl : function (url) { return url; },
+		exit : exit,
+		exitOverride : exit,
+		counter : function (name, isCumulative) { log("counter", name); },
+		startTimer : function (name) { log("startTimer", name); },
+		stopTimer : function (name) { log("stopTimer", name); },
+		setRushSimulatedLocalEvents : function (rush) { log("setRushSimulatedLocalEvents", rush); }
+	};
+	window.studio = {events : {StudioEvent : StudioEvent}, Enabler : window.Enabler};
+	setTimeout(function () {
+		initialized = true;
+		log("INIT");
+		dispatch(StudioEvent.INIT);
+		setTimeout(function () {
+			visible = true;
+			log("VISIBLE");
+			dispatch(StudioEvent.VISIBLE);
+		}, config.visible_ms);
+	}, config.init_ms);
+})();
+"""
+
+sizmek_stand_in = """(function () {
+	var config = ${config};
+	var listeners = {};
+	var initialized = false;
+	function log() { console.log.apply(console, ["[EB stand-in]"].concat(Array.prototype.slice.call(arguments))); }
+	window.EBG = {EventName : {EB_INITIALIZED : "EBInitialized"}};
+	window.EB = {
+		isInitialized : function () { return initialized; },
+		addEventListener : function (type, callback) { (listeners[type] = listeners[type] || []).push(callback); },
+		clickthrough : function (name, url) { log("clickthrough", name, url); if (url) { window.open(url, "_blank"); } },
+		userActionCounter : function (name) { log("userActionCounter", name); },
+		automaticEventCounter : function (name) { log("automaticEventCounter", name); },
+		startTimer : function (name) { log("startTimer", name); },
+		stopTimer : function (name) { log("stopTimer", name); }
+	};
+	log("modules to load", window.EBModulesToLoad || []);
+	setTimeout(function () {
+		initialized = true;
+		log("EB_INITIALIZED");
+		(listeners[EBG.EventName.EB_INITIALIZED] || []).slice().forEach(function (callback) { callback(); });
+	}, config.init_ms);
+})();
+"""
+
+adform_stand_in = """(function () {
+	var config = ${config};
+	function log() { console.log.apply(console, ["[Adform.DHTML stand-in]"].concat(Array.prototype.slice.call(arguments))); }
+	var variables = {};
+	window.location.search.substring(1).split("&").forEach(function (pair) {
+		var parts = pair.split("=");
+		if (parts[0]) { variables[decodeURIComponent(parts[0])] = decodeURIComponent(parts.slice(1).join("=")); }
+	});
+	window.dhtml = {
+		getVar : function (name, fallback) { var value = variables.hasOwnProperty(name) ? variables[name] : fallback; log("getVar", name, value); return value; },
+		sendEvent : function (id, name) { log("sendEvent", id, name); }
+	};
+})();
+"""
+
+adfox_stand_in = """(function () {
+	var config = ${config};
+	console.log("[adfox_HTML5 stand-in] loaded; clicks open flashVars.reference + '@' + flashVars.link");
+})();
+"""
+
+# name : (stand-in source, [(regex of the sdk's url or loader in html and javascript, replacement)], url the load estimator knows it by)
+stand_ins = {
+	"enabler" : (enabler_stand_in, [(re.compile(r'(?:https?:)?//s0\.2mdn\.net/ads/studio/Enabler\.js'), stand_in_path + "enabler.js")], "s0.2mdn.net/ads/studio/Enabler.js"),
+	# Sizmek's EBLoader.js picks the url by protocol, so the whole write is replaced
+	"sizmek" : (sizmek_stand_in, [(re.compile(r'document\.write\([^;]*serving-sys\.com/BurstingScript/EBLoader\.js[^;]*\);'), "document.write(\"<script src='%ssizmek.js'><\\/script>\");" % stand_in_path)], "serving-sys.com/BurstingScript/EBLoader.js"),
+	"adform" : (adform_stand_in, [(re.compile(r'(?:https?:)?//s1\.adform\.net/banners/scripts/rmb/Adform\.DHTML\.js'), stand_in_path + "adform.js")], "adform.net/banners/scripts/rmb/Adform.DHTML.js"),
+	"adfox" : (adfox_stand_in, [(re.compile(r'(?:https?:)?//banners\.adfox\.ru/files/adfox_HTML5\.js'), stand_in_path + "adfox.js")], "banners.adfox.ru/files/adfox_HTML5.js"),
+}
+
+# (assumed bytes, initialization round trips) the load estimator uses for a stand-in's sdk
+def estimated_sdk(name):
+	for url_part, assumed_bytes, round_trips in hype_export_shared.load_estimate_external_scripts:
+		if url_part == stand_ins[name][2]:
+			return (assumed_bytes, round_trips)
+	return (0, 0)
+
+def stand_in_contents(name, options):
+	assumed_bytes, round_trips = estimated_sdk(name)
+	init_ms = options.sdk_init_ms if options.sdk_init_ms != None else round_trips * options.rtt_ms
+	config = {"init_ms" : init_ms, "visible_ms" : options.sdk_visible_ms}
+	contents = stand_ins[name][0].replace("${config}", json.dumps(config))
+	if options.no_sdk_padding == False and len(contents) < assumed_bytes:
+		# incompressible-ish filler, so throttling sees the sdk's weight
+		contents += "/*" + "".join("%08x" % (hash((name, index)) & 0xffffffff) for index in range((assumed_bytes - len(contents)) // 8)) + "*/\n"
+	return contents
+
+def rewrite_sdk_urls(contents):
+	for name, (source, replacements, url_part) in sorted(stand_ins.items()):
+		for regex, replacement in replacements:
+			contents = regex.sub(lambda match: replacement, contents)
+	return contents
+
+
+# THROTTLING
+
+# One link shared by all responses: each chunk is sent once the chunks before it would have
+# finished at the link's bandwidth, so concurrent responses split it between them.
+class SharedLink:
+	def __init__(self, kbps):
+		self.bytes_per_second = kbps * 1000.0 / 8.0 if kbps else None
+		self.lock = threading.Lock()
+		self.free_time = 0.0
+
+	def send(self, output, data, chunk_size=4096):
+		for start in range(0, len(data), chunk_size):
+			chunk = data[start:start + chunk_size]
+			if self.bytes_per_second != None:
+				with self.lock:
+					send_time = max(time.time(), self.free_time)
+					self.free_time = send_time + len(chunk) / self.bytes_per_second
+					done_time = self.free_time
+				time.sleep(max(0.0, done_time - time.time()))
+			output.write(chunk)
+
+
+# SERVER
+
+class PreviewServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+	daemon_threads = True
+	allow_reuse_address = True
+
+	def __init__(self, address, options):
+		BaseHTTPServer.HTTPServer.__init__(self, address, PreviewRequestHandler)
+		self.options = options
+		self.root = os.path.abspath(options.preview_folder)
+		self.link = SharedLink(options.kbps)
+		self.log_lock = threading.Lock()
+		self.page_start_time = time.time()
+
+	# a new page load: the waterfall restarts at its html request
+	def start_page(self, start_time, path):
+		with self.log_lock:
+			self.page_start_time = start_time
+			print "\n%-8s %9s %9s %9s  %s" % ("start", "first byte", "end", "bytes", "page load of " + path)
+
+	def log_record(self, record):
+		with self.log_lock:
+			if record.get("event") != None:
+				print "%9s %9s %9s %9s  %s (reported by the page)" % ("", "", "%.0fms" % record["ms"] if record.get("ms") != None else "?", "", record["event"])
+			else:
+				print "%8.0fms %8.0fms %8.0fms %9d  %s%s" % (record["start_ms"], record["first_byte_ms"], record["end_ms"], record["bytes"], record["path"], " (stand-in)" if record["stand_in"] else (" (not found)" if record["status"] == 404 else ""))
+			sys.stdout.flush()
+			if self.options.log != None:
+				with open(self.options.log, "a") as log_file:
+					log_file.write(json.dumps(record) + "\n")
+
+class PreviewRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+	server_version = "HypePreview/1.0"
+
+	def log_message(self, format, *args):
+		pass
+
+	# missing files are part of the waterfall too, as the page waited for them
+	def not_found(self, start_time):
+		self.send_error(404)
+		end_time = time.time()
+		self.server.log_record({"path" : self.path, "status" : 404, "stand_in" : False, "bytes" : 0, "start_ms" : self.milliseconds(start_time), "first_byte_ms" : self.milliseconds(end_time), "end_ms" : self.milliseconds(end_time), "time" : start_time})
+
+	def milliseconds(self, timestamp):
+		return (timestamp - self.server.page_start_time) * 1000.0
+
+	def do_POST(self):
+		if urlparse.urlparse(self.path).path != timing_path:
+			self.not_found(time.time())
+			return
+		try:
+			report = json.loads(self.rfile.read(int(self.headers.getheader("Content-Length") or 0)))
+		except ValueError:
+			report = {}
+		self.send_response(204)
+		self.end_headers()
+		self.server.log_record({"event" : report.get("event"), "ms" : report.get("ms"), "time" : time.time()})
+
+	def do_GET(self):
+		start_time = time.time()
+		path = urlparse.unquote(urlparse.urlparse(self.path).path)
+		stand_in = path.startswith(stand_in_path)
+		if stand_in:
+			name = os.path.splitext(path[len(stand_in_path):])[0]
+			if name not in stand_ins:
+				self.not_found(start_time)
+				return
+			contents = stand_in_contents(name, self.server.options)
+			content_type = "application/javascript"
+		else:
+			file_path = os.path.abspath(os.path.join(self.server.root, path.lstrip("/")))
+			if os.path.isdir(file_path):
+				file_path = os.path.join(file_path, "index.html")
+			if file_path != self.server.root and file_path.startswith(self.server.root + os.sep) == False or os.path.isfile(file_path) == False:
+				self.not_found(start_time)
+				return
+			with open(file_path, "rb") as served_file:
+				contents = served_file.read()
+			extension = os.path.splitext(file_path)[1].lower()
+			content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+			if extension in (".html", ".htm", ".js"):
+				contents = rewrite_sdk_urls(contents)
+			if extension in (".html", ".htm"):
+				self.server.start_page(start_time, path)
+				if self.server.options.no_timing_beacon == False:
+					contents = re.sub(r'(<head\b[^>]*>)', lambda match: match.group(1) + timing_beacon, contents, count=1, flags=re.IGNORECASE)
+
+		# the request's round trip before the first byte
+		time.sleep(self.server.options.rtt_ms / 1000.0)
+		first_byte_time = time.time()
+		self.send_response(200)
+		self.send_header("Content-Type", content_type)
+		self.send_header("Content-Length", str(len(contents)))
+		self.send_header("Cache-Control", "no-store")
+		self.end_headers()
+		try:
+			self.server.link.send(self.wfile, contents)
+		except IOError:
+			pass
+		end_time = time.time()
+		self.server.log_record({"path" : self.path, "status" : 200, "stand_in" : stand_in, "bytes" : len(contents), "start_ms" : self.milliseconds(start_time), "first_byte_ms" : self.milliseconds(first_byte_time), "end_ms" : self.milliseconds(end_time), "time" : start_time})
+
+def main():
+	parser = argparse.ArgumentParser(description="Serve a preview folder with ad network sdk stand-ins, simulated latency and bandwidth, and a request waterfall.")
+	parser.add_argument('preview_folder')
+	parser.add_argument('--port', type=int, default=8000)
+	parser.add_argument('--host', default="127.0.0.1")
+	parser.add_argument('--profile', help="network profile (%s, or custom values like rtt_ms=300,kbps=1000)" % ", ".join(sorted(hype_export_shared.load_profiles)))
+	parser.add_argument('--rtt_ms', type=float, help="round trip before every response (overrides the profile)")
+	parser.add_argument('--kbps', type=float, help="bandwidth shared by all responses (overrides the profile)")
+	parser.add_argument('--sdk_init_ms', type=float, help="delay before the stand-ins initialize (default the sdk's round trips at --rtt_ms)")
+	parser.add_argument('--sdk_visible_ms', type=float, default=0, help="delay between Enabler's INIT and VISIBLE")
+	parser.add_argument('--no_sdk_padding', action='store_true', help="serve the stand-ins at their own size instead of the sdk's assumed size")
+	parser.add_argument('--no_timing_beacon', action='store_true', help="don't add the first scene and load reporting to html pages")
+	parser.add_argument('--log', help="append each request and reported event as a json line to this file")
+	options = parser.parse_args()
+
+	if os.path.isdir(options.preview_folder) == False:
+		parser.error("%s is not a folder" % options.preview_folder)
+	profile = hype_export_shared.load_profile(options.profile) if options.profile != None else {"rtt_ms" : 0.0, "kbps" : None}
+	if options.rtt_ms == None:
+		options.rtt_ms = profile["rtt_ms"]
+	if options.kbps == None:
+		options.kbps = profile["kbps"]
+
+	server = PreviewServer((options.host, options.port), options)
+	print "serving %s at http://%s:%d/ (rtt %.0fms, %s)" % (server.root, options.host, server.server_address[1], options.rtt_ms, "%.0f kbps" % options.kbps if options.kbps else "unthrottled")
+	sys.stdout.flush()
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+
+
+if __name__ == "__main__":
+	main()
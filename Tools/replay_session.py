@@ -0,0 +1,235 @@
+#!/usr/bin/python
+
+# 	replay_session.py
+#		Replays an export session recorded with HYPE_EXPORT_RECORD_FOLDER: every --get_options,
+#		--replace_url and --modify_staging_path call Hype made, with the same arguments and the
+#		staging folder and export_info.json as they were, against the current (or any other)
+#		version of the script. No Mac or Hype is needed, so recorded sessions of real documents can
+#		be used as benchmarks and regression tests on Linux.
+#
+#		Each replayed result is compared with the recorded one, and the package written by
+#		--modify_staging_path is compared member by member (by CRC). The report separates the time
+#		spent inside the script from process spawn overhead, and shows how long packaging took.
+#
+#		Usage:
+#			HYPE_EXPORT_RECORD_FOLDER=~/hype-recordings <export from Hype>
+#			replay_session.py ~/hype-recordings/<export_uid> [--script ./Sizmek.hype-export.py] [--jobs 8] [--report_path report.json]
+#		exits with 1 if a replayed result or package differs from the recording
+#
+#		MIT License
+#		Copyright (c) 2026 Tumult Inc.
+#
+
+import argparse
+import json
+import os
+import Queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import hype_export_tools
+import hype_export_shared
+
+
+def read_invocations(session_folder):
+	invocations = []
+	with open(os.path.join(session_folder, "invocations.jsonl"), 'r') as invocations_file:
+		for line in invocations_file:
+			if line.strip() != "":
+				invocations.append(json.loads(line))
+	invocations.sort(key=lambda invocation: invocation["start_time"])
+	for index, invocation in enumerate(invocations):
+		invocation["index"] = index
+	return invocations
+
+def replayed_script_path(invocation, script_override):
+	if script_override != None:
+		return hype_export_tools.find_export_script(script_override)
+	try:
+		return hype_export_tools.find_export_script(invocation["script"])
+	except ValueError:
+		return invocation["script_path"]
+
+def restore_file(record_folder, digest, destination_path, mode=None):
+	object_path = os.path.join(record_folder, "objects", digest[:2], digest)
+	shutil.copyfile(object_path, hype_export_shared.prepared_path(destination_path))
+	if mode != None:
+		os.chmod(destination_path, mode)
+
+def replace_argument(arguments, name, value):
+	arguments = list(arguments)
+	if name in arguments and arguments.index(name) + 1 < len(arguments):
+		arguments[arguments.index(name) + 1] = value
+	return arguments
+
+# arguments for replaying an invocation in work_folder, with its snapshot restored
+def prepare_invocation(invocation, record_folder, work_folder):
+	arguments = invocation["arguments"]
+	snapshot = invocation.get("snapshot")
+	if snapshot == None:
+		return arguments
+
+	staging_path = os.path.join(work_folder, "staging")
+	os.makedirs(staging_path)
+	for relative_path, (digest, mode) in (snapshot.get("staging") or {}).items():
+		restore_file(record_folder, digest, os.path.join(staging_path, relative_path), mode)
+	arguments = replace_argument(arguments, "--modify_staging_path", staging_path)
+
+	if snapshot.get("export_info") != None:
+		export_info_json_path = os.path.join(work_folder, "export_info.json")
+		restore_file(record_folder, snapshot["export_info"], export_info_json_path)
+		arguments = replace_argument(arguments, "--export_info_json_path", export_info_json_path)
+
+	destination_path = hype_export_shared.invocation_argument(arguments, "--destination_path")
+	if destination_path != None:
+		arguments = replace_argument(arguments, "--destination_path", os.path.join(work_folder, "output", os.path.basename(destination_path.rstrip(os.sep))))
+		os.makedirs(os.path.join(work_folder, "output"))
+	return arguments
+
+def parse_timing(output):
+	if hype_export_tools.result_delimiter not in output:
+		return None
+	try:
+		return json.loads(output.rsplit(hype_export_tools.result_delimiter, 1)[1]).get("timing")
+	except ValueError:
+		return None
+
+def compare_destinations(recorded, replayed):
+	if recorded == replayed:
+		return []
+	if recorded == None or replayed == None:
+		return ["destination %s" % ("missing" if replayed == None else "not written when recorded")]
+	differences = []
+	for name in sorted(set(recorded) | set(replayed)):
+		if name not in replayed:
+			differences.append("missing %s" % name)
+		elif name not in recorded:
+			differences.append("added %s" % name)
+		elif recorded[name] != replayed[name]:
+			differences.append("changed %s" % name)
+	return differences
+
+def replay_invocation(invocation, record_folder, script_override):
+	outcome = {"index" : invocation["index"], "script" : invocation["script"], "mode" : invocation["mode"]}
+	if invocation["mode"] == "replace_url":
+		outcome["url"] = hype_export_shared.invocation_argument(invocation["arguments"], "--replace_url")
+
+	work_folder = tempfile.mkdtemp(prefix="hype-replay-")
+	try:
+		arguments = prepare_invocation(invocation, record_folder, work_folder)
+
+		# replays report their own timing, and aren't recorded again
+		environment = dict(os.environ)
+		environment.pop(hype_export_shared.record_folder_environment_variable, None)
+		environment[hype_export_shared.timing_in_result_environment_variable] = "1"
+
+		working_directory = invocation["cwd"] if os.path.isdir(invocation.get("cwd", "")) else work_folder
+		start_time = time.time()
+		process = subprocess.Popen([sys.executable, replayed_script_path(invocation, script_override)] + arguments, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=environment, cwd=working_directory, close_fds=True)
+		output = process.communicate()[0]
+		outcome["wall_time"] = time.time() - start_time
+
+		timing = parse_timing(output)
+		if timing != None:
+			outcome["script_time"] = timing["duration"]
+			outcome["process_overhead"] = max(0.0, outcome["wall_time"] - timing["duration"])
+			outcome["packaging_time"] = timing["phases"].get("zip", 0.0) + timing["phases"].get("move", 0.0) + timing["phases"].get("remove", 0.0)
+		outcome["recorded_script_time"] = invocation["duration"]
+
+		differences = []
+		if process.returncode != invocation["exit_code"]:
+			differences.append("exit code %d, recorded %d" % (process.returncode, invocation["exit_code"]))
+		replayed_result = hype_export_tools.parse_export_script_output(output)
+		recorded_result = hype_export_tools.parse_export_script_output(invocation["output"])
+		if replayed_result != recorded_result:
+			differences.append("result %s, recorded %s" % (json.dumps(replayed_result), json.dumps(recorded_result)))
+		if "destination" in invocation:
+			destination_path = hype_export_shared.invocation_argument(arguments, "--destination_path")
+			differences += compare_destinations(invocation["destination"], hype_export_shared.destination_manifest(destination_path))
+		outcome["differences"] = differences
+		if len(differences) > 0:
+			outcome["output"] = output[-2000:]
+	except Exception as e:
+		outcome["differences"] = ["%s: %s" % (e.__class__.__name__, e)]
+	finally:
+		shutil.rmtree(work_folder, ignore_errors=True)
+	return outcome
+
+def replay_invocations(invocations, record_folder, script_override, concurrency):
+	invocation_queue = Queue.Queue()
+	for invocation in invocations:
+		invocation_queue.put(invocation)
+
+	outcomes = []
+	outcomes_lock = threading.Lock()
+	def worker():
+		while True:
+			try:
+				invocation = invocation_queue.get_nowait()
+			except Queue.Empty:
+				return
+			outcome = replay_invocation(invocation, record_folder, script_override)
+			with outcomes_lock:
+				outcomes.append(outcome)
+
+	threads = [threading.Thread(target=worker) for index in range(max(1, min(concurrency, len(invocations))))]
+	for thread in threads:
+		thread.daemon = True
+		thread.start()
+	for thread in threads:
+		while thread.is_alive():
+			thread.join(0.1)
+	return sorted(outcomes, key=lambda outcome: outcome["index"])
+
+def summarize(outcomes, wall_time, concurrency):
+	modes = {}
+	for outcome in outcomes:
+		mode = modes.setdefault(outcome["mode"], {"invocations" : 0, "wall_time" : 0.0, "script_time" : 0.0, "process_overhead" : 0.0, "packaging_time" : 0.0, "recorded_script_time" : 0.0})
+		mode["invocations"] += 1
+		for key in ["wall_time", "script_time", "process_overhead", "packaging_time", "recorded_script_time"]:
+			mode[key] += outcome.get(key) or 0.0
+	return {
+		"invocations" : len(outcomes),
+		"concurrency" : concurrency,
+		"wall_time" : wall_time,
+		"modes" : modes,
+		"mismatches" : len([outcome for outcome in outcomes if len(outcome["differences"]) > 0]),
+		"outcomes" : outcomes,
+	}
+
+def main():
+	parser = argparse.ArgumentParser(description="Replay a recorded Hype export session against an Export Script.")
+	parser.add_argument('session_folder', help="<record folder>/<export_uid>")
+	parser.add_argument('--script', help="export script name or path to replay against (default: the recorded script in this repository)")
+	parser.add_argument('--jobs', type=int, default=1, help="invocations replayed at once (1 replays serially, in recorded order)")
+	parser.add_argument('--report_path', help="write the report as json to this path")
+	args = parser.parse_args()
+
+	session_folder = os.path.abspath(os.path.expanduser(args.session_folder))
+	record_folder = os.path.dirname(session_folder)
+	invocations = read_invocations(session_folder)
+
+	start_time = time.time()
+	outcomes = replay_invocations(invocations, record_folder, args.script, args.jobs)
+	summary = summarize(outcomes, time.time() - start_time, args.jobs)
+
+	print "%-22s %6s %10s %10s %10s %10s %10s" % ("mode", "calls", "wall", "in script", "overhead", "packaging", "recorded")
+	for mode_name, mode in sorted(summary["modes"].items()):
+		print "%-22s %6d %9.3fs %9.3fs %9.3fs %9.3fs %9.3fs" % (mode_name, mode["invocations"], mode["wall_time"], mode["script_time"], mode["process_overhead"], mode["packaging_time"], mode["recorded_script_time"])
+	print "replayed %d invocations in %.3fs with %d job%s, %d differ from the recording" % (summary["invocations"], summary["wall_time"], args.jobs, "" if args.jobs == 1 else "s", summary["mismatches"])
+	for outcome in outcomes:
+		for difference in outcome["differences"]:
+			print "DIFFERS #%d %s %s: %s" % (outcome["index"], outcome["mode"], outcome.get("url", ""), difference)
+
+	if args.report_path != None:
+		hype_export_tools.write_json(args.report_path, summary)
+
+	sys.exit(0 if summary["mismatches"] == 0 else 1)
+
+
+if __name__ == "__main__":
+	main()